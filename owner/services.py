@@ -1,12 +1,17 @@
 import json
 from datetime import timedelta
 
-from django.db.models import Count, F, Sum
-from django.db.models.functions import TruncDate
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
 from django.utils import timezone
 
-from payment.models import Payment
-from product.models import Category, Customer, Order, OrderItem, Product
+from payment.models import ArchivedPaymentRollup, Payment
+from product.models import IN_STOCK, ArchivedOrder, ArchivedSalesRollup, Category, Customer, DemandForecast, Order, OrderItem, Product
+from product.services.archive_service import OrderArchiveService
+from supermarket.core.db_router import replica_reads
+
+
+PAID_STATUSES = ["PAID", "SHIPPED", "DELIVERED"]
 
 
 class OwnerAnalyticsService:
@@ -17,40 +22,58 @@ class OwnerAnalyticsService:
             return today
         if period == "week":
             return today - timedelta(days=7)
+        if period == "year":
+            return today - timedelta(days=365)
+        if period == "all":
+            return None
         return today - timedelta(days=30)
 
     @classmethod
+    @replica_reads()
     def overview_metrics(cls, period: str = "month"):
         start_date = cls._period_start(period)
-        orders = Order.objects.filter(created_at__date__gte=start_date)
-        paid_orders = orders.filter(status__in=["PAID", "SHIPPED", "DELIVERED"])
+        orders = Order.objects.filter(created_at__date__gte=start_date) if start_date else Order.objects.all()
+        paid_orders = orders.filter(status__in=PAID_STATUSES)
+        # Archived orders are all closed, so none of them are pending.
+        archived = OrderArchiveService.archived_orders(start_date).aggregate(
+            total=Count("id"),
+            paid=Count("id", filter=Q(status__in=PAID_STATUSES)),
+            failed=Count("id", filter=Q(status__in=["FAILED", "CANCELLED"])),
+            revenue=Sum("total_price", filter=Q(status__in=PAID_STATUSES)),
+        )
 
-        revenue = paid_orders.aggregate(total=Sum("total_price"))["total"] or 0
-        low_stock = Product.objects.filter(stock__lte=5, is_active=True).order_by("stock", "name")[:8]
+        revenue = (paid_orders.aggregate(total=Sum("total_price"))["total"] or 0) + (archived["revenue"] or 0)
+        low_stock = Product.objects.filter(is_active=True).exclude(stock_status=IN_STOCK).order_by("stock", "name")[:8]
 
         return {
             "period": period,
             "total_products": Product.objects.filter(is_active=True).count(),
-            "total_orders": orders.count(),
-            "paid_orders": paid_orders.count(),
+            "total_orders": orders.count() + archived["total"],
+            "paid_orders": paid_orders.count() + archived["paid"],
             "pending_orders": orders.filter(status="PENDING").count(),
-            "failed_orders": orders.filter(status__in=["FAILED", "CANCELLED"]).count(),
+            "failed_orders": orders.filter(status__in=["FAILED", "CANCELLED"]).count() + archived["failed"],
             "revenue": revenue,
-            "recent_orders": orders.select_related("customer").prefetch_related("items")[:10],
-            "low_stock": low_stock,
+            # Evaluated here so the queries run on the replica, not at render time.
+            "recent_orders": list(orders.select_related("customer").prefetch_related("items")[:10]),
+            "low_stock": list(low_stock),
         }
 
     @staticmethod
+    @replica_reads()
     def sales_trend(days: int = 14):
         start_date = timezone.now().date() - timedelta(days=days - 1)
-        rows = (
-            Order.objects.filter(status__in=["PAID", "SHIPPED", "DELIVERED"], created_at__date__gte=start_date)
-            .annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(total=Sum("total_price"))
-            .order_by("day")
-        )
-        by_day = {row["day"].isoformat(): float(row["total"] or 0) for row in rows}
+        by_day = {}
+        for orders in (Order.objects.all(), OrderArchiveService.archived_orders(start_date)):
+            rows = (
+                orders.filter(status__in=PAID_STATUSES, created_at__date__gte=start_date)
+                .annotate(day=TruncDate("created_at"))
+                .values("day")
+                .annotate(total=Sum("total_price"))
+                .order_by("day")
+            )
+            for row in rows:
+                key = row["day"].isoformat()
+                by_day[key] = by_day.get(key, 0.0) + float(row["total"] or 0)
 
         labels = []
         totals = []
@@ -63,32 +86,72 @@ class OwnerAnalyticsService:
         return {"labels": labels, "totals": totals}
 
     @staticmethod
-    def top_products(limit: int = 5):
-        rows = (
-            OrderItem.objects.filter(order__status__in=["PAID", "SHIPPED", "DELIVERED"])
+    def _with_archived_sales(live, archived, key, value, limit):
+        """Top ``limit`` of ``live`` OrderItem totals plus the matching ``archived`` rollup totals.
+
+        Without archived sales the limit stays in SQL; otherwise both sides
+        are grouped in full and merged, since an archived total can lift a
+        row into the top ``limit``.
+        """
+        if not OrderArchiveService.archive_reaches(None):
+            return [(row[key], row[value]) for row in live.order_by(f"-{value}")[:limit]]
+        totals = {}
+        for rows in (live, archived):
+            for row in rows.order_by():
+                totals[row[key]] = totals.get(row[key], 0) + (row[value] or 0)
+        return sorted(totals.items(), key=lambda pair: pair[1], reverse=True)[:limit]
+
+    @classmethod
+    @replica_reads()
+    def top_products(cls, limit: int = 5):
+        rows = cls._with_archived_sales(
+            OrderItem.objects.filter(order__status__in=PAID_STATUSES)
             .values("product__name")
-            .annotate(total_sold=Sum("quantity"))
-            .order_by("-total_sold")[:limit]
+            .annotate(total_sold=Sum("quantity")),
+            ArchivedSalesRollup.objects.values("product__name").annotate(total_sold=Sum("units")),
+            "product__name",
+            "total_sold",
+            limit,
         )
-        return [{"name": row["product__name"], "total_sold": row["total_sold"]} for row in rows]
+        return [{"name": name, "total_sold": total_sold} for name, total_sold in rows]
+
+    @classmethod
+    @replica_reads()
+    def revenue_by_category(cls, limit: int = 8):
+        rows = cls._with_archived_sales(
+            OrderItem.objects.filter(order__status__in=PAID_STATUSES)
+            .values("product__category__name")
+            .annotate(revenue=Sum(F("price") * F("quantity"))),
+            ArchivedSalesRollup.objects.values("product__category__name").annotate(revenue=Sum("revenue")),
+            "product__category__name",
+            "revenue",
+            limit,
+        )
+        return [{"category": category or "Uncategorized", "revenue": float(revenue or 0)} for category, revenue in rows]
 
     @staticmethod
-    def revenue_by_category(limit: int = 8):
+    @replica_reads()
+    def demand_forecast(limit: int = 10, horizon: int = 7):
         rows = (
-            OrderItem.objects.filter(order__status__in=["PAID", "SHIPPED", "DELIVERED"])
-            .values("product__category__name")
-            .annotate(revenue=Sum(F("price") * F("quantity")))
-            .order_by("-revenue")[:limit]
+            DemandForecast.objects.filter(product__is_active=True)
+            .select_related("product")
+            .order_by("-daily_demand")[:limit]
         )
         return [
             {
-                "category": row["product__category__name"] or "Uncategorized",
-                "revenue": float(row["revenue"] or 0),
+                "name": row.product.name,
+                "daily_demand": round(row.daily_demand, 2),
+                "moving_average": round(row.moving_average, 2),
+                "expected_units": round(row.units_over(horizon)),
+                "stock": row.product.stock,
+                "days_of_cover": round(row.product.stock / row.daily_demand, 1) if row.daily_demand else None,
+                "generated_at": row.generated_at,
             }
             for row in rows
         ]
 
     @classmethod
+    @replica_reads()
     def chart_payloads(cls):
         trend = cls.sales_trend(days=14)
         top = cls.top_products(limit=6)
@@ -99,6 +162,10 @@ class OwnerAnalyticsService:
             "failed": Payment.objects.filter(status="FAILED").count(),
             "refunded": Payment.objects.filter(status="REFUNDED").count(),
         }
+        for status, payments in ArchivedPaymentRollup.objects.values("status").annotate(total=Sum("payments")).values_list("status", "total"):
+            key = status.lower()
+            if key in payment_split:
+                payment_split[key] += payments
         return {
             "sales_trend": json.dumps(trend),
             "top_products": json.dumps(top),
@@ -126,7 +193,14 @@ class OwnerQueryService:
 
     @staticmethod
     def customer_queryset(search: str = ""):
-        queryset = Customer.objects.annotate(total_orders=Count("order"))
+        archived_orders = (
+            ArchivedOrder.objects.filter(customer=OuterRef("pk"))
+            .order_by()
+            .values("customer")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        queryset = Customer.objects.annotate(total_orders=Count("order") + Coalesce(Subquery(archived_orders), 0))
         if search:
             queryset = queryset.filter(phone_number__icontains=search)
         return queryset.order_by("-created_at")
@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
+
+from product.models import DemandForecast, Product
 
 
 class OwnerDashboardAccessTests(TestCase):
@@ -21,3 +24,20 @@ class OwnerDashboardAccessTests(TestCase):
         self.client.login(username="customer", password="Pass12345")
         response = self.client.get(reverse("owner:dashboard"))
         self.assertEqual(response.status_code, 403)
+
+
+class OwnerAnalyticsTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="owner", password="Pass12345", is_staff=True)
+        self.client.login(username="owner", password="Pass12345")
+
+    def test_analytics_lists_demand_forecasts(self):
+        rice = Product.objects.create(name="Rice", price=200, stock=30)
+        DemandForecast.objects.create(
+            product=rice, daily_demand=2.5, moving_average=3, demand_std=1, units_sold=90,
+            history_days=90, generated_at=timezone.now(),
+        )
+        response = self.client.get(reverse("owner:analytics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["forecast_table"][0]["expected_units"], 18)
+        self.assertEqual(response.context["forecast_table"][0]["days_of_cover"], 12.0)
@@ -9,6 +9,7 @@ from django.views import View
 from django.views.generic import CreateView, DeleteView, DetailView, ListView, TemplateView, UpdateView
 
 from product.models import Category, Customer, Order, Product, ProductReview
+from product.services.stock_ledger import stock_movement_context
 
 from .forms import CategoryForm, OrderStatusForm, OwnerProductForm
 from .services import OwnerAnalyticsService, OwnerQueryService
@@ -56,7 +57,8 @@ class ProductCreateView(OwnerRequiredMixin, CreateView):
 
     def form_valid(self, form):
         messages.success(self.request, "Product created successfully.")
-        return super().form_valid(form)
+        with stock_movement_context(user=self.request.user, note="owner product form"):
+            return super().form_valid(form)
 
 
 class ProductUpdateView(OwnerRequiredMixin, UpdateView):
@@ -67,7 +69,8 @@ class ProductUpdateView(OwnerRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         messages.success(self.request, "Product updated successfully.")
-        return super().form_valid(form)
+        with stock_movement_context(user=self.request.user, note="owner product form"):
+            return super().form_valid(form)
 
 
 class ProductDeleteView(OwnerRequiredMixin, DeleteView):
@@ -194,4 +197,5 @@ class AnalyticsView(OwnerRequiredMixin, TemplateView):
         context.update(OwnerAnalyticsService.chart_payloads())
         context["top_products_table"] = OwnerAnalyticsService.top_products(limit=10)
         context["revenue_category_table"] = OwnerAnalyticsService.revenue_by_category(limit=10)
+        context["forecast_table"] = OwnerAnalyticsService.demand_forecast(limit=10)
         return context
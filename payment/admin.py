@@ -4,8 +4,9 @@ from django.shortcuts import redirect, render
 from django.utils.html import format_html, mark_safe
 from django.db import transaction
 
-from .models import Payment, StockDeductionLog
-from product.models import Product, Order
+from .models import ArchivedPaymentRollup, Payment, StockDeductionLog
+from product.models import Product, Order, StockMovement
+from product.services.stock_ledger import stock_movement_context
 
 
 # -------------------- Stock Deduction Log Admin -------------------- #
@@ -32,7 +33,10 @@ class StockDeductionLogAdmin(admin.ModelAdmin):
                             f"Available: {product.stock}, Tried to deduct: {obj.quantity}"
                         )
                     product.stock -= obj.quantity
-                    product.save()
+                    with stock_movement_context(
+                        StockMovement.SALE, order=obj.order, user=request.user, note="manual deduction"
+                    ):
+                        product.save()
                     messages.success(
                         request,
                         f"✅ Stock reduced: {obj.quantity}x {product.name} (manual deduct by {request.user.username})",
@@ -48,13 +52,14 @@ class PaymentAdmin(admin.ModelAdmin):
         "id",
         "order",
         "status",
+        "method",
         "amount",
         "mpesa_receipt_no",
         "transaction_date",
         "rolled_back_status",
         "rollback_button",
     )
-    list_filter = ("status",)
+    list_filter = ("status", "method")
     readonly_fields = ("rolled_back_status",)
     actions = ["manual_stock_rollback"]
 
@@ -141,6 +146,14 @@ class PaymentAdmin(admin.ModelAdmin):
         ).exists()
 
 
+# -------------------- Archived Payment Rollup Admin -------------------- #
+@admin.register(ArchivedPaymentRollup)
+class ArchivedPaymentRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "status", "method", "payments", "amount")
+    list_filter = ("status", "method")
+    date_hierarchy = "day"
+
+
 # -------------------- Shared rollback helper -------------------- #
 def rollback_stock_deduction(payment, user):
     """Utility to rollback stock for a payment."""
@@ -149,7 +162,8 @@ def rollback_stock_deduction(payment, user):
         for item in order.items.all():
             product = item.product
             product.stock += item.quantity
-            product.save()
+            with stock_movement_context(StockMovement.ROLLBACK, order=order, user=user, note="admin rollback"):
+                product.save()
 
             StockDeductionLog.objects.create(
                 order=order,
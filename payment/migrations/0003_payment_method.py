@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0002_alter_payment_created_at_alter_payment_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='method',
+            field=models.CharField(choices=[('MPESA', 'M-Pesa'), ('CASH', 'Cash')], default='MPESA', max_length=10),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0003_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('FAILED', 'Failed'), ('REFUNDED', 'Refunded')], max_length=20)),
+                ('method', models.CharField(choices=[('MPESA', 'M-Pesa'), ('CASH', 'Cash')], max_length=10)),
+                ('payments', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ('-day',),
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'method'), name='unique_archived_payments_per_day')],
+            },
+        ),
+    ]
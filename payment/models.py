@@ -16,6 +16,13 @@ class Payment(models.Model):
         (STATUS_REFUNDED, "Refunded"),
     ]
 
+    METHOD_MPESA = "MPESA"
+    METHOD_CASH = "CASH"
+    METHOD_CHOICES = [
+        (METHOD_MPESA, "M-Pesa"),
+        (METHOD_CASH, "Cash"),
+    ]
+
     # 👇 Linked to product.Order
     order = models.ForeignKey(
         "product.Order", on_delete=models.CASCADE, related_name="payments"
@@ -24,6 +31,7 @@ class Payment(models.Model):
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True
     )
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES, default=METHOD_MPESA)
 
     # 👇 Allow null/blank for historical data
     mpesa_receipt_no = models.CharField(max_length=50, null=True, blank=True)
@@ -83,3 +91,21 @@ class StockDeductionLog(models.Model):
 
     def __str__(self):
         return f"{self.action} {self.quantity}x {self.product.name} (Order {self.order.id})"
+
+
+class ArchivedPaymentRollup(models.Model):
+    """Payment counts and amounts per day, status and method for archived orders."""
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Payment.STATUS_CHOICES)
+    method = models.CharField(max_length=10, choices=Payment.METHOD_CHOICES)
+    payments = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ("-day",)
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status", "method"], name="unique_archived_payments_per_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status} {self.method}: {self.payments}"
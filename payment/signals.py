@@ -1,3 +1,4 @@
+from django.core.signals import setting_changed
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -17,3 +18,12 @@ def sync_order_status_with_payment(sender, instance, **kwargs):
     elif instance.status == Payment.STATUS_REFUNDED and order.status != "REFUNDED":
         order.status = "REFUNDED"
         order.save(update_fields=["status"])
+
+
+@receiver(setting_changed)
+def reset_sms_backend_on_settings_change(sender, setting, **kwargs):
+    """Rebuild the shared SMS backend when tests override its settings."""
+    if setting in ("SMS_BACKEND", "SMS_BACKEND_OPTIONS"):
+        from .sms import reset_sms_backend
+
+        reset_sms_backend()
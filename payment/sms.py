@@ -1,24 +1,168 @@
-import africastalking
-from django.conf import settings
+"""SMS gateway with pluggable backends.
+
+The backend is chosen with ``settings.SMS_BACKEND`` (a dotted path) and is
+built lazily on first use, then shared by the whole process so repeated
+sends reuse the same HTTP connection pool. Importing this module does no
+network-client setup.
+"""
 import logging
+import sys
+import threading
+from dataclasses import dataclass, field
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
 
 logger = logging.getLogger(__name__)
 
-# Initialize Africa's Talking client
-africastalking.initialize(
-    settings.AFRICASTALKING_USERNAME,
-    settings.AFRICASTALKING_API_KEY
-)
-sms = africastalking.SMS
+DEFAULT_SMS_BACKEND = "payment.sms.AfricasTalkingBackend"
 
-def send_sms(phone_number, message):
+# Messages captured by LocMemBackend, mirroring django.core.mail.outbox.
+outbox = []
+
+
+@dataclass
+class SMSMessage:
+    recipients: list
+    message: str
+    response: dict = field(default_factory=dict)
+
+
+class BaseSMSBackend:
+    """Interface every SMS backend implements."""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def send_messages(self, recipients, message):
+        """Send one message to many recipients and return the provider response."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any pooled connections."""
+
+
+class AfricasTalkingBackend(BaseSMSBackend):
+    """Africa's Talking messaging API over a pooled ``requests.Session``."""
+
+    SANDBOX_URL = "https://api.sandbox.africastalking.com/version1/messaging"
+    PRODUCTION_URL = "https://api.africastalking.com/version1/messaging"
+    MAX_RECIPIENTS_PER_REQUEST = 1000
+
+    def __init__(self, username=None, api_key=None, sender_id=None, timeout=10, **options):
+        super().__init__(**options)
+        self.username = username or settings.AFRICASTALKING_USERNAME
+        self.api_key = api_key or settings.AFRICASTALKING_API_KEY
+        self.sender_id = sender_id
+        self.timeout = timeout
+        self.url = self.SANDBOX_URL if self.username == "sandbox" else self.PRODUCTION_URL
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    session.headers.update(
+                        {
+                            "Accept": "application/json",
+                            "apiKey": self.api_key,
+                        }
+                    )
+                    self._session = session
+        return self._session
+
+    def send_messages(self, recipients, message):
+        responses = []
+        for start in range(0, len(recipients), self.MAX_RECIPIENTS_PER_REQUEST):
+            batch = recipients[start:start + self.MAX_RECIPIENTS_PER_REQUEST]
+            data = {
+                "username": self.username,
+                "to": ",".join(batch),
+                "message": message,
+                "bulkSMSMode": 1,
+            }
+            if self.sender_id:
+                data["from"] = self.sender_id
+            response = self.session.post(self.url, data=data, timeout=self.timeout)
+            response.raise_for_status()
+            responses.append(response.json())
+        return responses[0] if len(responses) == 1 else {"batches": responses}
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class ConsoleBackend(BaseSMSBackend):
+    """Write messages to stdout instead of sending them (development)."""
+
+    def __init__(self, stream=None, **options):
+        super().__init__(**options)
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def send_messages(self, recipients, message):
+        with self._lock:
+            self.stream.write(f"SMS to {', '.join(recipients)}:\n{message}\n{'-' * 40}\n")
+            self.stream.flush()
+        return {"recipients": len(recipients), "backend": "console"}
+
+
+class LocMemBackend(BaseSMSBackend):
+    """Store messages in ``payment.sms.outbox`` (tests)."""
+
+    def send_messages(self, recipients, message):
+        response = {"recipients": len(recipients), "backend": "locmem"}
+        outbox.append(SMSMessage(recipients=list(recipients), message=message, response=response))
+        return response
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_sms_backend():
+    """Return the process-wide SMS backend, constructing it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(settings, "SMS_BACKEND", DEFAULT_SMS_BACKEND)
+                options = getattr(settings, "SMS_BACKEND_OPTIONS", {})
+                _backend = import_string(backend_path)(**options)
+    return _backend
+
+
+def reset_sms_backend():
+    """Drop the shared backend so the next send rebuilds it from settings."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+        _backend = None
+
+
+def send_bulk_sms(phone_numbers, message):
     """
-    Send an SMS via Africa's Talking
+    Send the same SMS to many recipients via the configured backend
     """
+    recipients = [str(phone) for phone in phone_numbers]
     try:
-        response = sms.send(message, [str(phone_number)])
-        logger.info("📲 SMS sent to %s: %s", phone_number, response)
+        response = get_sms_backend().send_messages(recipients, message)
+        logger.info("📲 SMS sent to %s recipient(s): %s", len(recipients), response)
         return True, response
     except Exception as e:
-        logger.error("❌ Failed to send SMS to %s: %s", phone_number, e)
+        logger.error("❌ Failed to send SMS to %s: %s", ", ".join(recipients), e)
         return False, str(e)
+
+
+def send_sms(phone_number, message):
+    """
+    Send an SMS via the configured backend
+    """
+    return send_bulk_sms([phone_number], message)
@@ -4,6 +4,8 @@ from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
 
+from .sms import send_sms
+
 logger = logging.getLogger(__name__)
 
 # ---------------- EMAIL TASK ---------------- #
@@ -30,17 +32,14 @@ def send_email_task(self, subject, message, recipient_email):
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)  
 def send_sms_task(self, phone, message):
     """
-    Send SMS with retry (3 times, 30s apart).
-    Replace with your actual SMS provider API.
+    Send SMS with retry (3 times, 30s apart) through the shared SMS gateway.
     """
     try:
-        # TODO: Replace with Africa’s Talking / Twilio / Safaricom SMS API
         logger.info("📲 Sending SMS to %s: %s", phone, message)
 
-        # Simulated SMS API call
-        success = True  # change this to API response check
+        success, details = send_sms(phone, message)
         if not success:
-            raise Exception("SMS gateway error")
+            raise Exception(f"SMS gateway error: {details}")
 
         logger.info("✅ SMS delivered to %s", phone)
 
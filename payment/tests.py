@@ -1,3 +1,106 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from payment import sms
+from payment.models import Payment, StockDeductionLog
+from payment.utils import InsufficientStock, apply_stock_deduction, rollback_stock_deduction
+from product.models import Order, OrderItem, Product
+
+
+@override_settings(SMS_BACKEND="payment.sms.LocMemBackend")
+class SMSGatewayTests(SimpleTestCase):
+    def setUp(self):
+        sms.outbox.clear()
+
+    def test_send_sms_uses_configured_backend(self):
+        success, details = sms.send_sms(254700000000, "Receipt ready")
+        self.assertTrue(success)
+        self.assertEqual(len(sms.outbox), 1)
+        self.assertEqual(sms.outbox[0].recipients, ["254700000000"])
+        self.assertEqual(details["backend"], "locmem")
+
+    def test_backend_is_shared_across_sends(self):
+        first = sms.get_sms_backend()
+        sms.send_sms("254700000000", "one")
+        self.assertIs(sms.get_sms_backend(), first)
+
+    def test_send_bulk_sms_delivers_one_message(self):
+        success, _ = sms.send_bulk_sms(["254700000001", "254700000002"], "Promo")
+        self.assertTrue(success)
+        self.assertEqual(len(sms.outbox), 1)
+        self.assertEqual(len(sms.outbox[0].recipients), 2)
+
+
+@override_settings(
+    SMS_BACKEND="payment.sms.AfricasTalkingBackend",
+    SMS_BACKEND_OPTIONS={"username": "sandbox", "api_key": "test-key"},
+)
+class AfricasTalkingBackendTests(SimpleTestCase):
+    def test_session_is_reused_between_sends(self):
+        backend = sms.get_sms_backend()
+        response = mock.Mock(status_code=201)
+        response.json.return_value = {"SMSMessageData": {"Recipients": []}}
+        with mock.patch("requests.Session.post", return_value=response) as post:
+            sms.send_sms("254700000000", "one")
+            session = backend.session
+            sms.send_sms("254700000000", "two")
+
+        self.assertEqual(post.call_count, 2)
+        self.assertIs(backend.session, session)
+        self.assertEqual(post.call_args.args[0], sms.AfricasTalkingBackend.SANDBOX_URL)
+
+    def test_provider_error_is_reported(self):
+        with mock.patch("requests.Session.post", side_effect=ConnectionError("down")):
+            success, details = sms.send_sms("254700000000", "one")
+        self.assertFalse(success)
+        self.assertIn("down", details)
+
+
+class PaymentStatusTests(TestCase):
+    async def test_status_poll_reports_latest_payment(self):
+        order = await Order.objects.acreate(total_price=100, status="PENDING")
+        await Payment.objects.acreate(order=order, amount=100, status=Payment.STATUS_FAILED)
+        await Payment.objects.acreate(order=order, amount=100, status=Payment.STATUS_PAID)
+
+        response = await self.async_client.get(reverse("payment:payment_status", args=[order.id]))
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["payment_status"], Payment.STATUS_PAID)
+        self.assertTrue(payload["is_paid"])
+
+        missing = await self.async_client.get(reverse("payment:payment_status", args=[order.id + 1]))
+        self.assertEqual(missing.status_code, 404)
+
+
+class StockDeductionTests(TestCase):
+    def setUp(self):
+        self.milk = Product.objects.create(name="Milk", price=100, stock=5)
+        self.bread = Product.objects.create(name="Bread", price=60, stock=1)
+        self.order = Order.objects.create(total_price=380)
+        OrderItem.objects.create(order=self.order, product=self.milk, quantity=2, price=100)
+        OrderItem.objects.create(order=self.order, product=self.bread, quantity=1, price=60)
+        OrderItem.objects.create(order=self.order, product=self.milk, quantity=1, price=100)
+
+    def test_deducts_whole_order_in_one_update_and_rolls_back(self):
+        # Idempotency check, lines, one UPDATE, ledger balances and insert,
+        # alert sync and insert, log insert (+ savepoints).
+        with self.assertNumQueries(12):
+            self.assertTrue(apply_stock_deduction(self.order))
+        self.assertFalse(apply_stock_deduction(self.order))
+        self.assertEqual(dict(Product.objects.values_list("name", "stock")), {"Milk": 2, "Bread": 0})
+        self.assertEqual(StockDeductionLog.objects.filter(action=StockDeductionLog.DEDUCT).count(), 3)
+
+        self.assertTrue(rollback_stock_deduction(self.order))
+        self.assertEqual(dict(Product.objects.values_list("name", "stock")), {"Milk": 5, "Bread": 1})
+
+    def test_oversold_order_deducts_nothing(self):
+        Product.objects.filter(id=self.bread.id).update(stock=0)
+        with self.assertRaises(InsufficientStock) as ctx:
+            apply_stock_deduction(self.order)
+        self.assertEqual(ctx.exception.shortages, [
+            {"product_id": self.bread.id, "name": "Bread", "requested": 1, "available": 0},
+        ])
+        self.assertEqual(Product.objects.get(id=self.milk.id).stock, 5)
+        self.assertFalse(StockDeductionLog.objects.exists())
@@ -1,4 +1,10 @@
 from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from product.models import Product, StockMovement, stock_status_expression
+from product.services.catalog_cache import CatalogCacheService
+from product.services.stock_ledger import StockLedgerService
+from product.services.stock_alert_service import StockAlertService
 
 from .models import Payment, StockDeductionLog
 
@@ -6,6 +12,118 @@ from .models import Payment, StockDeductionLog
 FINAL_ORDER_STATES = {"PAID", "SHIPPED", "DELIVERED", "REFUNDED", "CANCELLED", "FAILED"}
 
 
+class InsufficientStock(ValueError):
+    """Raised when a set-based deduction cannot cover every line; nothing is deducted."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        names = ", ".join(shortage["name"] for shortage in shortages)
+        super().__init__(f"Insufficient stock for {names}")
+
+
+def order_quantities(lines):
+    """Sum ``(product_id, quantity)`` pairs per product."""
+    quantities = {}
+    for product_id, quantity in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def _per_product(quantities):
+    return Case(
+        *(When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()),
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
+
+
+class _Oversold(Exception):
+    pass
+
+
+def deduct_stock(quantities, *, order=None, user=None, lines=None, note=""):
+    """Take ``{product_id: quantity}`` off stock in one conditional ``UPDATE``.
+
+    All-or-nothing: if any product is short the deduction is rolled back and
+    ``InsufficientStock`` lists every short line. Stock changes do not go
+    through ``save()``, so the catalog version is only bumped when a product
+    changes ``stock_status`` (crosses its reorder point or sells out), which
+    stock-filtered listings depend on; cached listings otherwise show counts
+    up to ``CATALOG_CACHE_TIMEOUT`` old. ``stock_status`` is re-derived in
+    the same ``UPDATE`` and low-stock alerts are synced.
+
+    The ledger gets one sale movement per product for ``order``, or one per
+    ``(product_id, quantity, order)`` in ``lines`` when a batch spans orders.
+    """
+    if not quantities:
+        return
+    needed = _per_product(quantities)
+    try:
+        with transaction.atomic():
+            updated = Product.objects.filter(id__in=quantities, stock__gte=needed).update(
+                stock=F("stock") - needed,
+                stock_status=stock_status_expression(F("stock") - needed),
+            )
+            if updated != len(quantities):
+                raise _Oversold
+            if lines is None:
+                lines = [(product_id, quantity, order) for product_id, quantity in quantities.items()]
+            StockLedgerService.record(
+                [(product_id, -quantity, line_order) for product_id, quantity, line_order in lines],
+                StockMovement.SALE,
+                user=user,
+                note=note,
+            )
+    except _Oversold:
+        current = {pk: (name, stock) for pk, name, stock in Product.objects.filter(id__in=quantities).values_list("id", "name", "stock")}
+        raise InsufficientStock([
+            {
+                "product_id": product_id,
+                "name": current.get(product_id, (f"product {product_id}", 0))[0],
+                "requested": quantity,
+                "available": current.get(product_id, (None, 0))[1],
+            }
+            for product_id, quantity in quantities.items()
+            if current.get(product_id, (None, 0))[1] < quantity
+        ])
+
+    if StockAlertService.sync(quantities).status_changed:
+        CatalogCacheService.bump_on_commit()
+
+
+def restock(quantities, *, reason=StockMovement.RESTOCK, order=None, user=None, note=""):
+    """Put ``{product_id: quantity}`` back on stock in one ``UPDATE`` and add it to the ledger."""
+    if not quantities:
+        return
+    added = _per_product(quantities)
+    with transaction.atomic():
+        Product.objects.filter(id__in=quantities).update(
+            stock=F("stock") + added,
+            stock_status=stock_status_expression(F("stock") + added),
+        )
+        StockLedgerService.record(
+            [(product_id, quantity, order) for product_id, quantity in quantities.items()], reason, user=user, note=note
+        )
+    StockAlertService.sync(quantities)
+    CatalogCacheService.bump_on_commit()
+
+
+def stock_log_entries(order, lines, payment, user, action, source):
+    """Unsaved ``StockDeductionLog`` rows for ``(product_id, quantity)`` lines, for bulk_create."""
+    return [
+        StockDeductionLog(
+            order=order,
+            payment=payment,
+            product_id=product_id,
+            quantity=quantity,
+            action=action,
+            source=source,
+            deducted_by=user,
+        )
+        for product_id, quantity in lines
+    ]
+
+
 def apply_stock_deduction(order, payment=None, user=None, source=StockDeductionLog.AUTO):
     """Deduct stock once for an order and log per item entries."""
     if StockDeductionLog.objects.filter(
@@ -15,23 +133,12 @@ def apply_stock_deduction(order, payment=None, user=None, source=StockDeductionL
     ).exists():
         return False
 
+    lines = list(order.items.values_list("product_id", "quantity"))
     with transaction.atomic():
-        for item in order.items.select_related("product"):
-            product = item.product
-            if product.stock < item.quantity:
-                raise ValueError(f"Insufficient stock for {product.name}")
-            product.stock -= item.quantity
-            product.save(update_fields=["stock"])
-
-            StockDeductionLog.objects.create(
-                order=order,
-                payment=payment,
-                product=product,
-                quantity=item.quantity,
-                action=StockDeductionLog.DEDUCT,
-                source=source,
-                deducted_by=user,
-            )
+        deduct_stock(order_quantities(lines), order=order, user=user)
+        StockDeductionLog.objects.bulk_create(
+            stock_log_entries(order, lines, payment, user, StockDeductionLog.DEDUCT, source)
+        )
 
     return True
 
@@ -45,21 +152,12 @@ def rollback_stock_deduction(order, payment=None, user=None):
     ).exists():
         return False
 
+    lines = list(order.items.values_list("product_id", "quantity"))
     with transaction.atomic():
-        for item in order.items.select_related("product"):
-            product = item.product
-            product.stock += item.quantity
-            product.save(update_fields=["stock"])
-
-            StockDeductionLog.objects.create(
-                order=order,
-                payment=payment,
-                product=product,
-                quantity=item.quantity,
-                action=StockDeductionLog.ROLLBACK,
-                source=StockDeductionLog.MANUAL,
-                deducted_by=user,
-            )
+        restock(order_quantities(lines), reason=StockMovement.ROLLBACK, order=order, user=user)
+        StockDeductionLog.objects.bulk_create(
+            stock_log_entries(order, lines, payment, user, StockDeductionLog.ROLLBACK, StockDeductionLog.MANUAL)
+        )
 
     return True
 
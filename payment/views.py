@@ -5,7 +5,7 @@ import logging
 from django.conf import settings
 from django.db import transaction
 from django.http import HttpResponse, JsonResponse
-from django.shortcuts import get_object_or_404, render
+from django.shortcuts import aget_object_or_404, get_object_or_404, render
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
@@ -82,10 +82,14 @@ from django.views.decorators.http import require_GET
 
 
 @require_GET
-def payment_status(request, order_id):
-    """Return latest payment + order status for polling on processing page."""
-    order = get_object_or_404(Order, id=order_id)
-    payment = Payment.objects.filter(order=order).order_by("-id").first()
+async def payment_status(request, order_id):
+    """Return latest payment + order status for polling on processing page.
+
+    Async so one ASGI worker can hold many concurrent polls; always reads the
+    primary so a just-processed STK callback is visible.
+    """
+    order = await aget_object_or_404(Order, id=order_id)
+    payment = await Payment.objects.filter(order=order).order_by("-id").afirst()
 
     payment_status_value = payment.status if payment else "NOT_FOUND"
     order_status_value = order.status
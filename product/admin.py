@@ -1,4 +1,6 @@
 # product/admin.py
+import json
+
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
@@ -12,6 +14,13 @@ from .models import (
     ProductReview,
     Cart,
     CartItem,
+    Promotion,
+    LowStockAlert,
+    DemandForecast,
+    StockMovement,
+    StockSnapshot,
+    ArchivedOrder,
+    ArchivedSalesRollup,
 )
 
 
@@ -38,16 +47,25 @@ class ProductAdmin(admin.ModelAdmin):
         "category",
         "price",
         "discount_percentage",
+        "effective_price",
         "stock",
+        "reorder_point",
+        "stock_status",
         "is_active",
         "shelf",
         "barcode",
         "created_at",
     )
     search_fields = ("name", "barcode", "shelf__name", "category__name")
-    list_filter = ("created_at", "shelf", "category", "is_active")
+    list_filter = ("created_at", "shelf", "category", "is_active", "stock_status")
     autocomplete_fields = ("shelf", "category")
 
+    def save_model(self, request, obj, form, change):
+        from .services.stock_ledger import stock_movement_context
+
+        with stock_movement_context(user=request.user, note="admin"):
+            super().save_model(request, obj, form, change)
+
     def image_preview(self, obj):
         if obj.image:
             return format_html('<img src="{}" style="width:36px;height:36px;object-fit:cover;border-radius:6px;" />', obj.image.url)
@@ -55,6 +73,99 @@ class ProductAdmin(admin.ModelAdmin):
     image_preview.short_description = "Image"
 
 
+@admin.register(Promotion)
+class PromotionAdmin(admin.ModelAdmin):
+    list_display = ("name", "discount_percentage", "category", "shelf", "starts_at", "ends_at", "is_active", "applied_at", "reverted_at")
+    list_filter = ("is_active", "starts_at", "category", "shelf")
+    search_fields = ("name",)
+    autocomplete_fields = ("category", "shelf", "products")
+    readonly_fields = ("applied_at", "reverted_at")
+    actions = ("sync_now",)
+
+    @admin.action(description="Apply/revert promotions now")
+    def sync_now(self, request, queryset):
+        from .services.promotion_service import PromotionService
+
+        result = PromotionService.sync()
+        self.message_user(
+            request,
+            f"{len(result.applied)} applied, {len(result.reverted)} reverted, {result.products_updated} product(s) updated.",
+        )
+
+
+@admin.register(LowStockAlert)
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ("product", "status", "stock", "reorder_point", "created_at", "notified_at", "resolved_at")
+    list_filter = ("status", "created_at", "notified_at", "resolved_at")
+    search_fields = ("product__name", "product__barcode")
+    list_select_related = ("product",)
+    readonly_fields = ("product", "status", "stock", "reorder_point", "created_at", "notified_at", "resolved_at")
+
+
+@admin.register(DemandForecast)
+class DemandForecastAdmin(admin.ModelAdmin):
+    list_display = ("product", "daily_demand", "moving_average", "demand_std", "units_sold", "generated_at")
+    search_fields = ("product__name", "product__barcode")
+    list_select_related = ("product",)
+    readonly_fields = ("product", "daily_demand", "moving_average", "demand_std", "units_sold", "history_days", "generated_at")
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "product", "reason", "quantity", "balance", "order", "user", "note")
+    list_filter = ("reason", "created_at")
+    search_fields = ("product__name", "product__barcode", "order__id", "note")
+    list_select_related = ("product", "user")
+    date_hierarchy = "created_at"
+
+    # Append-only: the ledger is written by stock mutations, never by hand.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("day", "product", "stock")
+    list_filter = ("day",)
+    search_fields = ("product__name", "product__barcode")
+    list_select_related = ("product",)
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ("order_id", "customer_name", "channel", "status", "total_price", "created_at", "archived_at")
+    list_filter = ("status", "channel")
+    search_fields = ("order_id", "customer_name")
+    date_hierarchy = "created_at"
+    exclude = ("payload",)
+    readonly_fields = ("archived_document",)
+
+    @admin.display(description="Archived rows")
+    def archived_document(self, obj):
+        return format_html("<pre>{}</pre>", json.dumps(obj.document(), indent=2))
+
+    # Archived orders are written by OrderArchiveService only.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedSalesRollup)
+class ArchivedSalesRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "product", "units", "revenue")
+    list_filter = ("day",)
+    search_fields = ("product__name", "product__barcode")
+    list_select_related = ("product",)
+
+
 class OrderItemInline(admin.TabularInline):
     """Inline view of items inside an order."""
     model = OrderItem
@@ -70,8 +181,8 @@ class CustomerAdmin(admin.ModelAdmin):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin): 
-    list_display = ("id", "customer", "total_price", "status", "created_at", "stock_deducted")
-    list_filter = ("status", "created_at")
+    list_display = ("id", "customer", "total_price", "status", "channel", "created_at", "stock_deducted")
+    list_filter = ("status", "channel", "created_at")
     search_fields = ("customer__phone_number", "customer_name", "id")
     inlines = [OrderItemInline]
 
@@ -6,6 +6,8 @@ app_name = "product_api"
 urlpatterns = [
     path("auth/register/", views.auth_register_api, name="auth_register_api"),
     path("auth/login/", views.auth_login_api, name="auth_login_api"),
+    path("auth/refresh/", views.auth_refresh_api, name="auth_refresh_api"),
+    path("auth/logout/", views.auth_logout_api, name="auth_logout_api"),
 
     path("products/", views.product_list_api, name="product_list_api"),
     path("categories/", views.category_list_api, name="category_list_api"),
@@ -15,5 +17,14 @@ urlpatterns = [
     path("orders/", views.order_create_api, name="order_create_api"),
     path("orders/history/", views.order_history_api, name="order_history_api"),
 
+    path("pos/barcode/<str:code>/", views.pos_barcode_lookup_api, name="pos_barcode_lookup_api"),
+    path("pos/barcodes/", views.pos_barcode_batch_api, name="pos_barcode_batch_api"),
+    path("pos/sales/", views.pos_sale_open_api, name="pos_sale_open_api"),
+    path("pos/sales/<int:sale_id>/items/", views.pos_sale_items_api, name="pos_sale_items_api"),
+    path("pos/sales/<int:sale_id>/checkout/", views.pos_sale_checkout_api, name="pos_sale_checkout_api"),
+    path("pos/sync/", views.pos_sync_api, name="pos_sync_api"),
+
     path("admin/products/", views.admin_product_create_api, name="admin_product_create_api"),
+    path("admin/products/import/", views.admin_product_import_api, name="admin_product_import_api"),
+    path("admin/stock/report/", views.admin_stock_report_api, name="admin_stock_report_api"),
 ]
@@ -1,15 +1,33 @@
+import datetime
+
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
-from django.db import transaction
-from django.shortcuts import get_object_or_404
-
-from supermarket.core.responses import api_success, api_error, parse_json_body
-from supermarket.core.jwt_auth import create_access_token, jwt_required
+from django.db import IntegrityError, transaction
+from django.shortcuts import aget_object_or_404, get_object_or_404
+
+from supermarket.core.responses import api_success, api_error, compress_large_responses, parse_json_body
+from supermarket.core.jwt_auth import (
+    TokenError,
+    deny_access_token,
+    issue_token_pair,
+    jwt_required,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
+from supermarket.core.db_router import replica_reads
 from supermarket.core.rate_limit import rate_limit
 
 from product.forms import CustomerRegistrationForm
+from product.repositories import ProductRepository
 from product.models import Product, Customer, Order, OrderItem, ProductReview, Category
-from product.services.product_service import ProductCatalogService
+from product.services.catalog_cache import cache_catalog_response
+from product.services.image_service import ImageResult
+from product.services.import_service import IMPORT_FORMATS, ProductImportService
+from product.services.pos_service import BarcodeLookupService, PosSaleService, PosSyncService
+from product.services.stock_ledger import StockLedgerService, stock_movement_context
+from payment.utils import InsufficientStock
+from product.services.product_service import DETAIL_FIELDS, ProductCatalogService, ProductFieldset
 from product.serializers import serialize_review
 
 
@@ -43,10 +61,10 @@ def auth_register_api(request):
         customer.user = user
         customer.save(update_fields=["user"])
 
-    token = create_access_token(user)
+    tokens = issue_token_pair(user, customer_id=customer.id if customer.user_id == user.id else None)
     return api_success(
         {
-            "token": token,
+            **tokens,
             "user": {
                 "id": user.id,
                 "username": user.username,
@@ -77,10 +95,10 @@ def auth_login_api(request):
     if not user:
         return api_error("Invalid credentials", status=401)
 
-    token = create_access_token(user)
+    tokens = issue_token_pair(user)
     return api_success(
         {
-            "token": token,
+            **tokens,
             "user": {
                 "id": user.id,
                 "username": user.username,
@@ -92,9 +110,49 @@ def auth_login_api(request):
     )
 
 
+@csrf_exempt
+@require_POST
+@rate_limit(key_prefix="auth-refresh", limit=60, window_seconds=60)
+def auth_refresh_api(request):
+    payload = parse_json_body(request)
+    if payload is None:
+        return api_error("Invalid JSON", status=400)
+
+    refresh_token = (payload.get("refresh_token") or "").strip()
+    if not refresh_token:
+        return api_error("refresh_token is required", status=400)
+
+    try:
+        _, tokens = rotate_refresh_token(refresh_token)
+    except TokenError as exc:
+        return api_error(str(exc), status=401)
+    return api_success(tokens, message="Token refreshed")
+
+
+@csrf_exempt
+@require_POST
+@jwt_required()
+def auth_logout_api(request):
+    payload = parse_json_body(request) or {}
+    refresh_token = (payload.get("refresh_token") or "").strip()
+    if refresh_token:
+        revoke_refresh_token(refresh_token)
+    deny_access_token(request.api_token_payload)
+    return api_success(message="Logged out")
+
+
 @require_GET
+@compress_large_responses()
 @rate_limit(key_prefix="catalog", limit=120, window_seconds=60)
-def product_list_api(request):
+@cache_catalog_response(
+    "products",
+    params=(
+        "search", "category", "sort", "min_price", "max_price", "page", "page_size", "stock_only",
+        "fields", "include",
+    ),
+)
+@replica_reads()
+async def product_list_api(request):
     search = (request.GET.get("search") or "").strip() or None
     category = (request.GET.get("category") or "").strip() or None
     sort = (request.GET.get("sort") or "newest").strip()
@@ -112,7 +170,12 @@ def product_list_api(request):
     except ValueError:
         return api_error("Invalid numeric query parameters", status=400)
 
-    catalog = ProductCatalogService.list_products(
+    try:
+        fieldset = ProductFieldset.parse(request.GET.get("fields"), request.GET.get("include"))
+    except ValueError as exc:
+        return api_error(str(exc), status=400)
+
+    catalog = await ProductCatalogService.alist_products(
         search=search,
         category=category,
         min_price=min_price,
@@ -121,49 +184,56 @@ def product_list_api(request):
         page=page,
         page_size=page_size,
         stock_only=(request.GET.get("stock_only") == "1"),
+        fieldset=fieldset,
     )
     return api_success(catalog)
 
 
 @require_GET
-def category_list_api(request):
+@cache_catalog_response("categories")
+@replica_reads()
+async def category_list_api(request):
     categories = Category.objects.filter(is_active=True).order_by("name")
     payload = [
         {"id": category.id, "name": category.name, "slug": category.slug}
-        for category in categories
+        async for category in categories
     ]
     return api_success({"items": payload})
 
 
 @require_GET
 @rate_limit(key_prefix="product-detail", limit=120, window_seconds=60)
-def product_detail_api(request, product_id):
-    product = get_object_or_404(Product.objects.select_related("category", "shelf"), id=product_id)
-    image_url = product.image.url if product.image else None
-
-    reviews_qs = product.reviews.select_related("customer").all()[:20]
-    reviews = [serialize_review(review) for review in reviews_qs]
-
-    payload = {
-        "id": product.id,
-        "name": product.name,
-        "description": product.description,
-        "price": float(product.price),
-        "discount_percentage": int(product.discount_percentage or 0),
-        "discounted_price": float(product.discounted_price),
-        "stock": product.stock,
-        "barcode": product.barcode,
-        "category": product.category.name if product.category else None,
-        "image_url": image_url,
-        "reviews": reviews,
-    }
+@cache_catalog_response("product-detail", params=("fields", "include"))
+@replica_reads()
+async def product_detail_api(request, product_id):
+    try:
+        fieldset = ProductFieldset.parse(
+            request.GET.get("fields"),
+            request.GET.get("include"),
+            allowed_fields=DETAIL_FIELDS,
+            allowed_includes=("reviews", "shelf"),
+            default_includes=("reviews",),
+        )
+    except ValueError as exc:
+        return api_error(str(exc), status=400)
+
+    queryset = ProductRepository.with_columns(Product.objects.all(), fieldset.columns())
+    product = await aget_object_or_404(queryset, id=product_id)
+    image = None
+    if fieldset.needs_image:
+        image = ImageResult(product.image.url if product.image else None, "uploaded")
+
+    payload = fieldset.serialize(product, image)
+    if "reviews" in fieldset.includes:
+        reviews_qs = ProductReview.objects.filter(product_id=product.id).select_related("customer")[:20]
+        payload["reviews"] = [serialize_review(review) async for review in reviews_qs]
     return api_success(payload)
 
 
 @csrf_exempt
 @require_POST
 @jwt_required()
-@rate_limit(key_prefix="order-create", limit=30, window_seconds=60)
+@rate_limit(key_prefix="order-create", limit=30, window_seconds=60, key="user")
 def order_create_api(request):
     payload = parse_json_body(request)
     if payload is None:
@@ -173,8 +243,8 @@ def order_create_api(request):
     if not isinstance(items, list) or not items:
         return api_error("'items' must be a non-empty list", status=400)
 
-    customer = Customer.objects.filter(user=request.api_user).first()
-    if not customer:
+    customer_id = request.api_principal.customer_id
+    if not customer_id:
         return api_error("Customer profile not found", status=404)
 
     order_items = []
@@ -200,7 +270,7 @@ def order_create_api(request):
         order_items.append((product, quantity, product.discounted_price))
 
     with transaction.atomic():
-        order = Order.objects.create(customer=customer, total_price=total, status="PENDING")
+        order = Order.objects.create(customer_id=customer_id, total_price=total, status="PENDING")
         OrderItem.objects.bulk_create(
             [
                 OrderItem(order=order, product=product, quantity=qty, price=price)
@@ -208,23 +278,23 @@ def order_create_api(request):
             ]
         )
 
-    return api_success({"order_id": order.id, "status": order.status, "total_price": float(order.total_price)}, message="Order created", status=201)
+    return api_success({"order_id": order.id, "status": order.status, "total_price": order.total_price}, message="Order created", status=201)
 
 
 @require_GET
 @jwt_required()
 def order_history_api(request):
-    customer = Customer.objects.filter(user=request.api_user).first()
-    if not customer:
+    customer_id = request.api_principal.customer_id
+    if not customer_id:
         return api_error("Customer profile not found", status=404)
 
-    orders = Order.objects.filter(customer=customer).order_by("-created_at")[:50]
+    orders = Order.objects.filter(customer_id=customer_id).order_by("-created_at")[:50]
     data = [
         {
             "id": order.id,
             "status": order.status,
-            "total_price": float(order.total_price),
-            "created_at": order.created_at.isoformat(),
+            "total_price": order.total_price,
+            "created_at": order.created_at,
             "items_count": order.items.count(),
         }
         for order in orders
@@ -237,8 +307,8 @@ def order_history_api(request):
 @jwt_required()
 def review_create_api(request, product_id):
     product = get_object_or_404(Product, id=product_id)
-    customer = Customer.objects.filter(user=request.api_user).first()
-    if not customer:
+    customer_id = request.api_principal.customer_id
+    if not customer_id:
         return api_error("Customer profile not found", status=404)
 
     payload = parse_json_body(request)
@@ -256,7 +326,7 @@ def review_create_api(request, product_id):
 
     review, created = ProductReview.objects.update_or_create(
         product=product,
-        customer=customer,
+        customer_id=customer_id,
         defaults={"rating": rating, "comment": comment},
     )
     status = 201 if created else 200
@@ -290,14 +360,178 @@ def admin_product_create_api(request):
     if category_slug:
         category = Category.objects.filter(slug=category_slug).first()
 
-    product = Product.objects.create(
-        name=name,
-        description=(payload.get("description") or "").strip(),
-        price=price,
-        stock=stock,
-        discount_percentage=discount_percentage,
-        is_active=bool(payload.get("is_active", True)),
-        barcode=(payload.get("barcode") or None),
-        category=category,
-    )
+    with stock_movement_context(user=request.api_user, note="api"):
+        product = Product.objects.create(
+            name=name,
+            description=(payload.get("description") or "").strip(),
+            price=price,
+            stock=stock,
+            discount_percentage=discount_percentage,
+            is_active=bool(payload.get("is_active", True)),
+            barcode=(payload.get("barcode") or None),
+            category=category,
+        )
     return api_success({"id": product.id, "name": product.name}, message="Product created", status=201)
+
+
+IMPORT_MAX_REPORTED_ERRORS = 500
+
+
+@csrf_exempt
+@require_POST
+@jwt_required(staff_only=True)
+def admin_product_import_api(request):
+    """Bulk upsert products from a CSV/JSON upload or raw body (``?format=csv|json``)."""
+    upload = request.FILES.get("file")
+    if upload is not None:
+        default_format = "csv" if upload.name.lower().endswith(".csv") else "json"
+        content = upload.read()
+    else:
+        default_format = "csv" if request.content_type == "text/csv" else "json"
+        # Read the stream directly: catalog files exceed DATA_UPLOAD_MAX_MEMORY_SIZE.
+        content = request.read()
+
+    def param(name):
+        return (request.POST.get(name) or request.GET.get(name) or "").strip().lower()
+
+    fmt = param("format") or default_format
+    if fmt not in IMPORT_FORMATS:
+        return api_error(f"format must be one of: {', '.join(IMPORT_FORMATS)}", status=400)
+    flags = {name: param(name) in ("1", "true", "yes") for name in ("dry_run", "create_missing")}
+
+    try:
+        result = ProductImportService.import_file(content, fmt, **flags)
+    except (ValueError, UnicodeDecodeError) as exc:
+        return api_error(f"Invalid import file: {exc}", status=400)
+
+    message = "Import validated" if result.dry_run else "Import completed"
+    if result.failed:
+        message += f" with {result.failed} row error(s)"
+    return api_success(result.as_dict(max_errors=IMPORT_MAX_REPORTED_ERRORS), message=message)
+
+
+STOCK_REPORT_MAX_DAYS = 366
+
+
+@require_GET
+@jwt_required(staff_only=True)
+def admin_stock_report_api(request):
+    """Opening/closing stock and movements per reason for ``?start=&end=`` (ISO dates, inclusive)."""
+    try:
+        start = datetime.date.fromisoformat(request.GET.get("start", ""))
+        end = datetime.date.fromisoformat(request.GET.get("end", "") or start.isoformat())
+        product_ids = [int(pk) for pk in request.GET.getlist("product")] or None
+    except ValueError:
+        return api_error("start/end must be YYYY-MM-DD dates and product an id", status=400)
+    if end < start or (end - start).days >= STOCK_REPORT_MAX_DAYS:
+        return api_error(f"end must be on or after start and at most {STOCK_REPORT_MAX_DAYS} days later", status=400)
+
+    rows = StockLedgerService.movement_report(start, end, product_ids)
+    return api_success({"start": start, "end": end, "items": rows})
+
+
+@require_GET
+@jwt_required(staff_only=True)
+def pos_barcode_lookup_api(request, code):
+    product = BarcodeLookupService.lookup(code)
+    if product is None:
+        return api_error("No active product with this barcode", status=404)
+    return api_success(product)
+
+
+@csrf_exempt
+@require_POST
+@jwt_required(staff_only=True)
+def pos_barcode_batch_api(request):
+    """Look up several scanned barcodes in one round trip: ``{"barcodes": [...]}``."""
+    payload = parse_json_body(request)
+    barcodes = payload.get("barcodes") if isinstance(payload, dict) else None
+    if not isinstance(barcodes, list) or not all(isinstance(code, str) for code in barcodes):
+        return api_error("barcodes must be a list of strings", status=400)
+    limit = settings.POS_BARCODE_BATCH_LIMIT
+    if len(barcodes) > limit:
+        return api_error(f"At most {limit} barcodes per request", status=400)
+
+    found = BarcodeLookupService.lookup_many(barcodes)
+    missing = [code for code in dict.fromkeys(map(BarcodeLookupService.normalize, barcodes)) if code not in found]
+    return api_success({"items": found, "missing": missing})
+
+
+def _pos_sale_response(action, message, status=200):
+    try:
+        return api_success(PosSaleService.serialize(*action()), message=message, status=status)
+    except Order.DoesNotExist:
+        return api_error("Sale not found", status=404)
+    except InsufficientStock as exc:
+        return api_error(str(exc), status=409, errors=exc.shortages)
+    except ValueError as exc:
+        return api_error(str(exc), status=400)
+
+
+@csrf_exempt
+@require_POST
+@jwt_required(staff_only=True)
+def pos_sale_open_api(request):
+    """Open a counter sale, optionally with the first scans: ``{"items": [{"barcode", "quantity"}]}``."""
+    payload = parse_json_body(request)
+    if not isinstance(payload, dict):
+        return api_error("Invalid JSON", status=400)
+    return _pos_sale_response(
+        lambda: (PosSaleService.open_sale(request.api_user, payload.get("items"), payload.get("customer_name")),),
+        "Sale opened",
+        status=201,
+    )
+
+
+@csrf_exempt
+@require_POST
+@jwt_required(staff_only=True)
+def pos_sale_items_api(request, sale_id):
+    """Add scans to a sale; a negative quantity takes items back off."""
+    payload = parse_json_body(request)
+    if not isinstance(payload, dict):
+        return api_error("Invalid JSON", status=400)
+    return _pos_sale_response(lambda: (PosSaleService.add_items(sale_id, payload.get("items")),), "Items added")
+
+
+@csrf_exempt
+@require_POST
+@jwt_required(staff_only=True)
+def pos_sale_checkout_api(request, sale_id):
+    """Pay for a sale: ``{"method": "CASH", "amount_tendered"}`` or ``{"method": "MPESA", "mpesa_receipt_no"}``."""
+    payload = parse_json_body(request)
+    if not isinstance(payload, dict):
+        return api_error("Invalid JSON", status=400)
+    return _pos_sale_response(
+        lambda: PosSaleService.checkout(
+            sale_id,
+            method=str(payload.get("method") or "").upper(),
+            cashier=request.api_user,
+            amount_tendered=payload.get("amount_tendered"),
+            mpesa_receipt_no=payload.get("mpesa_receipt_no"),
+        ),
+        "Sale completed",
+    )
+
+
+@csrf_exempt
+@require_POST
+@jwt_required(staff_only=True)
+def pos_sync_api(request):
+    """Upload sales recorded offline: ``{"sales": [{"client_reference", "recorded_at", "items", "payment"}]}``."""
+    payload = parse_json_body(request)
+    sales = payload.get("sales") if isinstance(payload, dict) else None
+    if not isinstance(sales, list):
+        return api_error("sales must be a list", status=400)
+    limit = settings.POS_SYNC_BATCH_LIMIT
+    if len(sales) > limit:
+        return api_error(f"At most {limit} sales per batch", status=400)
+
+    try:
+        result = PosSyncService.ingest(sales, cashier=request.api_user)
+    except (InsufficientStock, IntegrityError):
+        return api_error("Batch overlapped a concurrent upload; resend it", status=409)
+    return api_success(
+        result.as_dict(),
+        message=f"{len(result.accepted)} sale(s) stored, {len(result.conflicts)} conflict(s), {len(result.rejected)} rejected",
+    )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from product.services.archive_service import OrderArchiveService
+
+
+class Command(BaseCommand):
+    help = "Move closed orders older than a cutoff, with their items, payments and logs, into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Archive closed orders older than this (ARCHIVE_ORDERS_AFTER_DAYS)")
+        parser.add_argument("--chunk-size", type=int, help="Orders per transaction (ARCHIVE_CHUNK_SIZE)")
+        parser.add_argument("--max-chunks", type=int, help="Stop after this many chunks, 0 for no limit (ARCHIVE_MAX_CHUNKS)")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] is not None and options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        if options["max_chunks"] is not None and options["max_chunks"] < 0:
+            raise CommandError("--max-chunks cannot be negative")
+
+        try:
+            result = OrderArchiveService.run(
+                days=options["days"], chunk_size=options["chunk_size"], max_chunks=options["max_chunks"]
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Archived {result.orders} order(s), {result.items} item(s), {result.payments} payment(s), "
+            f"{result.stock_deductions} stock log(s) and {result.verifications} verification(s) "
+            f"in {result.chunks} chunk(s), {result.seconds:.1f}s"
+        ))
+        if result.remaining:
+            self.stdout.write("More orders are due; run again to continue.")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from product.services.forecast_service import DemandForecastService
+
+
+class Command(BaseCommand):
+    help = "Refit and store per-product daily demand forecasts from order history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Days of history (FORECAST_HISTORY_DAYS)")
+        parser.add_argument("--alpha", type=float, help="Smoothing weight of the latest day, 0-1 (FORECAST_SMOOTHING)")
+        parser.add_argument("--window", type=int, help="Moving-average window in days (FORECAST_MOVING_AVERAGE_DAYS)")
+
+    def handle(self, *args, **options):
+        if options["days"] is not None and options["days"] < 2:
+            raise CommandError("--days must be at least 2")
+        if options["alpha"] is not None and not 0 < options["alpha"] <= 1:
+            raise CommandError("--alpha must be in (0, 1]")
+        if options["window"] is not None and options["window"] < 1:
+            raise CommandError("--window must be positive")
+
+        result = DemandForecastService.run(days=options["days"], alpha=options["alpha"], window=options["window"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Forecast {result.products} product(s), removed {result.removed} stale forecast(s) in {result.seconds:.1f}s"
+        ))
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product.services.import_service import IMPORT_COLUMNS, IMPORT_FORMATS, ProductImportService
+
+
+class Command(BaseCommand):
+    help = "Create or update products in bulk from a CSV or JSON file, matched on barcode"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help=f"CSV or JSON file with columns: {', '.join(IMPORT_COLUMNS)}")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=ProductImportService.chunk_size)
+        parser.add_argument("--create-missing", action="store_true", help="Create unknown categories and shelves")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report without writing")
+        parser.add_argument("--errors", dest="errors_path", help="Write every row error to this JSON file")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in IMPORT_FORMATS:
+            raise CommandError("Cannot tell the format from the extension; pass --format")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        try:
+            result = ProductImportService.import_file(
+                path.read_bytes(),
+                fmt,
+                create_missing=options["create_missing"],
+                dry_run=options["dry_run"],
+                chunk_size=options["chunk_size"],
+            )
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"row {error.row} ({error.barcode or 'no barcode'}): {'; '.join(error.errors)}"))
+        if result.failed > 20:
+            self.stdout.write(self.style.WARNING(f"... and {result.failed - 20} more"))
+        if options["errors_path"]:
+            Path(options["errors_path"]).write_text(json.dumps(result.as_dict()["errors"], indent=2))
+
+        prefix = "Would import" if result.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {prefix} {result.total_rows} row(s): {result.created} created, {result.updated} updated, "
+            f"{result.failed} failed, {result.categories_created} new categories, "
+            f"{result.shelves_created} new shelves"
+        ))
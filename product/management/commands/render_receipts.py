@@ -0,0 +1,43 @@
+import zipfile
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product.services.receipt_service import ReceiptPDFService
+
+
+class Command(BaseCommand):
+    help = "Pre-render receipt PDFs for closed orders in a date range, optionally bundling them into a zip"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First order date (YYYY-MM-DD)")
+        parser.add_argument("--end", required=True, help="Last order date (YYYY-MM-DD)")
+        parser.add_argument("--zip", dest="zip_path", help="Write all receipts into this zip file")
+        parser.add_argument("--chunk-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options["start"])
+            end_date = date.fromisoformat(options["end"])
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}")
+        if end_date < start_date:
+            raise CommandError("--end must not be before --start")
+
+        orders = ReceiptPDFService.orders_between(start_date, end_date).iterator(chunk_size=options["chunk_size"])
+        archive = zipfile.ZipFile(options["zip_path"], "w", zipfile.ZIP_DEFLATED) if options["zip_path"] else None
+
+        rendered = 0
+        try:
+            for order in orders:
+                receipt = ReceiptPDFService.get_pdf(order)
+                if archive is not None:
+                    archive.writestr(receipt.filename, receipt.content)
+                rendered += 1
+        finally:
+            if archive is not None:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(f"✔ Rendered {rendered} receipt(s) for {start_date} to {end_date}"))
+        if archive is not None:
+            self.stdout.write(self.style.SUCCESS(f"✔ Wrote {options['zip_path']}"))
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product.services.reorder_service import ReorderService
+
+
+class Command(BaseCommand):
+    help = "Suggest reorder points and order quantities from recent sales velocity"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Sales window in days (REORDER_LOOKBACK_DAYS)")
+        parser.add_argument("--lead-time", type=int, help="Supplier lead time in days (REORDER_LEAD_TIME_DAYS)")
+        parser.add_argument("--cover", type=int, help="Days of stock to order beyond the lead time (REORDER_COVER_DAYS)")
+        parser.add_argument("--all", action="store_true", help="Include products whose stock already covers the target")
+        parser.add_argument("--apply", action="store_true", help="Store the suggested reorder points")
+        parser.add_argument("--json", action="store_true", help="Print the suggestions as JSON")
+
+    def handle(self, *args, **options):
+        for name in ("days", "lead_time", "cover"):
+            if options[name] is not None and options[name] < (1 if name == "days" else 0):
+                raise CommandError(f"--{name.replace('_', '-')} is out of range")
+
+        suggestions = ReorderService.suggestions(
+            days=options["days"],
+            lead_time_days=options["lead_time"],
+            cover_days=options["cover"],
+            only_needed=not options["all"],
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps([suggestion.as_dict() for suggestion in suggestions], indent=2))
+        else:
+            for s in suggestions:
+                self.stdout.write(
+                    f"{s.name}: {s.stock} in stock, {s.daily_velocity:.2f}/day ({s.days_of_cover:.1f} days), "
+                    f"reorder point {s.reorder_point} -> {s.suggested_reorder_point}, order {s.suggested_quantity}"
+                )
+
+        if options["apply"]:
+            updated = ReorderService.apply(suggestions)
+            self.stdout.write(self.style.SUCCESS(f"✔ Updated reorder points for {updated} product(s)"))
+        elif not options["json"]:
+            self.stdout.write(self.style.SUCCESS(f"✔ {len(suggestions)} reorder suggestion(s)"))
@@ -3,7 +3,8 @@ from django.utils import timezone
 from decimal import Decimal
 import random
 
-from product.models import Shelf, Product, Customer, Order, OrderItem
+from product.models import Shelf, Product, Customer, Order, OrderItem, StockMovement
+from product.services.stock_ledger import stock_movement_context
 from payment.models import Payment, StockDeductionLog
 
 
@@ -107,7 +108,8 @@ class Command(BaseCommand):
                     # Deduct stock
                     if item.product.stock >= item.quantity:
                         item.product.stock -= item.quantity
-                        item.product.save()
+                        with stock_movement_context(StockMovement.SALE, order=order):
+                            item.product.save()
 
                     StockDeductionLog.objects.create(
                         product=item.product,
@@ -120,7 +122,8 @@ class Command(BaseCommand):
                 elif status in ["FAILED", "REFUNDED"] and random.choice([True, False]):
                     # Rollback (increase stock back)
                     item.product.stock += item.quantity
-                    item.product.save()
+                    with stock_movement_context(StockMovement.ROLLBACK, order=order):
+                        item.product.save()
 
                     StockDeductionLog.objects.create(
                         product=item.product,
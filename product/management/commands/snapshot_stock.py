@@ -0,0 +1,27 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from product.services.stock_ledger import StockLedgerService
+
+
+class Command(BaseCommand):
+    help = "Store every product's closing stock for a day from the stock movement ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--day", help="YYYY-MM-DD; defaults to yesterday")
+        parser.add_argument("--days", type=int, default=1, help="Snapshot this many days ending on --day (backfill)")
+
+    def handle(self, *args, **options):
+        try:
+            last = datetime.date.fromisoformat(options["day"]) if options["day"] else timezone.localdate() - datetime.timedelta(days=1)
+        except ValueError:
+            raise CommandError("--day must be YYYY-MM-DD")
+        if options["days"] < 1:
+            raise CommandError("--days must be positive")
+
+        for offset in range(options["days"] - 1, -1, -1):
+            day = last - datetime.timedelta(days=offset)
+            written = StockLedgerService.snapshot(day)
+            self.stdout.write(self.style.SUCCESS(f"✔ {day}: snapshot of {written} product(s)"))
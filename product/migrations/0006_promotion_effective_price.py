@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:50
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, IntegerField, Value
+from django.db.models.functions import Cast, Round
+
+
+def backfill_effective_price(apps, schema_editor):
+    # Same arithmetic as product.models.effective_price_expression: whole
+    # cents, half-up, no integer truncation on SQLite.
+    Product = apps.get_model("product", "Product")
+    cents = Cast(Round(F("price") * Value(100)), IntegerField())
+    Product.objects.update(
+        effective_price=ExpressionWrapper(
+            (cents * (Value(100) - F("discount_percentage")) + Value(50)) / Value(100) / Value(100.0),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_product_discount_percentage_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='promotion_discount',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Promotion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150)),
+                ('discount_percentage', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(90)])),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('applied_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('reverted_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promotions', to='product.category')),
+                ('products', models.ManyToManyField(blank=True, related_name='promotions', to='product.product')),
+                ('shelf', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promotions', to='product.shelf')),
+            ],
+            options={
+                'ordering': ('-starts_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='active_promotion',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='applied_products', to='product.promotion'),
+        ),
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['is_active', 'starts_at', 'ends_at'], name='product_pro_is_acti_daaab3_idx'),
+        ),
+        migrations.RunPython(backfill_effective_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_promotion_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price'], name='product_pro_effecti_a9539e_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_order_channel_cashier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='client_reference',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+
+
+def backfill_stock_status(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    Product.objects.update(
+        stock_status=Case(
+            When(stock__lte=0, then=Value("OUT_OF_STOCK")),
+            When(stock__lte=F("reorder_point"), then=Value("LOW_STOCK")),
+            default=Value("IN_STOCK"),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_order_client_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reorder_point',
+            field=models.PositiveIntegerField(default=5, help_text='Stock level at or below which the product is low on stock and needs reordering.'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stock_status',
+            field=models.CharField(choices=[('IN_STOCK', 'In stock'), ('LOW_STOCK', 'Low stock'), ('OUT_OF_STOCK', 'Out of stock')], db_index=True, default='IN_STOCK', editable=False, max_length=12),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('IN_STOCK', 'In stock'), ('LOW_STOCK', 'Low stock'), ('OUT_OF_STOCK', 'Out of stock')], max_length=12)),
+                ('stock', models.PositiveIntegerField()),
+                ('reorder_point', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='product.product')),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['notified_at', 'resolved_at'], name='product_low_notifie_ee79ba_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('product',), name='one_open_low_stock_alert_per_product')],
+            },
+        ),
+        migrations.RunPython(backfill_stock_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0010_low_stock_alert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('daily_demand', models.FloatField()),
+                ('moving_average', models.FloatField()),
+                ('demand_std', models.FloatField()),
+                ('units_sold', models.PositiveIntegerField()),
+                ('history_days', models.PositiveSmallIntegerField()),
+                ('generated_at', models.DateTimeField(db_index=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecast', to='product.product')),
+            ],
+            options={
+                'ordering': ('-daily_demand',),
+                'indexes': [models.Index(fields=['-daily_demand'], name='product_dem_daily_d_fae07e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """Start every product's ledger at its current stock."""
+    Product = apps.get_model("product", "Product")
+    StockMovement = apps.get_model("product", "StockMovement")
+    batch = []
+    for product_id, stock in Product.objects.values_list("id", "stock").iterator(chunk_size=2000):
+        batch.append(StockMovement(product_id=product_id, reason="OPENING", quantity=stock, balance=stock, note="ledger opened"))
+        if len(batch) >= 2000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0011_demand_forecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('OPENING', 'Opening balance'), ('SALE', 'Sale'), ('ROLLBACK', 'Rollback'), ('RESTOCK', 'Restock'), ('ADJUSTMENT', 'Adjustment'), ('IMPORT', 'Import')], max_length=12)),
+                ('quantity', models.IntegerField()),
+                ('balance', models.PositiveIntegerField()),
+                ('note', models.CharField(blank=True, max_length=120)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='product.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='product.product')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created_at', '-id'),
+                'indexes': [models.Index(fields=['product', 'created_at'], name='product_sto_product_1784f7_idx'), models.Index(fields=['created_at'], name='product_sto_created_ae74f9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('stock', models.PositiveIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='product.product')),
+            ],
+            options={
+                'ordering': ('-day',),
+                'indexes': [models.Index(fields=['day'], name='product_sto_day_d5e107_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'day'), name='unique_stock_snapshot_per_day')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
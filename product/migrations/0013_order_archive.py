@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0012_stock_movement_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.PositiveIntegerField(unique=True)),
+                ('customer_name', models.CharField(max_length=255)),
+                ('channel', models.CharField(choices=[('ONLINE', 'Online'), ('POS', 'Point of sale')], max_length=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('SHIPPED', 'Shipped'), ('DELIVERED', 'Delivered'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled'), ('REFUNDED', 'Refunded')], max_length=20)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('payload', models.BinaryField()),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to='product.customer')),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['status', 'created_at'], name='product_arc_status_6a0f57_idx'), models.Index(fields=['created_at'], name='product_arc_created_907db9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sales', to='product.product')),
+            ],
+            options={
+                'ordering': ('-day',),
+                'indexes': [models.Index(fields=['day'], name='product_arc_day_3868c0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'product'), name='unique_archived_sales_per_product_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, IntegerField, Value
+from django.db.models.functions import Cast, Greatest, Round
+
+
+def recompute_effective_price(apps, schema_editor):
+    """Earlier backfills and promotion syncs truncated whole-number prices on SQLite."""
+    Product = apps.get_model("product", "Product")
+    cents = Cast(Round(F("price") * Value(100)), IntegerField())
+    discount = Greatest(F("discount_percentage"), F("promotion_discount"))
+    Product.objects.update(
+        effective_price=ExpressionWrapper(
+            (cents * (Value(100) - discount) + Value(50)) / Value(100) / Value(100.0),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0013_order_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_effective_price, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,16 @@
 # product/models.py
+import json
+import zlib
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
+from django.db.models import Case, CharField, DecimalField, ExpressionWrapper, F, IntegerField, Value, When
+from django.db.models.functions import Cast, Greatest, Round
+from django.db.models.lookups import LessThanOrEqual
 
 
 class Shelf(models.Model):
@@ -35,6 +42,72 @@ class Category(models.Model):
         return self.name
 
 
+CENT = Decimal("0.01")
+
+
+def compute_effective_price(price, discount_percentage):
+    """Price after ``discount_percentage``, rounded half-up to the cent."""
+    price = Decimal(str(price))
+    if not discount_percentage:
+        return price.quantize(CENT, rounding=ROUND_HALF_UP)
+    return (price * (100 - discount_percentage) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def effective_price_expression(discount=None):
+    """SQL equivalent of ``compute_effective_price`` for set-based ``UPDATE``s.
+
+    ``discount`` defaults to the larger of the product's own discount and its
+    promotion discount, i.e. what ``Product.active_discount`` returns.
+    """
+    if discount is None:
+        discount = Greatest(F("discount_percentage"), F("promotion_discount"))
+    # Work in whole cents with integer arithmetic, rounding half-up by adding
+    # half a cent before the integer division: SQLite divides whole-number
+    # prices as integers and binary floats round x.xx5 either way. Only the
+    # final cents -> currency step divides by a float, which is exact to
+    # the cent.
+    cents = Cast(Round(F("price") * Value(100)), IntegerField())
+    discounted_cents = (cents * (Value(100) - discount) + Value(50)) / Value(100)
+    return ExpressionWrapper(
+        discounted_cents / Value(100.0),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+IN_STOCK = "IN_STOCK"
+LOW_STOCK = "LOW_STOCK"
+OUT_OF_STOCK = "OUT_OF_STOCK"
+STOCK_STATUS_CHOICES = [
+    (IN_STOCK, "In stock"),
+    (LOW_STOCK, "Low stock"),
+    (OUT_OF_STOCK, "Out of stock"),
+]
+
+
+def compute_stock_status(stock, reorder_point):
+    if stock <= 0:
+        return OUT_OF_STOCK
+    if stock <= reorder_point:
+        return LOW_STOCK
+    return IN_STOCK
+
+
+def stock_status_expression(stock=None, reorder_point=None):
+    """SQL equivalent of ``compute_stock_status`` for set-based ``UPDATE``s.
+
+    Pass the new ``stock``/``reorder_point`` expressions of the same UPDATE:
+    the right-hand side sees the old column values.
+    """
+    stock = F("stock") if stock is None else stock
+    reorder_point = F("reorder_point") if reorder_point is None else reorder_point
+    return Case(
+        When(LessThanOrEqual(stock, Value(0)), then=Value(OUT_OF_STOCK)),
+        When(LessThanOrEqual(stock, reorder_point), then=Value(LOW_STOCK)),
+        default=Value(IN_STOCK),
+        output_field=CharField(),
+    )
+
+
 class Product(models.Model):
     """Represents an item in the supermarket."""
     name = models.CharField(max_length=255, db_index=True)
@@ -52,11 +125,31 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True, db_index=True)
     shelf = models.ForeignKey(Shelf, on_delete=models.SET_NULL, null=True, blank=True, related_name="products")
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Maintained by PromotionService with set-based UPDATEs, never edited directly.
+    active_promotion = models.ForeignKey(
+        "product.Promotion", on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name="applied_products",
+    )
+    promotion_discount = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Materialized discounted_price, kept in step by save() and bulk price/discount writes.
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    reorder_point = models.PositiveIntegerField(
+        default=5,
+        help_text="Stock level at or below which the product is low on stock and needs reordering.",
+    )
+    # Materialized from stock/reorder_point by save() and every set-based stock write.
+    stock_status = models.CharField(
+        max_length=12, choices=STOCK_STATUS_CHOICES, default=IN_STOCK, editable=False, db_index=True,
+    )
+
+    PRICE_FIELDS = {"price", "discount_percentage", "promotion_discount"}
+    STOCK_FIELDS = {"stock", "reorder_point"}
 
     class Meta:
         indexes = [
             models.Index(fields=["created_at"]),
             models.Index(fields=["price"]),
+            models.Index(fields=["effective_price"]),
             models.Index(fields=["stock"]),
             models.Index(fields=["category"]),
         ]
@@ -64,12 +157,209 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.name} ({self.stock} in stock)"
 
+    @property
+    def active_discount(self):
+        """The better of the product's own discount and any running promotion."""
+        return max(self.discount_percentage or 0, self.promotion_discount or 0)
+
     @property
     def discounted_price(self):
-        if not self.discount_percentage:
-            return self.price
-        multiplier = Decimal(100 - self.discount_percentage) / Decimal(100)
-        return self.price * multiplier
+        return compute_effective_price(self.price, self.active_discount)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a save() that changes stock can add it to the ledger.
+        instance._loaded_stock = instance.__dict__.get("stock")
+        return instance
+
+    def _stock_before_save(self):
+        if self._state.adding:
+            return 0
+        previous = getattr(self, "_loaded_stock", None)
+        if previous is None:
+            previous = Product.objects.filter(pk=self.pk).values_list("stock", flat=True).first() or 0
+        return previous
+
+    def save(self, *args, **kwargs):
+        self.effective_price = self.discounted_price
+        self.stock_status = compute_stock_status(self.stock, self.reorder_point)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            derived = set()
+            if self.PRICE_FIELDS.intersection(update_fields):
+                derived.add("effective_price")
+            if self.STOCK_FIELDS.intersection(update_fields):
+                derived.add("stock_status")
+            if derived:
+                kwargs["update_fields"] = {*update_fields, *derived}
+        stock_written = update_fields is None or "stock" in update_fields
+        # Read by the post_save receiver that appends to the StockMovement ledger.
+        self.stock_change = self.stock - self._stock_before_save() if stock_written else 0
+        super().save(*args, **kwargs)
+        self._loaded_stock = self.stock
+
+
+class StockMovement(models.Model):
+    """Append-only ledger of every stock change, with the stock left after it.
+
+    Written by ``StockLedgerService`` for set-based deductions, rollbacks and
+    imports and by a ``post_save`` receiver for edits through ``save()``.
+    """
+    OPENING = "OPENING"
+    SALE = "SALE"
+    ROLLBACK = "ROLLBACK"
+    RESTOCK = "RESTOCK"
+    ADJUSTMENT = "ADJUSTMENT"
+    IMPORT = "IMPORT"
+    REASON_CHOICES = [
+        (OPENING, "Opening balance"),
+        (SALE, "Sale"),
+        (ROLLBACK, "Rollback"),
+        (RESTOCK, "Restock"),
+        (ADJUSTMENT, "Adjustment"),
+        (IMPORT, "Import"),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_movements")
+    reason = models.CharField(max_length=12, choices=REASON_CHOICES)
+    # Signed: negative when stock left the shelf.
+    quantity = models.IntegerField()
+    balance = models.PositiveIntegerField()
+    order = models.ForeignKey("product.Order", null=True, blank=True, on_delete=models.SET_NULL, related_name="stock_movements")
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="stock_movements")
+    note = models.CharField(max_length=120, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created_at", "-id")
+        indexes = [
+            models.Index(fields=["product", "created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity:+d} ({self.reason}) -> {self.balance}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Stock movements are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Stock movements are append-only.")
+
+
+class StockSnapshot(models.Model):
+    """A product's closing stock at the end of ``day`` (local time), written nightly."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_snapshots")
+    day = models.DateField()
+    stock = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ("-day",)
+        constraints = [
+            models.UniqueConstraint(fields=["product", "day"], name="unique_stock_snapshot_per_day"),
+        ]
+        indexes = [
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}: {self.stock}"
+
+
+class LowStockAlert(models.Model):
+    """A product falling to or below its reorder point.
+
+    Opened and resolved by ``StockAlertService.sync`` after stock writes;
+    open alerts are batched into one digest by ``send_low_stock_digest_task``.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="low_stock_alerts")
+    status = models.CharField(max_length=12, choices=STOCK_STATUS_CHOICES)
+    stock = models.PositiveIntegerField()
+    reorder_point = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=models.Q(resolved_at__isnull=True),
+                name="one_open_low_stock_alert_per_product",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["notified_at", "resolved_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name}: {self.get_status_display()} ({self.stock} left)"
+
+
+class DemandForecast(models.Model):
+    """Latest nightly demand forecast for a product, in units per day.
+
+    Written in bulk by ``DemandForecastService.run``; products with no sales
+    in the history window have no row.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="demand_forecast")
+    # Exponentially smoothed level of daily demand: the forecast for each coming day.
+    daily_demand = models.FloatField()
+    moving_average = models.FloatField()
+    # Root mean square of the one-day-ahead errors, for safety stock.
+    demand_std = models.FloatField()
+    units_sold = models.PositiveIntegerField()
+    history_days = models.PositiveSmallIntegerField()
+    generated_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ("-daily_demand",)
+        indexes = [
+            models.Index(fields=["-daily_demand"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name}: {self.daily_demand:.2f}/day"
+
+    def units_over(self, days):
+        return self.daily_demand * days
+
+
+class Promotion(models.Model):
+    """Time-boxed discount rule applied to products in bulk by PromotionService.
+
+    A product is in scope if it is in ``category``, on ``shelf`` or listed in
+    ``products``. When promotions overlap the largest discount wins, and a
+    product's own ``discount_percentage`` still applies if it is larger.
+    """
+    name = models.CharField(max_length=150)
+    discount_percentage = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(90)])
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name="promotions")
+    shelf = models.ForeignKey(Shelf, on_delete=models.CASCADE, null=True, blank=True, related_name="promotions")
+    products = models.ManyToManyField(Product, blank=True, related_name="promotions")
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    applied_at = models.DateTimeField(null=True, blank=True, editable=False)
+    reverted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-starts_at",)
+        indexes = [
+            models.Index(fields=["is_active", "starts_at", "ends_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} (-{self.discount_percentage}%)"
+
+    def clean(self):
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError({"ends_at": "End must be after the start."})
 
 
 class Customer(models.Model):
@@ -87,6 +377,13 @@ class Customer(models.Model):
 from django.db import models
 
 class Order(models.Model):
+    CHANNEL_ONLINE = "ONLINE"
+    CHANNEL_POS = "POS"
+    CHANNEL_CHOICES = [
+        (CHANNEL_ONLINE, "Online"),
+        (CHANNEL_POS, "Point of sale"),
+    ]
+
     STATUS_CHOICES = [
         ("PENDING", "Pending"),
         ("PAID", "Paid"),
@@ -103,6 +400,10 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     stock_deducted = models.BooleanField(default=False)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default=CHANNEL_ONLINE, db_index=True)
+    # Id generated by an offline POS client; makes batch uploads idempotent.
+    client_reference = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    cashier = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="pos_orders")
 
     class Meta:
         indexes = [
@@ -139,6 +440,59 @@ class VerificationLog(models.Model):
         return f"Verification for Order {self.order.id} at {self.verified_at}"
 
 
+class ArchivedOrder(models.Model):
+    """A closed order moved out of the live tables by ``OrderArchiveService``.
+
+    The columns reports filter and total on stay queryable; the order row
+    itself, its items, payments, stock deduction logs and verifications are
+    kept as zlib-compressed JSON in ``payload``.
+    """
+    # Id the order had while it was live; receipts and ledger notes refer to it.
+    order_id = models.PositiveIntegerField(unique=True)
+    customer = models.ForeignKey(Customer, null=True, blank=True, on_delete=models.SET_NULL, related_name="archived_orders")
+    customer_name = models.CharField(max_length=255)
+    channel = models.CharField(max_length=10, choices=Order.CHANNEL_CHOICES)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+    payload = models.BinaryField()
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Archived order {self.order_id} - {self.customer_name} ({self.status})"
+
+    def document(self):
+        """The archived rows: ``order``, ``items``, ``payments``, ``stock_deductions``, ``verifications``."""
+        return json.loads(zlib.decompress(bytes(self.payload)))
+
+
+class ArchivedSalesRollup(models.Model):
+    """Units and revenue per product and day from paid orders that were archived."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="archived_sales")
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ("-day",)
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="unique_archived_sales_per_product_day"),
+        ]
+        indexes = [
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}: {self.units} sold"
+
+
 class ProductReview(models.Model):
     """Customer product reviews and ratings."""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reviews")
@@ -0,0 +1,106 @@
+"""Reporting views (PDF receipts, Excel exports, sales charts).
+
+These are kept apart from ``product.views`` so ReportLab, openpyxl and
+matplotlib are only imported when one of these views is actually hit, not
+when a web or Celery worker boots.
+"""
+import io
+
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.timezone import now
+
+from payment.models import Payment
+from supermarket.core.db_router import replica_reads
+
+from .models import Order
+from .services.chart_service import SalesChartService
+from .services.receipt_service import ReceiptPDFService
+from .views import is_cashier_or_owner
+
+
+def receipt_pdf(request, order_id):
+    order = get_object_or_404(Order.objects.select_related("customer"), id=order_id)
+    etag = ReceiptPDFService.etag(order)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    receipt = ReceiptPDFService.get_pdf(order)
+    response = FileResponse(io.BytesIO(receipt.content), as_attachment=True, filename=receipt.filename)
+    response["ETag"] = receipt.etag
+    if ReceiptPDFService.is_cacheable(order):
+        response["Cache-Control"] = "private, max-age=86400"
+    else:
+        response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_required
+@user_passes_test(is_cashier_or_owner)
+@replica_reads()
+def export_excel(request):
+    from openpyxl import Workbook
+    from openpyxl.chart import BarChart, LineChart, Reference
+
+    today = now().date()
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sales Report"
+
+    # Header
+    ws.append(["Date", "Order ID", "Customer", "Total Price", "Status"])
+
+    orders = Order.objects.filter(created_at__date=today).select_related("customer")
+    for o in orders:
+        ws.append([o.created_at.strftime("%Y-%m-%d"), o.id, o.customer.phone_number, float(o.total_price), o.status])
+
+    # Add Sales Trend Chart
+    chart = LineChart()
+    data = Reference(ws, min_col=4, min_row=2, max_row=ws.max_row)
+    chart.add_data(data, titles_from_data=False)
+    chart.title = "Daily Sales Trend"
+    ws.add_chart(chart, "G2")
+
+    # Add Refund Chart
+    refund_ws = wb.create_sheet(title="Refunds")
+    refund_ws.append(["Date", "Refund Amount"])
+
+    refunds = Payment.objects.filter(status="REFUNDED", transaction_date__date=today)
+    for r in refunds:
+        refund_ws.append([r.transaction_date.strftime("%Y-%m-%d"), float(r.amount)])
+
+    refund_chart = BarChart()
+    refund_data = Reference(refund_ws, min_col=2, min_row=2, max_row=refund_ws.max_row)
+    refund_chart.add_data(refund_data, titles_from_data=False)
+    refund_chart.title = "Refunds Trend"
+    refund_ws.add_chart(refund_chart, "D2")
+
+    # Save to response
+    filename = f"sales_report_{today}.xlsx"
+    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    wb.save(response)
+    return response
+
+
+@login_required
+@user_passes_test(is_cashier_or_owner)
+@replica_reads()
+def sales_graph(request):
+    """Sales chart image; supports ?range=7d|30d|90d, ?metric=revenue|orders, ?format=png|svg."""
+    try:
+        chart = SalesChartService.render(
+            range_key=request.GET.get("range", "30d"),
+            metric=request.GET.get("metric", "revenue"),
+            fmt=request.GET.get("format", "png"),
+        )
+    except ValueError as exc:
+        return HttpResponse(str(exc), status=400)
+
+    response = HttpResponse(chart.content, content_type=chart.content_type)
+    response["ETag"] = chart.etag
+    response["Cache-Control"] = "private, max-age=300"
+    return get_conditional_response(request, etag=chart.etag, response=response)
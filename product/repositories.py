@@ -25,30 +25,46 @@ class ProductRepository:
         if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
 
+        # Customers filter and sort on what they pay, not the list price.
         if min_price is not None:
-            queryset = queryset.filter(price__gte=min_price)
+            queryset = queryset.filter(effective_price__gte=min_price)
 
         if max_price is not None:
-            queryset = queryset.filter(price__lte=max_price)
+            queryset = queryset.filter(effective_price__lte=max_price)
 
         if stock_only:
             queryset = queryset.filter(stock__gt=0)
 
         return queryset
 
+    CATALOG_ANNOTATIONS = {
+        "avg_rating": lambda: Coalesce(Avg("reviews__rating"), 0.0),
+        "review_count": lambda: Coalesce(Count("reviews"), 0),
+        "popularity": lambda: Coalesce(Sum("orderitem__quantity"), 0),
+    }
+
+    @classmethod
+    def with_catalog_annotations(cls, queryset, names=None):
+        """Add rating/review/popularity aggregates; ``names`` limits it to the ones needed."""
+        names = cls.CATALOG_ANNOTATIONS if names is None else names
+        if not names:
+            return queryset
+        return queryset.annotate(**{name: cls.CATALOG_ANNOTATIONS[name]() for name in names})
+
     @staticmethod
-    def with_catalog_annotations(queryset):
-        return queryset.annotate(
-            avg_rating=Coalesce(Avg("reviews__rating"), 0.0),
-            review_count=Coalesce(Count("reviews"), 0),
-            popularity=Coalesce(Sum("orderitem__quantity"), 0),
-        )
+    def with_columns(queryset, columns):
+        """Load only ``columns`` (``related__field`` entries join the relation)."""
+        related = sorted({column.split("__", 1)[0] for column in columns if "__" in column})
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns) if columns else queryset.only("id")
 
     @staticmethod
     def apply_sorting(queryset, sort):
         sort_map = {
-            "price_asc": "price",
-            "price_desc": "-price",
+            "price_asc": "effective_price",
+            "price_desc": "-effective_price",
             "newest": "-created_at",
             "popularity": "-popularity",
             "rating": "-avg_rating",
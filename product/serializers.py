@@ -7,9 +7,9 @@ def serialize_product(product):
         "id": product.id,
         "name": product.name,
         "description": product.description,
-        "price": float(product.price),
+        "price": product.price,
         "discount_percentage": product.discount_percentage,
-        "discounted_price": float(product.discounted_price),
+        "discounted_price": product.effective_price,
         "stock": product.stock,
         "barcode": product.barcode,
         "category": product.category.name if getattr(product, "category", None) else None,
@@ -25,5 +25,5 @@ def serialize_review(review):
         "rating": review.rating,
         "comment": review.comment,
         "customer": review.customer.name or review.customer.phone_number,
-        "created_at": review.created_at.isoformat(),
+        "created_at": review.created_at,
     }
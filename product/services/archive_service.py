@@ -0,0 +1,208 @@
+"""Chunked archival of closed orders, with rollups that keep sales totals intact."""
+import datetime
+import json
+import time
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from payment.models import ArchivedPaymentRollup, Payment, StockDeductionLog
+from product.models import ArchivedOrder, ArchivedSalesRollup, Order, OrderItem, StockMovement, VerificationLog
+from product.services.chart_service import CHART_RANGES
+from product.services.forecast_service import SALES_STATUSES
+
+
+# Orders nothing changes any more; a PENDING order may still be paid.
+CLOSED_STATUSES = ("PAID", "SHIPPED", "DELIVERED", "FAILED", "CANCELLED", "REFUNDED")
+
+
+@dataclass
+class ArchiveRunResult:
+    orders: int = 0
+    items: int = 0
+    payments: int = 0
+    stock_deductions: int = 0
+    verifications: int = 0
+    chunks: int = 0
+    # Orders were still due when ``max_chunks`` ended the run.
+    remaining: bool = False
+    seconds: float = 0.0
+
+
+def _group_by_order(rows):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row["order_id"]].append(row)
+    return grouped
+
+
+class OrderArchiveService:
+    """Move closed orders past a cutoff age out of the live tables, one bounded chunk at a time.
+
+    Each chunk is one transaction: the orders are locked, their items,
+    payments, stock deduction logs and verifications are read with one
+    query per table and written as one compressed ``ArchivedOrder`` per
+    order, paid sales and payments are added to the daily rollups, and the
+    live rows are deleted. Reports add ``ArchivedOrder`` and the rollups to
+    the live tables when their range reaches back past the newest archived
+    order, so totals do not change when orders move.
+
+    ``StockMovement.order`` is nulled when an order goes; the archived
+    document keeps the ids of those movements.
+    """
+
+    @staticmethod
+    def minimum_age_days():
+        """Forecasts, reorder velocity and the sales charts only read the live tables."""
+        return max(settings.FORECAST_HISTORY_DAYS, settings.REORDER_LOOKBACK_DAYS, max(CHART_RANGES.values()))
+
+    @classmethod
+    def cutoff(cls, days=None, now=None):
+        days = days if days is not None else settings.ARCHIVE_ORDERS_AFTER_DAYS
+        if days < cls.minimum_age_days():
+            raise ValueError(f"Orders must be at least {cls.minimum_age_days()} days old to be archived")
+        return (now or timezone.now()) - datetime.timedelta(days=days)
+
+    @staticmethod
+    def due(cutoff):
+        return Order.objects.filter(status__in=CLOSED_STATUSES, created_at__lt=cutoff)
+
+    @classmethod
+    def run(cls, *, days=None, chunk_size=None, max_chunks=None, now=None):
+        """Archive due orders oldest id first; ``max_chunks`` of 0 means until none are left."""
+        started = time.perf_counter()
+        now = now or timezone.now()
+        cutoff = cls.cutoff(days, now)
+        chunk_size = chunk_size or settings.ARCHIVE_CHUNK_SIZE
+        max_chunks = max_chunks if max_chunks is not None else settings.ARCHIVE_MAX_CHUNKS
+
+        result = ArchiveRunResult()
+        while True:
+            if max_chunks and result.chunks >= max_chunks:
+                result.remaining = cls.due(cutoff).exists()
+                break
+            order_ids = list(cls.due(cutoff).order_by("id").values_list("id", flat=True)[:chunk_size])
+            if not order_ids:
+                break
+            cls.archive_chunk(order_ids, cutoff, result, now=now)
+            result.chunks += 1
+        result.seconds = time.perf_counter() - started
+        return result
+
+    @classmethod
+    def archive_chunk(cls, order_ids, cutoff, result=None, now=None):
+        """Archive those of ``order_ids`` that are still due, in one transaction."""
+        result = result or ArchiveRunResult()
+        now = now or timezone.now()
+        with transaction.atomic():
+            # Re-checked under the lock in case a status changed since the ids were picked.
+            orders = list(cls.due(cutoff).select_for_update().filter(id__in=order_ids).values())
+            if not orders:
+                return result
+            ids = [order["id"] for order in orders]
+            items = _group_by_order(OrderItem.objects.filter(order_id__in=ids).values())
+            payments = _group_by_order(Payment.objects.filter(order_id__in=ids).values())
+            deductions = _group_by_order(StockDeductionLog.objects.filter(order_id__in=ids).values())
+            verifications = _group_by_order(VerificationLog.objects.filter(order_id__in=ids).values())
+            movements = _group_by_order(StockMovement.objects.filter(order_id__in=ids).values("id", "order_id"))
+
+            ArchivedOrder.objects.bulk_create([
+                ArchivedOrder(
+                    order_id=order["id"],
+                    customer_id=order["customer_id"],
+                    customer_name=order["customer_name"],
+                    channel=order["channel"],
+                    status=order["status"],
+                    total_price=order["total_price"],
+                    created_at=order["created_at"],
+                    archived_at=now,
+                    payload=cls._compress({
+                        "order": order,
+                        "items": items.get(order["id"], []),
+                        "payments": payments.get(order["id"], []),
+                        "stock_deductions": deductions.get(order["id"], []),
+                        "verifications": verifications.get(order["id"], []),
+                        "stock_movements": [row["id"] for row in movements.get(order["id"], [])],
+                    }),
+                )
+                for order in orders
+            ])
+            cls._roll_up_sales(orders, items)
+            cls._roll_up_payments(payments)
+            Order.objects.filter(id__in=ids).delete()
+
+        result.orders += len(orders)
+        result.items += sum(map(len, items.values()))
+        result.payments += sum(map(len, payments.values()))
+        result.stock_deductions += sum(map(len, deductions.values()))
+        result.verifications += sum(map(len, verifications.values()))
+        return result
+
+    @staticmethod
+    def _compress(document):
+        return zlib.compress(json.dumps(document, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def _add_to_rollup(model, keys, count_field, amount_field, totals):
+        """Add ``{key tuple: [count, amount]}`` onto the ``model`` rows keyed by ``keys``.
+
+        Missing rows are inserted empty and every row is then incremented in
+        SQL, so runs that overlap add to each other's totals instead of
+        overwriting them with what they read.
+        """
+        if not totals:
+            return
+        model.objects.bulk_create(
+            [model(**dict(zip(keys, key)), **{count_field: 0, amount_field: 0}) for key in totals],
+            ignore_conflicts=True,
+        )
+        for key, (count, amount) in totals.items():
+            model.objects.filter(**dict(zip(keys, key))).update(
+                **{count_field: F(count_field) + count, amount_field: F(amount_field) + amount}
+            )
+
+    @classmethod
+    def _roll_up_sales(cls, orders, items):
+        sale_days = {
+            order["id"]: timezone.localdate(order["created_at"])
+            for order in orders
+            if order["status"] in SALES_STATUSES
+        }
+        totals = defaultdict(lambda: [0, Decimal("0")])
+        for order_id, day in sale_days.items():
+            for item in items.get(order_id, []):
+                total = totals[(day, item["product_id"])]
+                total[0] += item["quantity"]
+                total[1] += item["price"] * item["quantity"]
+        cls._add_to_rollup(ArchivedSalesRollup, ("day", "product_id"), "units", "revenue", totals)
+
+    @classmethod
+    def _roll_up_payments(cls, payments):
+        totals = defaultdict(lambda: [0, Decimal("0")])
+        for rows in payments.values():
+            for payment in rows:
+                total = totals[(timezone.localdate(payment["created_at"]), payment["status"], payment["method"])]
+                total[0] += 1
+                total[1] += payment["amount"]
+        cls._add_to_rollup(ArchivedPaymentRollup, ("day", "status", "method"), "payments", "amount", totals)
+
+    @staticmethod
+    def archive_reaches(start):
+        """Whether a report from ``start`` (a date, ``None`` for all time) has archived orders to include."""
+        latest = ArchivedOrder.objects.aggregate(latest=Max("created_at"))["latest"]
+        return latest is not None and (start is None or timezone.localdate(latest) >= start)
+
+    @classmethod
+    def archived_orders(cls, start=None):
+        """Archived orders placed on or after ``start``; ``none()``, which costs no query, if there cannot be any."""
+        if not cls.archive_reaches(start):
+            return ArchivedOrder.objects.none()
+        queryset = ArchivedOrder.objects.all()
+        return queryset.filter(created_at__date__gte=start) if start else queryset
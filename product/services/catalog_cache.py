@@ -0,0 +1,168 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    content_type: str
+    etag: str
+
+
+class CatalogCacheService:
+    """Catalog-wide version number and response/context caching keyed on it.
+
+    Any Product, Category or ProductReview change bumps the version, which
+    makes every cached catalog entry unreachable at once. The version is a
+    nanosecond timestamp, so it doubles as the catalog's Last-Modified.
+    """
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+    @staticmethod
+    def max_age():
+        return getattr(settings, "CATALOG_CACHE_MAX_AGE", 60)
+
+    @staticmethod
+    def version():
+        version = cache.get(CATALOG_VERSION_KEY)
+        if version is None:
+            # Unknown state (cold or cleared cache): start a fresh version.
+            cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(CATALOG_VERSION_KEY)
+        return version
+
+    @staticmethod
+    async def aversion():
+        version = await cache.aget(CATALOG_VERSION_KEY)
+        if version is None:
+            await cache.aadd(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+            version = await cache.aget(CATALOG_VERSION_KEY)
+        return version
+
+    @staticmethod
+    def bump():
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+    @classmethod
+    def bump_on_commit(cls):
+        """Bump now and again after commit, so nothing cached mid-transaction survives."""
+        cls.bump()
+        transaction.on_commit(cls.bump)
+
+    @staticmethod
+    def last_modified(version):
+        return version // 1_000_000_000
+
+    @staticmethod
+    def normalized_query(query_dict, params):
+        """Stable representation of the whitelisted, non-empty query parameters."""
+        parts = []
+        for name in sorted(params):
+            values = sorted(value.strip() for value in query_dict.getlist(name) if value.strip())
+            if values:
+                parts.append(f"{name}={','.join(values)}")
+        return "&".join(parts)
+
+    @classmethod
+    def cache_key(cls, namespace, version, *parts):
+        digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+        return f"catalog:{namespace}:{version}:{digest}"
+
+    @classmethod
+    def get_or_build(cls, namespace, build, *parts):
+        """Cache arbitrary (picklable) data, e.g. template context, for the current version."""
+        key = cls.cache_key(namespace, cls.version(), *parts)
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, timeout=cls.timeout())
+        return data
+
+
+def _is_anonymous(request):
+    # API callers authenticate with a bearer token, never the session.
+    return not request.META.get("HTTP_AUTHORIZATION")
+
+
+def _to_cached(response):
+    content = response.content
+    etag = f'"{hashlib.md5(content).hexdigest()}"'
+    return CachedResponse(content, response["Content-Type"], etag)
+
+
+def _from_cached(request, cached, version):
+    response = HttpResponse(cached.content, content_type=cached.content_type)
+    response["ETag"] = cached.etag
+    response["Last-Modified"] = http_date(CatalogCacheService.last_modified(version))
+    response["Cache-Control"] = f"public, max-age={CatalogCacheService.max_age()}"
+    return get_conditional_response(
+        request,
+        etag=cached.etag,
+        last_modified=CatalogCacheService.last_modified(version),
+        response=response,
+    )
+
+
+def cache_catalog_response(namespace, params=()):
+    """Cache successful anonymous GET responses per catalog version and normalized query.
+
+    Responses carry ETag/Last-Modified/Cache-Control so browsers and a CDN can
+    revalidate with a 304. Works on sync and async views.
+    """
+    def parts(request, args, kwargs):
+        return (
+            request.path,
+            CatalogCacheService.normalized_query(request.GET, params),
+            sorted(kwargs.items()),
+            args,
+        )
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not _is_anonymous(request):
+                    return await view_func(request, *args, **kwargs)
+                version = await CatalogCacheService.aversion()
+                key = CatalogCacheService.cache_key(namespace, version, *parts(request, args, kwargs))
+                cached = await cache.aget(key)
+                if cached is None:
+                    response = await view_func(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    cached = _to_cached(response)
+                    await cache.aset(key, cached, timeout=CatalogCacheService.timeout())
+                return _from_cached(request, cached, version)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_anonymous(request):
+                return view_func(request, *args, **kwargs)
+            version = CatalogCacheService.version()
+            key = CatalogCacheService.cache_key(namespace, version, *parts(request, args, kwargs))
+            cached = cache.get(key)
+            if cached is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cached = _to_cached(response)
+                cache.set(key, cached, timeout=CatalogCacheService.timeout())
+            return _from_cached(request, cached, version)
+        return wrapper
+    return decorator
@@ -0,0 +1,97 @@
+"""Server-side sales chart rendering with a rendered-image cache."""
+import hashlib
+import io
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from product.models import Order
+
+
+PAID_STATUSES = ("PAID", "SHIPPED", "DELIVERED")
+
+CHART_RANGES = {"7d": 7, "30d": 30, "90d": 90}
+CHART_METRICS = {
+    "revenue": ("Sales", Sum("total_price")),
+    "orders": ("Orders", Count("id")),
+}
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+CHART_CACHE_TIMEOUT = 60 * 60
+
+
+@dataclass
+class RenderedChart:
+    content: bytes
+    content_type: str
+    etag: str
+
+
+class SalesChartService:
+    """Render sales charts in memory and cache the encoded image bytes.
+
+    Uses the object-oriented ``Figure`` API with the Agg canvas so rendering
+    never touches pyplot's global state and is safe under threaded servers.
+    """
+
+    @staticmethod
+    def _series(days, metric):
+        start_date = timezone.now().date() - timedelta(days=days - 1)
+        _, aggregate = CHART_METRICS[metric]
+        rows = (
+            Order.objects.filter(status__in=PAID_STATUSES, created_at__date__gte=start_date)
+            .annotate(day=TruncDate("created_at"))
+            .values("day")
+            .annotate(value=aggregate)
+            .order_by("day")
+        )
+        by_day = {row["day"]: float(row["value"] or 0) for row in rows}
+        return [
+            (start_date + timedelta(days=i), by_day.get(start_date + timedelta(days=i), 0.0))
+            for i in range(days)
+        ]
+
+    @staticmethod
+    def _draw(series, metric, days, fmt):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        label, _ = CHART_METRICS[metric]
+        figure = Figure(figsize=(8, 4))
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        axes.plot([day for day, _ in series], [value for _, value in series], marker="o")
+        axes.set_title(f"{label} Over Last {days} Days")
+        axes.set_xlabel("Date")
+        axes.set_ylabel(label)
+        axes.tick_params(axis="x", labelrotation=45)
+        figure.tight_layout()
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format=fmt)
+        return buffer.getvalue()
+
+    @classmethod
+    def render(cls, range_key="30d", metric="revenue", fmt="png"):
+        if range_key not in CHART_RANGES:
+            raise ValueError(f"Unsupported range '{range_key}'")
+        if metric not in CHART_METRICS:
+            raise ValueError(f"Unsupported metric '{metric}'")
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'")
+
+        days = CHART_RANGES[range_key]
+        series = cls._series(days, metric)
+        data_version = hashlib.sha1(repr(series).encode("utf-8")).hexdigest()[:16]
+        etag = f'"{range_key}-{metric}-{fmt}-{data_version}"'
+
+        cache_key = f"charts:sales:{range_key}:{metric}:{fmt}:{data_version}"
+        content = cache.get(cache_key)
+        if content is None:
+            content = cls._draw(series, metric, days, fmt)
+            cache.set(cache_key, content, timeout=CHART_CACHE_TIMEOUT)
+
+        return RenderedChart(content=content, content_type=CHART_FORMATS[fmt], etag=etag)
@@ -0,0 +1,173 @@
+"""Nightly per-product demand forecasts from order history."""
+import datetime
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from payment.models import StockDeductionLog
+from product.models import DemandForecast, OrderItem
+
+
+SALES_STATUSES = ("PAID", "SHIPPED", "DELIVERED")
+
+
+def day_window(days, now=None):
+    """Return ``(start, calendar)``: local midnight ``days - 1`` days ago and the dates up to today."""
+    last_day = timezone.localdate(now or timezone.now())
+    first_day = last_day - datetime.timedelta(days=days - 1)
+    start = timezone.make_aware(datetime.datetime.combine(first_day, datetime.time.min))
+    return start, [first_day + datetime.timedelta(days=offset) for offset in range(days)]
+
+
+def net_units():
+    """Deducted quantity, negative for rollbacks."""
+    return Case(
+        When(action=StockDeductionLog.ROLLBACK, then=-F("quantity")),
+        default=F("quantity"),
+        output_field=IntegerField(),
+    )
+
+
+def pivot_daily(records, calendar):
+    """Products x days ``DataFrame`` from ``(product_id, day, units)`` rows, zero-filled."""
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records, columns=["product_id", "day", "units"])
+    if frame.empty:
+        return pd.DataFrame(columns=calendar, dtype="float64")
+    return (
+        frame.pivot_table(index="product_id", columns="day", values="units", aggfunc="sum", fill_value=0)
+        .reindex(columns=calendar, fill_value=0)
+        .astype("float64")
+    )
+
+
+@dataclass
+class ForecastRunResult:
+    products: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+
+
+class DemandForecastService:
+    """Exponential smoothing and moving averages over every product at once.
+
+    Demand is grouped per product and day in SQL, pivoted into one products x
+    days matrix and fitted column-wise: ``ewm`` runs its recursion in C over
+    all products together and everything else is a numpy reduction, so a run
+    costs two grouped queries, one fit and batched upserts whatever the size
+    of the catalog.
+    """
+
+    batch_size = 2000
+
+    @staticmethod
+    def demand_matrix(days, now=None):
+        """Products x days ``DataFrame`` of units demanded, oldest day first.
+
+        Paid orders count on the day they were placed. Stock deducted against
+        orders that never reached a paid state (counter deductions) counts on
+        the day it was logged, net of rollbacks, so paid orders are not
+        counted twice and refunds cancel out.
+        """
+        start, calendar = day_window(days, now)
+        ordered = (
+            OrderItem.objects.filter(order__status__in=SALES_STATUSES, order__created_at__gte=start)
+            .annotate(day=TruncDate("order__created_at"))
+            .values("product_id", "day")
+            .annotate(units=Sum("quantity"))
+            .order_by()
+            .values_list("product_id", "day", "units")
+        )
+        logged = (
+            StockDeductionLog.objects.filter(created_at__gte=start)
+            .exclude(order__status__in=SALES_STATUSES)
+            .annotate(day=TruncDate("created_at"))
+            .values("product_id", "day")
+            .annotate(units=Sum(net_units()))
+            .order_by()
+            .values_list("product_id", "day", "units")
+        )
+        return pivot_daily([*ordered, *logged], calendar)
+
+    @staticmethod
+    def fit(demand, alpha, window):
+        """Fit every row of a products x days frame; returns one row of statistics per product."""
+        import numpy as np
+        import pandas as pd
+
+        units = np.clip(demand.to_numpy(dtype="float64"), 0, None)
+        # ewm walks down columns, so products become columns for the recursion.
+        levels = pd.DataFrame(units.T).ewm(alpha=alpha, adjust=False).mean().to_numpy().T
+        # Each day's level is the forecast for the next day.
+        errors = units[:, 1:] - levels[:, :-1]
+        demand_std = np.sqrt((errors ** 2).mean(axis=1)) if errors.shape[1] else np.zeros(len(units))
+        return pd.DataFrame(
+            {
+                "daily_demand": levels[:, -1],
+                "moving_average": units[:, -window:].mean(axis=1),
+                "demand_std": demand_std,
+                "units_sold": units.sum(axis=1),
+            },
+            index=demand.index,
+        )
+
+    @classmethod
+    def run(cls, *, days=None, alpha=None, window=None, now=None):
+        """Refit and store forecasts for every product that sold in the window.
+
+        Forecasts of products with no sales in the window are removed.
+        """
+        started = time.perf_counter()
+        now = now or timezone.now()
+        days = days or settings.FORECAST_HISTORY_DAYS
+        alpha = alpha or settings.FORECAST_SMOOTHING
+        window = min(window or settings.FORECAST_MOVING_AVERAGE_DAYS, days)
+
+        demand = cls.demand_matrix(days, now)
+        forecasts = []
+        if not demand.empty:
+            fitted = cls.fit(demand, alpha, window)
+            forecasts = [
+                DemandForecast(
+                    product_id=int(product_id),
+                    daily_demand=daily_demand,
+                    moving_average=moving_average,
+                    demand_std=demand_std,
+                    units_sold=int(units_sold),
+                    history_days=days,
+                    generated_at=now,
+                )
+                for product_id, daily_demand, moving_average, demand_std, units_sold in zip(
+                    fitted.index.tolist(),
+                    fitted["daily_demand"].tolist(),
+                    fitted["moving_average"].tolist(),
+                    fitted["demand_std"].tolist(),
+                    fitted["units_sold"].tolist(),
+                )
+            ]
+
+        with transaction.atomic():
+            DemandForecast.objects.bulk_create(
+                forecasts,
+                batch_size=cls.batch_size,
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=["daily_demand", "moving_average", "demand_std", "units_sold", "history_days", "generated_at"],
+            )
+            removed, _ = DemandForecast.objects.exclude(generated_at=now).delete()
+
+        return ForecastRunResult(products=len(forecasts), removed=removed, seconds=time.perf_counter() - started)
+
+    @staticmethod
+    def fresh(now=None):
+        """Forecasts recent enough to plan with; a stalled nightly job stops feeding stale numbers."""
+        now = now or timezone.now()
+        return DemandForecast.objects.filter(
+            generated_at__gte=now - datetime.timedelta(hours=settings.FORECAST_MAX_AGE_HOURS)
+        )
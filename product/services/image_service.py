@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from urllib.parse import urlencode
 
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache import cache
 
@@ -39,20 +40,23 @@ class UnsplashImageService:
         return f"{product_name} {CATEGORY_KEYWORDS['default']}".strip()
 
     @classmethod
-    def get_image_for_product(cls, product_name, category_name=None, uploaded_url=None):
+    def _lookup_plan(cls, product_name, category_name, uploaded_url):
+        """Return ``(result, keyword, access_key)``; ``result`` is set when no lookup is needed."""
         if uploaded_url:
-            return ImageResult(uploaded_url, "uploaded")
+            return ImageResult(uploaded_url, "uploaded"), None, None
 
         access_key = getattr(settings, "UNSPLASH_ACCESS_KEY", "").strip()
         if not access_key:
-            return ImageResult(cls._fallback_url(), "fallback")
+            return ImageResult(cls._fallback_url(), "fallback"), None, None
 
-        keyword = cls._keyword_for(category_name, product_name)
-        cache_key = f"unsplash:image:{keyword.lower()}"
-        cached = cache.get(cache_key)
-        if cached:
-            return ImageResult(cached, "cache")
+        return None, cls._keyword_for(category_name, product_name), access_key
+
+    @staticmethod
+    def _cache_key(keyword):
+        return f"unsplash:image:{keyword.lower()}"
 
+    @classmethod
+    def _fetch(cls, keyword, access_key):
         try:
             params = {
                 "query": keyword,
@@ -68,10 +72,42 @@ class UnsplashImageService:
             result = (payload.get("results") or [None])[0]
             if result and result.get("urls", {}).get("regular"):
                 raw_url = result["urls"]["regular"]
-                optimized_url = f"{raw_url}&w=600&h=600&fit=crop&auto=format&q=80"
-                cache.set(cache_key, optimized_url, timeout=60 * 60 * 24)
-                return ImageResult(optimized_url, "unsplash")
+                return f"{raw_url}&w=600&h=600&fit=crop&auto=format&q=80"
         except Exception:
             pass
+        return None
+
+    @classmethod
+    def get_image_for_product(cls, product_name, category_name=None, uploaded_url=None):
+        result, keyword, access_key = cls._lookup_plan(product_name, category_name, uploaded_url)
+        if result:
+            return result
+
+        cache_key = cls._cache_key(keyword)
+        cached = cache.get(cache_key)
+        if cached:
+            return ImageResult(cached, "cache")
+
+        optimized_url = cls._fetch(keyword, access_key)
+        if optimized_url:
+            cache.set(cache_key, optimized_url, timeout=60 * 60 * 24)
+            return ImageResult(optimized_url, "unsplash")
+        return ImageResult(cls._fallback_url(), "fallback")
+
+    @classmethod
+    async def aget_image_for_product(cls, product_name, category_name=None, uploaded_url=None):
+        """Async variant; the Unsplash request runs in a worker thread so the event loop stays free."""
+        result, keyword, access_key = cls._lookup_plan(product_name, category_name, uploaded_url)
+        if result:
+            return result
+
+        cache_key = cls._cache_key(keyword)
+        cached = await cache.aget(cache_key)
+        if cached:
+            return ImageResult(cached, "cache")
 
+        optimized_url = await sync_to_async(cls._fetch, thread_sensitive=False)(keyword, access_key)
+        if optimized_url:
+            await cache.aset(cache_key, optimized_url, timeout=60 * 60 * 24)
+            return ImageResult(optimized_url, "unsplash")
         return ImageResult(cls._fallback_url(), "fallback")
@@ -0,0 +1,337 @@
+"""Bulk product import: CSV/JSON rows upserted on barcode in chunks."""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from product.models import Category, Product, Shelf, StockMovement, compute_stock_status
+from product.services.catalog_cache import CatalogCacheService
+from product.services.stock_alert_service import StockAlertService
+from product.services.stock_ledger import StockLedgerService
+
+
+# Columns an import may carry; ``barcode`` is the upsert key and always required.
+IMPORT_COLUMNS = (
+    "barcode", "name", "description", "price", "discount_percentage",
+    "stock", "reorder_point", "is_active", "category", "shelf",
+)
+# Import column -> Product field it writes.
+IMPORT_FIELD_MAP = {"category": "category_id", "shelf": "shelf_id"}
+PRODUCT_COLUMNS = tuple(IMPORT_FIELD_MAP.get(name, name) for name in IMPORT_COLUMNS if name != "barcode")
+
+IMPORT_FORMATS = ("csv", "json")
+MAX_PRICE = Decimal("99999999.99")
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+FALSE_VALUES = {"0", "false", "no", "n", "off"}
+
+
+@dataclass
+class ImportRowError:
+    row: int
+    barcode: str
+    errors: list
+
+
+@dataclass
+class ImportResult:
+    total_rows: int = 0
+    created: int = 0
+    updated: int = 0
+    categories_created: int = 0
+    shelves_created: int = 0
+    dry_run: bool = False
+    errors: list = field(default_factory=list)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def as_dict(self, max_errors=None):
+        errors = self.errors if max_errors is None else self.errors[:max_errors]
+        return {
+            "total_rows": self.total_rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "categories_created": self.categories_created,
+            "shelves_created": self.shelves_created,
+            "dry_run": self.dry_run,
+            "errors": [{"row": e.row, "barcode": e.barcode, "errors": e.errors} for e in errors],
+        }
+
+
+class ProductImportService:
+    """Validate and upsert large product files with a handful of queries per chunk.
+
+    Categories and shelves are resolved from maps loaded once, rows are
+    written with ``bulk_create(update_conflicts=True)`` keyed on barcode, and
+    the catalog cache version is bumped once at the end because bulk writes
+    do not send ``post_save``. Invalid rows are reported and skipped.
+    """
+
+    chunk_size = 1000
+
+    @staticmethod
+    def parse(content, fmt):
+        """Return ``(rows, columns)`` for CSV text or a JSON list / ``{"items": [...]}``."""
+        if isinstance(content, bytes):
+            content = content.decode("utf-8-sig")
+        if fmt == "csv":
+            reader = csv.DictReader(io.StringIO(content))
+            columns = [(name or "").strip() for name in (reader.fieldnames or [])]
+            reader.fieldnames = columns
+            return list(reader), columns
+        if fmt == "json":
+            data = json.loads(content or "[]")
+            if isinstance(data, dict):
+                data = data.get("items")
+            if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+                raise ValueError("JSON imports must be a list of objects or {\"items\": [...]}")
+            columns = []
+            for row in data:
+                columns.extend(name for name in row if name not in columns)
+            return data, columns
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    @staticmethod
+    def _text(value):
+        return "" if value is None else str(value).strip()
+
+    @classmethod
+    def _clean(cls, row, columns, categories, shelves, create_missing):
+        """Return ``(values, errors)`` holding only the columns present in the file."""
+        values, errors = {}, []
+
+        barcode = cls._text(row.get("barcode"))
+        if not barcode:
+            errors.append("barcode is required")
+        elif len(barcode) > 100:
+            errors.append("barcode is longer than 100 characters")
+        values["barcode"] = barcode
+
+        if "name" in columns:
+            name = cls._text(row.get("name"))
+            if not name:
+                errors.append("name is required")
+            elif len(name) > 255:
+                errors.append("name is longer than 255 characters")
+            values["name"] = name
+
+        if "description" in columns:
+            values["description"] = cls._text(row.get("description"))
+
+        if "price" in columns:
+            try:
+                price = Decimal(cls._text(row.get("price"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+                if price < 0 or price > MAX_PRICE:
+                    raise ValueError
+                values["price"] = price
+            except (InvalidOperation, ValueError):
+                errors.append("price must be a number between 0 and 99999999.99")
+
+        for column, low, high in (("discount_percentage", 0, 90), ("stock", 0, None), ("reorder_point", 0, None)):
+            if column not in columns:
+                continue
+            # Blank cells take the model default.
+            raw = cls._text(row.get(column)) or str(Product._meta.get_field(column).default)
+            try:
+                number = int(raw)
+                if number < low or (high is not None and number > high):
+                    raise ValueError
+                values[column] = number
+            except ValueError:
+                bounds = f"{low}-{high}" if high is not None else f">= {low}"
+                errors.append(f"{column} must be an integer {bounds}")
+
+        if "is_active" in columns:
+            raw = row.get("is_active")
+            flag = cls._text(raw).lower()
+            if isinstance(raw, bool):
+                values["is_active"] = raw
+            elif not flag or flag in TRUE_VALUES:
+                values["is_active"] = True
+            elif flag in FALSE_VALUES:
+                values["is_active"] = False
+            else:
+                errors.append("is_active must be true or false")
+
+        if "category" in columns:
+            label = cls._text(row.get("category"))
+            known = categories.get(label.lower(), categories.get(slugify(label)))
+            if not label:
+                values["category"] = None
+            elif known is not None:
+                values["category"] = known
+            elif create_missing and slugify(label):
+                values["category"] = label
+            else:
+                errors.append(f"unknown category '{label}'")
+
+        if "shelf" in columns:
+            label = cls._text(row.get("shelf"))
+            if not label:
+                values["shelf"] = None
+            elif label.lower() in shelves:
+                values["shelf"] = shelves[label.lower()]
+            elif create_missing and len(label) <= 100:
+                values["shelf"] = label
+            else:
+                errors.append(f"unknown shelf '{label}'")
+
+        return values, errors
+
+    @staticmethod
+    def _load_maps():
+        categories = {}
+        for pk, name, slug in Category.objects.values_list("id", "name", "slug"):
+            categories[name.lower()] = pk
+            categories[slug] = pk
+        shelves = {name.lower(): pk for pk, name in Shelf.objects.values_list("id", "name")}
+        return categories, shelves
+
+    @staticmethod
+    def _create_missing(chunk, categories, shelves, result, dry_run):
+        """Create categories/shelves named by this chunk and swap their labels for ids."""
+        # Keyed the way lookups normalise them, so "Dairy" and "dairy" make one row.
+        new_categories = {slugify(v["category"]): v["category"] for _, v in chunk if isinstance(v.get("category"), str)}
+        new_shelves = {v["shelf"].lower(): v["shelf"] for _, v in chunk if isinstance(v.get("shelf"), str)}
+        if dry_run:
+            # Nothing is written, so remember the labels with a placeholder id.
+            categories.update({slug: 0 for slug in new_categories})
+            shelves.update({key: 0 for key in new_shelves})
+        else:
+            if new_categories:
+                Category.objects.bulk_create(
+                    [Category(name=label[:120], slug=slug) for slug, label in new_categories.items()],
+                    ignore_conflicts=True,
+                )
+                for pk, name, slug in Category.objects.filter(slug__in=new_categories).values_list("id", "name", "slug"):
+                    categories[name.lower()] = categories[slug] = pk
+            if new_shelves:
+                Shelf.objects.bulk_create([Shelf(name=label) for label in new_shelves.values()], ignore_conflicts=True)
+                for pk, name in Shelf.objects.filter(name__in=new_shelves.values()).values_list("id", "name"):
+                    shelves[name.lower()] = pk
+        result.categories_created += len(new_categories)
+        result.shelves_created += len(new_shelves)
+
+        for _, values in chunk:
+            if isinstance(values.get("category"), str):
+                label = values["category"]
+                values["category"] = categories.get(label.lower(), categories.get(slugify(label)))
+            if isinstance(values.get("shelf"), str):
+                values["shelf"] = shelves.get(values["shelf"].lower())
+
+    @classmethod
+    def _write_chunk(cls, chunk, update_fields, categories, shelves, result, dry_run):
+        barcodes = [values["barcode"] for _, values in chunk]
+        # The INSERT half of an upsert must satisfy NOT NULL even when it ends
+        # up updating, so existing rows start from their stored values.
+        existing = {
+            row["barcode"]: row
+            for row in Product.objects.filter(barcode__in=barcodes).values("barcode", "promotion_discount", *PRODUCT_COLUMNS)
+        }
+
+        accepted = []
+        for row_number, values in chunk:
+            if values["barcode"] not in existing:
+                missing = [name for name in ("name", "price") if name not in values]
+                if missing:
+                    errors = [f"{name} is required for new products" for name in missing]
+                    result.errors.append(ImportRowError(row_number, values["barcode"], errors))
+                    continue
+            accepted.append((row_number, values))
+
+        with transaction.atomic():
+            cls._create_missing(accepted, categories, shelves, result, dry_run)
+            products = []
+            for _, values in accepted:
+                fields = dict(existing.get(values["barcode"], {}))
+                fields.update((IMPORT_FIELD_MAP.get(name, name), value) for name, value in values.items())
+                product = Product(**fields)
+                product.effective_price = product.discounted_price
+                product.stock_status = compute_stock_status(product.stock, product.reorder_point)
+                products.append(product)
+            if products and not dry_run:
+                Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=["barcode"],
+                    update_fields=update_fields,
+                )
+                if "stock_status" in update_fields:
+                    ids = dict(Product.objects.filter(barcode__in=barcodes).values_list("barcode", "id"))
+                    if "stock" in update_fields:
+                        StockLedgerService.record_balances(
+                            [
+                                (
+                                    ids[product.barcode],
+                                    product.stock - existing.get(product.barcode, {}).get("stock", 0),
+                                    product.stock,
+                                )
+                                for product in products
+                            ],
+                            StockMovement.IMPORT,
+                        )
+                    StockAlertService.sync(ids.values())
+
+        updated = sum(1 for _, values in accepted if values["barcode"] in existing)
+        result.updated += updated
+        result.created += len(accepted) - updated
+
+    @classmethod
+    def import_rows(cls, rows, columns, *, create_missing=False, dry_run=False, chunk_size=None):
+        """Upsert ``rows`` (dicts keyed by ``columns``); only columns present are written.
+
+        Row numbers in the result count data records from 1, header excluded.
+        Raises ``ValueError`` when the columns themselves are unusable.
+        """
+        columns = set(columns)
+        unknown = sorted(columns - set(IMPORT_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        if "barcode" not in columns:
+            raise ValueError("Imports need a barcode column")
+        update_fields = [IMPORT_FIELD_MAP.get(name, name) for name in IMPORT_COLUMNS if name in columns and name != "barcode"]
+        if not update_fields:
+            raise ValueError("Imports need at least one column besides barcode")
+        if Product.PRICE_FIELDS.intersection(update_fields):
+            update_fields.append("effective_price")
+        if Product.STOCK_FIELDS.intersection(update_fields):
+            update_fields.append("stock_status")
+
+        chunk_size = chunk_size or cls.chunk_size
+        categories, shelves = cls._load_maps()
+        result = ImportResult(dry_run=dry_run)
+        seen = {}
+        chunk = []
+        for row_number, row in enumerate(rows, start=1):
+            result.total_rows += 1
+            values, errors = cls._clean(row, columns, categories, shelves, create_missing)
+            barcode = values["barcode"]
+            if barcode in seen:
+                errors.append(f"duplicate barcode, first seen on row {seen[barcode]}")
+            elif barcode:
+                seen[barcode] = row_number
+            if errors:
+                result.errors.append(ImportRowError(row_number, barcode, errors))
+                continue
+            chunk.append((row_number, values))
+            if len(chunk) >= chunk_size:
+                cls._write_chunk(chunk, update_fields, categories, shelves, result, dry_run)
+                chunk = []
+        if chunk:
+            cls._write_chunk(chunk, update_fields, categories, shelves, result, dry_run)
+
+        result.errors.sort(key=lambda error: error.row)
+        if not dry_run and (result.created or result.updated):
+            CatalogCacheService.bump_on_commit()
+        return result
+
+    @classmethod
+    def import_file(cls, content, fmt, **options):
+        rows, columns = cls.parse(content, fmt)
+        return cls.import_rows(rows, columns, **options)
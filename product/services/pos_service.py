@@ -0,0 +1,524 @@
+"""Point-of-sale services: barcode lookups, counter sales and offline sale uploads."""
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from payment.models import Payment, StockDeductionLog
+from payment.utils import apply_stock_deduction, deduct_stock, order_quantities, stock_log_entries
+from product.models import Order, OrderItem, Product
+from product.services.catalog_cache import CatalogCacheService
+from supermarket.core.cache import L1Store
+
+POS_PRODUCT_COLUMNS = (
+    "id", "barcode", "name", "price", "discount_percentage", "promotion_discount",
+    "effective_price", "category__name", "shelf__name", "shelf__location",
+)
+
+# Cached for barcodes that match no active product, so repeated bad scans stay off the DB.
+_NOT_FOUND = object()
+
+# Largest quantity one scan line may carry; keeps line quantities and totals inside their columns.
+MAX_LINE_QUANTITY = 10000
+# Order totals are DECIMAL(12, 2); an uploaded line price may not fill them on its own.
+MAX_LINE_TOTAL = Decimal("1e9")
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def reset_barcode_cache():
+    """Drop the process-wide LRU (settings changes, tests)."""
+    global _store
+    with _store_lock:
+        _store = None
+
+
+class BarcodeLookupService:
+    """Exact-match barcode lookups for cashiers.
+
+    Hits are answered from a per-process LRU without touching the database.
+    Entries are tagged with the catalog version, so any product change made
+    by any worker (which bumps the version) retires them everywhere; saves
+    in this process also evict the barcode directly. Stock is deliberately
+    not part of the payload because it changes on every sale.
+    """
+
+    @staticmethod
+    def store():
+        global _store
+        with _store_lock:
+            if _store is None:
+                _store = L1Store(
+                    getattr(settings, "POS_BARCODE_CACHE_SIZE", 5000),
+                    getattr(settings, "POS_BARCODE_CACHE_TIMEOUT", 300),
+                )
+            return _store
+
+    @staticmethod
+    def normalize(code):
+        return (code or "").strip()
+
+    @staticmethod
+    def _payload(row):
+        return {
+            "id": row["id"],
+            "barcode": row["barcode"],
+            "name": row["name"],
+            "price": row["price"],
+            "discount_percentage": max(row["discount_percentage"], row["promotion_discount"]),
+            "unit_price": row["effective_price"],
+            "category": row["category__name"],
+            "shelf": (
+                {"name": row["shelf__name"], "location": row["shelf__location"]}
+                if row["shelf__name"] else None
+            ),
+        }
+
+    @classmethod
+    def lookup_many(cls, codes):
+        """Return ``{barcode: payload}`` for the active products among ``codes``."""
+        codes = list(dict.fromkeys(filter(None, map(cls.normalize, codes))))
+        store, version = cls.store(), CatalogCacheService.version()
+        found, misses = {}, []
+        for code in codes:
+            entry = store.get(code)
+            if entry is not None and entry[0] == version:
+                store.count("l1_hits")
+                if entry[1] is not _NOT_FOUND:
+                    found[code] = entry[1]
+            else:
+                store.count("misses")
+                misses.append(code)
+
+        if misses:
+            rows = Product.objects.filter(barcode__in=misses, is_active=True).values(*POS_PRODUCT_COLUMNS)
+            loaded = {row["barcode"]: cls._payload(row) for row in rows}
+            for code in misses:
+                store.set(code, (version, loaded.get(code, _NOT_FOUND)))
+            found.update(loaded)
+        return found
+
+    @classmethod
+    def lookup(cls, code):
+        code = cls.normalize(code)
+        return cls.lookup_many([code]).get(code)
+
+    @classmethod
+    def invalidate(cls, *codes):
+        store = cls.store()
+        for code in codes:
+            if code:
+                store.discard(cls.normalize(code))
+
+
+def parse_scanned_items(items):
+    """Turn ``[{"barcode": ..., "quantity": n}, ...]`` into ``{barcode: quantity}``.
+
+    Quantity defaults to 1 (one scan) and may be negative to take items off
+    the basket, up to ``MAX_LINE_QUANTITY`` either way. Raises ``ValueError``
+    on malformed input.
+    """
+    if not isinstance(items, list):
+        raise ValueError("items must be a list")
+    quantities = {}
+    for item in items:
+        code = item.get("barcode") if isinstance(item, dict) else None
+        code = BarcodeLookupService.normalize(code) if isinstance(code, str) else ""
+        if not code:
+            raise ValueError("Each item needs a barcode")
+        try:
+            quantity = int(item.get("quantity", 1))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Invalid quantity for {code}")
+        if abs(quantity) > MAX_LINE_QUANTITY:
+            raise ValueError(f"Quantity for {code} must be at most {MAX_LINE_QUANTITY}")
+        quantities[code] = quantities.get(code, 0) + quantity
+    return quantities
+
+
+class PosSaleService:
+    """Counter sales: a PENDING ``POS`` order built from scans, paid and deducted in one go.
+
+    Line prices are the effective price at scan time. Stock is only checked
+    and taken at checkout, with a single conditional ``UPDATE`` for the whole
+    basket, so an oversold basket fails as a unit and nothing is deducted.
+    """
+
+    @staticmethod
+    def _pending_sale(sale_id):
+        order = Order.objects.select_for_update().filter(id=sale_id, channel=Order.CHANNEL_POS).first()
+        if order is None:
+            raise Order.DoesNotExist(f"No POS sale {sale_id}")
+        if order.status != "PENDING":
+            raise ValueError(f"Sale is already {order.status.lower()}")
+        return order
+
+    @classmethod
+    def _scan(cls, order, quantities):
+        products = BarcodeLookupService.lookup_many(quantities)
+        unknown = sorted(set(quantities) - set(products))
+        if unknown:
+            raise ValueError(f"Unknown barcode(s): {', '.join(unknown)}")
+
+        lines = {item.product_id: item for item in order.items.all()}
+        created, changed, removed = [], [], []
+        for code, quantity in quantities.items():
+            product = products[code]
+            line = lines.get(product["id"])
+            if line is None:
+                if quantity > 0:
+                    line = OrderItem(order=order, product_id=product["id"], quantity=quantity, price=product["unit_price"])
+                    created.append(line)
+                    lines[product["id"]] = line
+                continue
+            line.quantity += quantity
+            if line.quantity > 0:
+                changed.append(line)
+            else:
+                removed.append(line.id)
+                del lines[product["id"]]
+
+        OrderItem.objects.bulk_create(created)
+        if changed:
+            OrderItem.objects.bulk_update(changed, ["quantity"])
+        if removed:
+            OrderItem.objects.filter(id__in=removed).delete()
+        order.total_price = sum((line.price * line.quantity for line in lines.values()), Decimal("0.00"))
+        order.save(update_fields=["total_price"])
+        return order
+
+    @classmethod
+    def open_sale(cls, cashier, items=None, customer_name="Walk-in"):
+        quantities = parse_scanned_items(items or [])
+        with transaction.atomic():
+            order = Order.objects.create(
+                customer_name=customer_name or "Walk-in",
+                channel=Order.CHANNEL_POS,
+                cashier=cashier,
+            )
+            if quantities:
+                cls._scan(order, quantities)
+        return order
+
+    @classmethod
+    def add_items(cls, sale_id, items):
+        quantities = parse_scanned_items(items)
+        with transaction.atomic():
+            return cls._scan(cls._pending_sale(sale_id), quantities)
+
+    @classmethod
+    def checkout(cls, sale_id, *, method, cashier=None, amount_tendered=None, mpesa_receipt_no=None):
+        """Take payment and deduct stock atomically; returns ``(order, payment, change_due)``.
+
+        M-Pesa sales are paid to the till by the customer and confirmed with
+        the receipt code from the confirmation SMS.
+        """
+        if method not in (Payment.METHOD_CASH, Payment.METHOD_MPESA):
+            raise ValueError("method must be CASH or MPESA")
+        with transaction.atomic():
+            order = cls._pending_sale(sale_id)
+            if not order.total_price:
+                raise ValueError("Sale has no items")
+
+            change_due = Decimal("0.00")
+            if method == Payment.METHOD_CASH:
+                try:
+                    tendered = Decimal(str(amount_tendered))
+                    if not tendered.is_finite():
+                        raise ValueError
+                    # Out-of-range amounts cannot be quantized to cents.
+                    tendered = tendered.quantize(Decimal("0.01"))
+                except (ArithmeticError, ValueError):
+                    raise ValueError("amount_tendered must be an amount for cash sales")
+                if tendered < order.total_price:
+                    raise ValueError("amount_tendered is less than the sale total")
+                change_due = tendered - order.total_price
+            elif not (mpesa_receipt_no or "").strip():
+                raise ValueError("mpesa_receipt_no is required for M-Pesa sales")
+
+            # The Payment post_save receiver marks the order PAID.
+            payment = Payment.objects.create(
+                order=order,
+                amount=order.total_price,
+                status=Payment.STATUS_PAID,
+                method=method,
+                mpesa_receipt_no=(mpesa_receipt_no or "").strip() or None,
+                transaction_date=timezone.now(),
+            )
+            apply_stock_deduction(order, payment=payment, user=cashier, source=StockDeductionLog.AUTO)
+        return order, payment, change_due
+
+    @staticmethod
+    def serialize(order, payment=None, change_due=None):
+        items = [
+            {
+                "barcode": barcode,
+                "name": name,
+                "quantity": quantity,
+                "unit_price": price,
+                "subtotal": price * quantity,
+            }
+            for barcode, name, quantity, price in order.items.order_by("id").values_list(
+                "product__barcode", "product__name", "quantity", "price"
+            )
+        ]
+        data = {
+            "id": order.id,
+            "status": order.status,
+            "channel": order.channel,
+            "total": order.total_price,
+            "items": items,
+        }
+        if payment is not None:
+            data["payment"] = {"id": payment.id, "method": payment.method, "amount": payment.amount}
+            data["change_due"] = change_due
+        return data
+
+
+@dataclass
+class OfflineSale:
+    reference: str
+    recorded_at: object
+    lines: list  # [(barcode, quantity, unit_price or None)]
+    method: str
+    mpesa_receipt_no: str = None
+    customer_name: str = "Walk-in"
+
+
+@dataclass
+class PosSyncResult:
+    accepted: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    conflicts: list = field(default_factory=list)
+    rejected: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "conflicts": self.conflicts,
+            "rejected": self.rejected,
+        }
+
+
+class PosSyncService:
+    """Ingest sales a till recorded while offline, many per request.
+
+    ``client_reference`` makes uploads idempotent: a sale already stored is
+    reported as a duplicate with its order id, so a till can resend a whole
+    batch after a timeout. Sales that would take stock below zero are
+    reported as conflicts (with the short lines) and not stored; everything
+    else is written with bulk inserts and one stock ``UPDATE`` per batch.
+    """
+
+    @staticmethod
+    def parse_sale(sale):
+        if not isinstance(sale, dict):
+            raise ValueError("Each sale must be an object")
+        reference = sale.get("client_reference")
+        if not isinstance(reference, str) or not 0 < len(reference.strip()) <= 64:
+            raise ValueError("client_reference must be a string of 1-64 characters")
+
+        recorded_at = timezone.now()
+        if sale.get("recorded_at"):
+            recorded_at = parse_datetime(str(sale["recorded_at"]))
+            if recorded_at is None:
+                raise ValueError("recorded_at must be an ISO 8601 datetime")
+            if timezone.is_naive(recorded_at):
+                recorded_at = timezone.make_aware(recorded_at)
+
+        items = sale.get("items")
+        if not isinstance(items, list) or not items:
+            raise ValueError("A sale needs at least one item")
+        lines = []
+        for item in items:
+            code = item.get("barcode") if isinstance(item, dict) else None
+            code = BarcodeLookupService.normalize(code) if isinstance(code, str) else ""
+            if not code:
+                raise ValueError("Each item needs a barcode")
+            try:
+                quantity = int(item.get("quantity", 1))
+                unit_price = item.get("unit_price")
+                if unit_price is not None:
+                    unit_price = Decimal(str(unit_price))
+                    if not unit_price.is_finite():
+                        raise ValueError
+                    unit_price = unit_price.quantize(Decimal("0.01"))
+            except (TypeError, ValueError, ArithmeticError):
+                raise ValueError(f"Invalid quantity or unit_price for {code}")
+            if not 1 <= quantity <= MAX_LINE_QUANTITY or (
+                unit_price is not None and not 0 <= unit_price * quantity < MAX_LINE_TOTAL
+            ):
+                raise ValueError(f"Invalid quantity or unit_price for {code}")
+            lines.append((code, quantity, unit_price))
+
+        payment = sale.get("payment") if isinstance(sale.get("payment"), dict) else {}
+        method = payment.get("method") or Payment.METHOD_CASH
+        if not isinstance(method, str) or method.upper() not in (Payment.METHOD_CASH, Payment.METHOD_MPESA):
+            raise ValueError("payment.method must be CASH or MPESA")
+        method = method.upper()
+        receipt = payment.get("mpesa_receipt_no") or ""
+        if not isinstance(receipt, str):
+            raise ValueError("payment.mpesa_receipt_no must be a string")
+        receipt = receipt.strip() or None
+        if method == Payment.METHOD_MPESA and not receipt:
+            raise ValueError("payment.mpesa_receipt_no is required for M-Pesa sales")
+        customer_name = sale.get("customer_name") or "Walk-in"
+        if not isinstance(customer_name, str):
+            raise ValueError("customer_name must be a string")
+
+        return OfflineSale(
+            reference=reference.strip(),
+            recorded_at=recorded_at,
+            lines=lines,
+            method=method,
+            mpesa_receipt_no=receipt,
+            customer_name=customer_name[:255],
+        )
+
+    @classmethod
+    def _validated(cls, sales, result):
+        parsed, seen = [], set()
+        for sale in sales:
+            reference = sale.get("client_reference") if isinstance(sale, dict) else None
+            try:
+                offline = cls.parse_sale(sale)
+            except ValueError as exc:
+                result.rejected.append({"client_reference": reference, "error": str(exc)})
+                continue
+            if offline.reference in seen:
+                result.rejected.append({"client_reference": offline.reference, "error": "Repeated in this batch"})
+                continue
+            seen.add(offline.reference)
+            parsed.append(offline)
+        return parsed
+
+    @classmethod
+    def ingest(cls, sales, cashier=None):
+        """Store a batch of offline sales in one transaction; returns a ``PosSyncResult``.
+
+        Raises ``InsufficientStock`` or ``IntegrityError`` only if a concurrent
+        writer got in between; the batch is then rolled back whole and can be
+        resent as is.
+        """
+        result = PosSyncResult()
+        parsed = cls._validated(sales, result)
+
+        stored = dict(
+            Order.objects.filter(client_reference__in=[sale.reference for sale in parsed])
+            .values_list("client_reference", "id")
+        )
+        products = BarcodeLookupService.lookup_many(code for sale in parsed for code, _, _ in sale.lines)
+        pending = []
+        for sale in parsed:
+            unknown = sorted({code for code, _, _ in sale.lines} - set(products))
+            if sale.reference in stored:
+                result.duplicates.append({"client_reference": sale.reference, "order_id": stored[sale.reference]})
+            elif unknown:
+                result.rejected.append({"client_reference": sale.reference, "error": f"Unknown barcode(s): {', '.join(unknown)}"})
+            else:
+                pending.append(sale)
+        if not pending:
+            return result
+
+        with transaction.atomic():
+            product_ids = {products[code]["id"] for sale in pending for code, _, _ in sale.lines}
+            stock = dict(Product.objects.select_for_update().filter(id__in=product_ids).values_list("id", "stock"))
+
+            # Allocate stock in the order the sales happened; later sales take the conflicts.
+            accepted = []
+            for sale in sorted(pending, key=lambda sale: sale.recorded_at):
+                needed = order_quantities((products[code]["id"], quantity) for code, quantity, _ in sale.lines)
+                shortages = [
+                    {"barcode": code, "requested": needed[products[code]["id"]], "available": stock.get(products[code]["id"], 0)}
+                    for code in dict.fromkeys(code for code, _, _ in sale.lines)
+                    if stock.get(products[code]["id"], 0) < needed[products[code]["id"]]
+                ]
+                if shortages:
+                    result.conflicts.append({"client_reference": sale.reference, "shortages": shortages})
+                    continue
+                for product_id, quantity in needed.items():
+                    stock[product_id] -= quantity
+                accepted.append(sale)
+            if not accepted:
+                return result
+
+            cls._store(accepted, products, cashier, result)
+        return result
+
+    @staticmethod
+    def _store(accepted, products, cashier, result):
+        lines_by_sale = [
+            [
+                (products[code]["id"], quantity, products[code]["unit_price"] if unit_price is None else unit_price)
+                for code, quantity, unit_price in sale.lines
+            ]
+            for sale in accepted
+        ]
+        orders = [
+            Order(
+                customer_name=sale.customer_name,
+                total_price=sum((price * quantity for _, quantity, price in lines), Decimal("0.00")),
+                status="PAID",
+                channel=Order.CHANNEL_POS,
+                cashier=cashier,
+                client_reference=sale.reference,
+                stock_deducted=True,
+            )
+            for sale, lines in zip(accepted, lines_by_sale)
+        ]
+        Order.objects.bulk_create(orders)
+        # auto_now_add stamped the upload time; keep when the sale actually happened.
+        for order, sale in zip(orders, accepted):
+            order.created_at = sale.recorded_at
+        Order.objects.bulk_update(orders, ["created_at"])
+
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+            for order, lines in zip(orders, lines_by_sale)
+            for product_id, quantity, price in lines
+        ])
+        payments = [
+            Payment(
+                order=order,
+                amount=order.total_price,
+                status=Payment.STATUS_PAID,
+                method=sale.method,
+                mpesa_receipt_no=sale.mpesa_receipt_no,
+                transaction_date=sale.recorded_at,
+            )
+            for order, sale in zip(orders, accepted)
+        ]
+        Payment.objects.bulk_create(payments)
+
+        quantities = [(product_id, quantity) for lines in lines_by_sale for product_id, quantity, _ in lines]
+        deduct_stock(
+            order_quantities(quantities),
+            user=cashier,
+            lines=[
+                (product_id, quantity, order)
+                for order, lines in zip(orders, lines_by_sale)
+                for product_id, quantity, _ in lines
+            ],
+            note="offline sync",
+        )
+        StockDeductionLog.objects.bulk_create([
+            entry
+            for order, payment, lines in zip(orders, payments, lines_by_sale)
+            for entry in stock_log_entries(
+                order,
+                [(product_id, quantity) for product_id, quantity, _ in lines],
+                payment,
+                cashier,
+                StockDeductionLog.DEDUCT,
+                StockDeductionLog.AUTO,
+            )
+        ])
+        result.accepted.extend(
+            {"client_reference": order.client_reference, "order_id": order.id} for order in orders
+        )
@@ -1,14 +1,135 @@
+import asyncio
+import math
+from dataclasses import dataclass
+
 from django.core.paginator import Paginator
 
 from product.repositories import ProductRepository
 from product.services.image_service import UnsplashImageService
 
 
+# Output field -> (model columns it reads, catalog annotation it needs).
+PRODUCT_FIELD_SOURCES = {
+    "id": ((), None),
+    "name": (("name",), None),
+    "description": (("description",), None),
+    "price": (("price",), None),
+    "discount_percentage": (("discount_percentage", "promotion_discount"), None),
+    "discounted_price": (("effective_price",), None),
+    "stock": (("stock",), None),
+    "barcode": (("barcode",), None),
+    "category": (("category__name",), None),
+    "avg_rating": ((), "avg_rating"),
+    "review_count": ((), "review_count"),
+    "popularity": ((), "popularity"),
+    "image_url": (("image", "name", "category__name"), None),
+    "image_source": (("image", "name", "category__name"), None),
+}
+
+INCLUDE_SOURCES = {
+    "shelf": ("shelf__name", "shelf__location"),
+    "reviews": (),
+}
+
+LIST_FIELDS = tuple(PRODUCT_FIELD_SOURCES)
+DETAIL_FIELDS = (
+    "id", "name", "description", "price", "discount_percentage", "discounted_price",
+    "stock", "barcode", "category", "image_url",
+)
+
+SORT_ANNOTATIONS = {"popularity": "popularity", "rating": "avg_rating"}
+
+
+def _shelf_payload(product):
+    if product.shelf is None:
+        return None
+    return {"name": product.shelf.name, "location": product.shelf.location}
+
+
+FIELD_GETTERS = {
+    "id": lambda product, image: product.id,
+    "name": lambda product, image: product.name,
+    "description": lambda product, image: product.description,
+    "price": lambda product, image: product.price,
+    "discount_percentage": lambda product, image: product.active_discount,
+    "discounted_price": lambda product, image: product.effective_price,
+    "stock": lambda product, image: product.stock,
+    "barcode": lambda product, image: product.barcode,
+    "category": lambda product, image: product.category.name if product.category else None,
+    "avg_rating": lambda product, image: round(float(getattr(product, "avg_rating", 0) or 0), 2),
+    "review_count": lambda product, image: int(getattr(product, "review_count", 0) or 0),
+    "popularity": lambda product, image: int(getattr(product, "popularity", 0) or 0),
+    "image_url": lambda product, image: image.image_url,
+    "image_source": lambda product, image: image.source,
+}
+
+
+@dataclass(frozen=True)
+class ProductFieldset:
+    """Fields and related sections a client asked for via ``fields=``/``include=``.
+
+    Drives which columns are loaded, which aggregates are annotated and
+    whether images are resolved, not just which keys are returned.
+    """
+
+    fields: tuple
+    includes: frozenset = frozenset()
+
+    @classmethod
+    def parse(cls, fields_param=None, include_param=None, *, allowed_fields=LIST_FIELDS,
+              allowed_includes=("shelf",), default_includes=()):
+        """Raise ``ValueError`` naming any unknown field or include."""
+        fields = tuple(allowed_fields)
+        if fields_param:
+            requested = {name.strip() for name in fields_param.split(",") if name.strip()}
+            unknown = sorted(requested - set(allowed_fields))
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            fields = tuple(name for name in allowed_fields if name in requested)
+
+        if include_param:
+            includes = {name.strip() for name in include_param.split(",") if name.strip()}
+            unknown = sorted(includes - set(allowed_includes))
+            if unknown:
+                raise ValueError(f"Unknown include: {', '.join(unknown)}")
+        else:
+            # Explicit field selection opts out of the default extras.
+            includes = set() if fields_param else set(default_includes)
+        return cls(fields, frozenset(includes))
+
+    def columns(self):
+        columns = set()
+        for name in self.fields:
+            columns.update(PRODUCT_FIELD_SOURCES[name][0])
+        for name in self.includes:
+            columns.update(INCLUDE_SOURCES[name])
+        return sorted(columns)
+
+    def annotations(self, sort=None):
+        names = {PRODUCT_FIELD_SOURCES[name][1] for name in self.fields} - {None}
+        if sort in SORT_ANNOTATIONS:
+            names.add(SORT_ANNOTATIONS[sort])
+        return sorted(names)
+
+    @property
+    def needs_image(self):
+        return "image_url" in self.fields or "image_source" in self.fields
+
+    def serialize(self, product, image=None):
+        payload = {name: FIELD_GETTERS[name](product, image) for name in self.fields}
+        if "shelf" in self.includes:
+            payload["shelf"] = _shelf_payload(product)
+        return payload
+
+
+FULL_LIST_FIELDSET = ProductFieldset(LIST_FIELDS)
+
+
 class ProductCatalogService:
     """Application service for catalog/search/listing logic."""
 
     @staticmethod
-    def list_products(*, search=None, category=None, min_price=None, max_price=None, sort="newest", page=1, page_size=12, stock_only=False):
+    def _catalog_queryset(*, search, category, min_price, max_price, sort, stock_only, fieldset):
         queryset = ProductRepository.filtered_queryset(
             search=search,
             category_slug=category,
@@ -16,45 +137,90 @@ class ProductCatalogService:
             max_price=max_price,
             stock_only=stock_only,
         )
-        queryset = ProductRepository.with_catalog_annotations(queryset)
-        queryset = ProductRepository.apply_sorting(queryset, sort)
+        queryset = ProductRepository.with_columns(queryset, fieldset.columns())
+        queryset = ProductRepository.with_catalog_annotations(queryset, fieldset.annotations(sort))
+        return ProductRepository.apply_sorting(queryset, sort)
+
+    @staticmethod
+    def _image_args(product):
+        return {
+            "product_name": product.name,
+            "category_name": (product.category.name if product.category else None),
+            "uploaded_url": (product.image.url if product.image else None),
+        }
+
+    @staticmethod
+    def _serialize(product, image, fieldset=FULL_LIST_FIELDSET):
+        return fieldset.serialize(product, image)
+
+    @staticmethod
+    def _pagination(number, pages, total):
+        return {
+            "page": number,
+            "pages": pages,
+            "total": total,
+            "has_next": number < pages,
+            "has_previous": number > 1,
+        }
+
+    @classmethod
+    def list_products(cls, *, search=None, category=None, min_price=None, max_price=None, sort="newest", page=1, page_size=12, stock_only=False, fieldset=FULL_LIST_FIELDSET):
+        queryset = cls._catalog_queryset(
+            search=search,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            stock_only=stock_only,
+            fieldset=fieldset,
+        )
 
         paginator = Paginator(queryset, page_size)
         page_obj = paginator.get_page(page)
 
         products = []
         for product in page_obj.object_list:
-            image = UnsplashImageService.get_image_for_product(
-                product_name=product.name,
-                category_name=(product.category.name if product.category else None),
-                uploaded_url=(product.image.url if product.image else None),
-            )
-            products.append(
-                {
-                    "id": product.id,
-                    "name": product.name,
-                    "description": product.description,
-                    "price": float(product.price),
-                    "discount_percentage": int(product.discount_percentage or 0),
-                    "discounted_price": float(product.discounted_price),
-                    "stock": product.stock,
-                    "barcode": product.barcode,
-                    "category": product.category.name if product.category else None,
-                    "avg_rating": round(float(getattr(product, "avg_rating", 0) or 0), 2),
-                    "review_count": int(getattr(product, "review_count", 0) or 0),
-                    "popularity": int(getattr(product, "popularity", 0) or 0),
-                    "image_url": image.image_url,
-                    "image_source": image.source,
-                }
-            )
+            image = None
+            if fieldset.needs_image:
+                image = UnsplashImageService.get_image_for_product(**cls._image_args(product))
+            products.append(cls._serialize(product, image, fieldset))
 
         return {
             "items": products,
-            "pagination": {
-                "page": page_obj.number,
-                "pages": paginator.num_pages,
-                "total": paginator.count,
-                "has_next": page_obj.has_next(),
-                "has_previous": page_obj.has_previous(),
-            },
+            "pagination": cls._pagination(page_obj.number, paginator.num_pages, paginator.count),
+        }
+
+    @classmethod
+    async def alist_products(cls, *, search=None, category=None, min_price=None, max_price=None, sort="newest", page=1, page_size=12, stock_only=False, fieldset=FULL_LIST_FIELDSET):
+        """Async ``list_products``: same payload, with image lookups run concurrently."""
+        queryset = cls._catalog_queryset(
+            search=search,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            stock_only=stock_only,
+            fieldset=fieldset,
+        )
+
+        # Same clamping as Paginator.get_page().
+        total = await queryset.acount()
+        pages = max(1, math.ceil(total / page_size))
+        try:
+            number = min(max(int(page), 1), pages)
+        except (TypeError, ValueError):
+            number = 1
+        offset = (number - 1) * page_size
+
+        rows = [product async for product in queryset[offset:offset + page_size]]
+        if fieldset.needs_image:
+            images = await asyncio.gather(
+                *(UnsplashImageService.aget_image_for_product(**cls._image_args(product)) for product in rows)
+            )
+        else:
+            images = [None] * len(rows)
+
+        return {
+            "items": [cls._serialize(product, image, fieldset) for product, image in zip(rows, images)],
+            "pagination": cls._pagination(number, pages, total),
         }
@@ -0,0 +1,102 @@
+"""Scheduled promotions applied and reverted with set-based UPDATEs."""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from product.models import Product, Promotion, effective_price_expression
+from product.services.catalog_cache import CatalogCacheService
+
+
+@dataclass
+class PromotionSyncResult:
+    applied: list = field(default_factory=list)
+    reverted: list = field(default_factory=list)
+    products_updated: int = 0
+
+
+class PromotionService:
+    """Keep ``Product.promotion_discount``/``effective_price`` in step with running promotions.
+
+    Every write is one ``UPDATE`` per promotion over its whole scope, and the
+    catalog cache version is bumped once per sync rather than per product.
+    """
+
+    @staticmethod
+    def running(now=None):
+        now = now or timezone.now()
+        return Promotion.objects.filter(is_active=True, starts_at__lte=now, ends_at__gt=now)
+
+    @staticmethod
+    def scope(promotion):
+        scope = Q(promotions=promotion)
+        if promotion.category_id:
+            scope |= Q(category_id=promotion.category_id)
+        if promotion.shelf_id:
+            scope |= Q(shelf_id=promotion.shelf_id)
+        return scope
+
+    @staticmethod
+    def _in_scope(promotion):
+        # Subquery rather than a join so the M2M branch cannot duplicate rows in UPDATE.
+        return Product.objects.filter(PromotionService.scope(promotion)).values("id")
+
+    @staticmethod
+    def revert_products(queryset):
+        return queryset.update(
+            active_promotion=None,
+            promotion_discount=0,
+            effective_price=effective_price_expression(F("discount_percentage")),
+        )
+
+    @classmethod
+    def apply(cls, promotion):
+        """Give every product in scope this promotion unless a larger one already applies."""
+        pct = promotion.discount_percentage
+        return Product.objects.filter(id__in=cls._in_scope(promotion), promotion_discount__lt=pct).update(
+            active_promotion=promotion,
+            promotion_discount=pct,
+            effective_price=effective_price_expression(Greatest(F("discount_percentage"), Value(pct))),
+        )
+
+    @classmethod
+    def revert(cls, promotion_ids):
+        return cls.revert_products(Product.objects.filter(active_promotion_id__in=list(promotion_ids)))
+
+    @classmethod
+    def sync(cls, now=None):
+        """Revert ended promotions and (re)apply running ones; safe to run every minute."""
+        now = now or timezone.now()
+        result = PromotionSyncResult()
+        with transaction.atomic():
+            running = list(cls.running(now).order_by("-discount_percentage", "id"))
+            ended = Promotion.objects.filter(applied_at__isnull=False, reverted_at__isnull=True).exclude(
+                id__in=[promotion.id for promotion in running]
+            )
+            result.reverted = list(ended.values_list("id", flat=True))
+            if result.reverted:
+                result.products_updated += cls.revert(result.reverted)
+                Promotion.objects.filter(id__in=result.reverted).update(reverted_at=now)
+
+            # Products that left a running promotion's scope (moved category,
+            # removed from the list) or whose promotion was edited fall back
+            # before anything is re-applied.
+            for promotion in running:
+                result.products_updated += cls.revert_products(
+                    Product.objects.filter(active_promotion=promotion).filter(
+                        ~Q(id__in=cls._in_scope(promotion)) | ~Q(promotion_discount=promotion.discount_percentage)
+                    )
+                )
+            for promotion in running:
+                result.products_updated += cls.apply(promotion)
+
+            fresh = [p.id for p in running if p.applied_at is None or p.reverted_at is not None]
+            if fresh:
+                Promotion.objects.filter(id__in=fresh).update(applied_at=now, reverted_at=None)
+            result.applied = fresh
+
+            if result.products_updated:
+                CatalogCacheService.bump_on_commit()
+        return result
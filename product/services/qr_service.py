@@ -0,0 +1,88 @@
+"""Verification QR codes for receipts and checkout, generated once and cached."""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+class _LRUCache:
+    """Small thread-safe LRU used as the in-process QR image tier."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class VerifyQRService:
+    """Serve the verify-link QR code for an order from memory, then disk.
+
+    The PNG only depends on the encoded verify URL, so it is rendered once
+    per (order, URL) and reused by every receipt and checkout page. Callers
+    build the URL from ``settings.BASE_URL`` so there is one per order.
+    """
+
+    storage_dir = "qr"
+    memory_cache = _LRUCache(max_entries=512)
+
+    @staticmethod
+    def fingerprint(order_id, verify_url):
+        return hashlib.sha1(f"{order_id}:{verify_url}".encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def storage_path(cls, order_id, fingerprint):
+        return f"{cls.storage_dir}/order-{order_id}-{fingerprint}.png"
+
+    @staticmethod
+    def render(verify_url):
+        import segno
+
+        buffer = io.BytesIO()
+        segno.make(verify_url, error="m").save(buffer, kind="png", scale=6, border=2)
+        return buffer.getvalue()
+
+    @classmethod
+    def get_png(cls, order_id, verify_url, exists=None):
+        """Return ``(png_bytes, fingerprint)``, or ``None`` if ``exists()`` rejects the order.
+
+        ``exists`` is only consulted on a full miss, so hot QR codes cost no
+        database query.
+        """
+        fingerprint = cls.fingerprint(order_id, verify_url)
+        content = cls.memory_cache.get(fingerprint)
+        if content is not None:
+            return content, fingerprint
+
+        path = cls.storage_path(order_id, fingerprint)
+        if default_storage.exists(path):
+            with default_storage.open(path, "rb") as stored:
+                content = stored.read()
+        else:
+            if exists is not None and not exists():
+                return None
+            content = cls.render(verify_url)
+            default_storage.save(path, ContentFile(content))
+
+        cls.memory_cache.set(fingerprint, content)
+        return content, fingerprint
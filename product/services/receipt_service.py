@@ -0,0 +1,125 @@
+"""Receipt PDF rendering with a per-order rendered-file cache."""
+import io
+from dataclasses import dataclass
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import prefetch_related_objects
+
+from product.models import Order
+
+
+# Orders in these states no longer change, so their receipt PDF can be stored.
+CACHEABLE_RECEIPT_STATUSES = {"PAID", "SHIPPED", "DELIVERED", "REFUNDED", "CANCELLED", "FAILED"}
+
+# Bump when the PDF layout changes so stored receipts and client ETags expire.
+RECEIPT_LAYOUT_VERSION = 1
+
+
+@dataclass
+class RenderedReceipt:
+    content: bytes
+    filename: str
+    etag: str
+
+
+class ReceiptPDFService:
+    """Render receipt PDFs once per (order, status) and reuse the stored bytes."""
+
+    storage_dir = "receipts"
+
+    @staticmethod
+    def order_queryset():
+        return Order.objects.select_related("customer").prefetch_related("items__product")
+
+    @staticmethod
+    def is_cacheable(order):
+        return order.status in CACHEABLE_RECEIPT_STATUSES
+
+    @classmethod
+    def etag(cls, order):
+        return f'"receipt-{order.id}-{order.status.lower()}-v{RECEIPT_LAYOUT_VERSION}"'
+
+    @classmethod
+    def storage_path(cls, order):
+        return f"{cls.storage_dir}/{order.id}/{order.status.lower()}-v{RECEIPT_LAYOUT_VERSION}.pdf"
+
+    @staticmethod
+    def render(order):
+        """Draw the receipt with ReportLab; expects items/products prefetched."""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        buffer = io.BytesIO()
+        p = canvas.Canvas(buffer, pagesize=A4)
+
+        # Header
+        p.setFont("Helvetica-Bold", 16)
+        p.drawString(100, 800, f"Receipt - Order #{order.id}")
+
+        p.setFont("Helvetica", 12)
+        p.drawString(100, 780, f"Date: {order.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        p.drawString(100, 765, f"Customer: {order.customer.phone_number if order.customer else 'N/A'}")
+        p.drawString(100, 750, f"Status: {order.status}")
+
+        # Table header
+        y = 720
+        p.setFont("Helvetica-Bold", 12)
+        p.drawString(100, y, "Product")
+        p.drawString(250, y, "Qty")
+        p.drawString(300, y, "Price")
+        p.drawString(380, y, "Subtotal")
+
+        # Table rows
+        p.setFont("Helvetica", 12)
+        y -= 20
+        for item in order.items.all():
+            if y < 60:
+                p.showPage()
+                p.setFont("Helvetica", 12)
+                y = 800
+            p.drawString(100, y, item.product.name)
+            p.drawString(250, y, str(item.quantity))
+            p.drawString(300, y, str(item.price))
+            p.drawString(380, y, str(item.subtotal()))
+            y -= 20
+
+        # Total
+        y -= 20
+        p.setFont("Helvetica-Bold", 12)
+        p.drawString(100, y, f"Total: {order.total_price}")
+
+        p.showPage()
+        p.save()
+        return buffer.getvalue()
+
+    @classmethod
+    def get_pdf(cls, order):
+        """Return the receipt for ``order``, rendering and storing it on a miss."""
+        path = cls.storage_path(order)
+        cacheable = cls.is_cacheable(order)
+
+        content = None
+        if cacheable and default_storage.exists(path):
+            with default_storage.open(path, "rb") as stored:
+                content = stored.read()
+
+        if content is None:
+            prefetch_related_objects([order], "items__product")
+            content = cls.render(order)
+            if cacheable and not default_storage.exists(path):
+                default_storage.save(path, ContentFile(content))
+
+        return RenderedReceipt(content=content, filename=f"receipt_{order.id}.pdf", etag=cls.etag(order))
+
+    @classmethod
+    def orders_between(cls, start_date, end_date):
+        return (
+            cls.order_queryset()
+            .filter(
+                created_at__date__gte=start_date,
+                created_at__date__lte=end_date,
+                status__in=CACHEABLE_RECEIPT_STATUSES,
+            )
+            .order_by("id")
+        )
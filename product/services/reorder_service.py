@@ -0,0 +1,149 @@
+"""Reorder suggestions from demand forecasts and recent sales velocity."""
+import math
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, PositiveIntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+
+from payment.models import StockDeductionLog
+from product.models import Product, stock_status_expression
+from product.services.catalog_cache import CatalogCacheService
+from product.services.forecast_service import DemandForecastService, day_window, net_units, pivot_daily
+from product.services.stock_alert_service import StockAlertService
+from supermarket.core.db_router import replica_reads
+
+
+@dataclass
+class ReorderSuggestion:
+    product_id: int
+    name: str
+    stock: int
+    reorder_point: int
+    daily_velocity: float
+    days_of_cover: float
+    suggested_reorder_point: int
+    suggested_quantity: int
+
+    def as_dict(self):
+        return {
+            "product_id": self.product_id,
+            "name": self.name,
+            "stock": self.stock,
+            "reorder_point": self.reorder_point,
+            "daily_velocity": round(self.daily_velocity, 2),
+            "days_of_cover": round(self.days_of_cover, 1),
+            "suggested_reorder_point": self.suggested_reorder_point,
+            "suggested_quantity": self.suggested_quantity,
+        }
+
+
+class ReorderService:
+    """Reorder points and order quantities from expected daily demand.
+
+    Demand comes from the nightly ``DemandForecast`` where one is fresh and
+    otherwise from ``StockDeductionLog`` sales velocity: net units sold
+    (deductions minus rollbacks) grouped per product and day in SQL, laid
+    out as a products x days matrix and reduced column-wise with numpy. The
+    cost is a few queries whatever the size of the catalog.
+
+    reorder point = velocity x lead time + service factor x sigma x sqrt(lead time)
+    order quantity = velocity x (lead time + cover) + safety stock - stock on hand
+    """
+
+    @staticmethod
+    def daily_sales(days, now=None):
+        """Products x days ``DataFrame`` of net units deducted, oldest day first, zero-filled."""
+        start, calendar = day_window(days, now)
+        rows = (
+            StockDeductionLog.objects.filter(created_at__gte=start)
+            .annotate(day=TruncDate("created_at"))
+            .values("product_id", "day")
+            .annotate(units=Sum(net_units()))
+            .order_by()
+            .values_list("product_id", "day", "units")
+        )
+        return pivot_daily(list(rows), calendar)
+
+    @classmethod
+    @replica_reads()
+    def suggestions(cls, *, days=None, lead_time_days=None, cover_days=None, service_factor=None,
+                    only_needed=True, use_forecasts=True, now=None):
+        """Suggestions for active products with demand, most urgent first.
+
+        Products with a fresh ``DemandForecast`` plan with its smoothed demand
+        and error spread; the rest fall back to their recent sales.
+        ``only_needed`` drops products whose stock already covers the target.
+        """
+        import numpy as np
+        import pandas as pd
+
+        days = days or settings.REORDER_LOOKBACK_DAYS
+        lead_time = lead_time_days if lead_time_days is not None else settings.REORDER_LEAD_TIME_DAYS
+        cover = cover_days if cover_days is not None else settings.REORDER_COVER_DAYS
+        factor = service_factor if service_factor is not None else settings.REORDER_SERVICE_FACTOR
+
+        sales = cls.daily_sales(days, now)
+        # A rollback lands on the day it happened, not the day of the sale; a
+        # net-negative day is noise, not negative demand.
+        units = np.clip(sales.to_numpy(), 0, None)
+        demand = pd.DataFrame({"velocity": units.mean(axis=1), "sigma": units.std(axis=1)}, index=sales.index)
+        if use_forecasts:
+            forecasts = pd.DataFrame.from_records(
+                list(DemandForecastService.fresh(now).values_list("product_id", "daily_demand", "demand_std")),
+                columns=["product_id", "velocity", "sigma"],
+            ).set_index("product_id")
+            demand = forecasts.combine_first(demand)
+        demand = demand[demand["velocity"] > 0]
+        if demand.empty:
+            return []
+
+        safety = factor * demand["sigma"] * math.sqrt(lead_time)
+        demand["reorder_point_new"] = np.ceil(demand["velocity"] * lead_time + safety)
+        demand["target"] = np.ceil(demand["velocity"] * (lead_time + cover) + safety)
+
+        products = pd.DataFrame.from_records(
+            list(Product.objects.filter(id__in=demand.index.tolist(), is_active=True)
+                 .values_list("id", "name", "stock", "reorder_point")),
+            columns=["product_id", "name", "stock", "reorder_point"],
+        ).set_index("product_id")
+        frame = products.join(demand, how="inner")
+        frame["quantity"] = np.clip(frame["target"] - frame["stock"], 0, None)
+        frame["cover"] = frame["stock"] / frame["velocity"]
+        if only_needed:
+            frame = frame[frame["quantity"] > 0]
+        frame = frame.sort_values(["cover", "quantity"], ascending=[True, False])
+
+        return [
+            ReorderSuggestion(
+                product_id=int(product_id),
+                name=row.name,
+                stock=int(row.stock),
+                reorder_point=int(row.reorder_point),
+                daily_velocity=float(row.velocity),
+                days_of_cover=float(row.cover),
+                suggested_reorder_point=int(row.reorder_point_new),
+                suggested_quantity=int(row.quantity),
+            )
+            for product_id, row in zip(frame.index, frame.itertuples(index=False))
+        ]
+
+    @staticmethod
+    def apply(suggestions):
+        """Store the suggested reorder points in one ``UPDATE`` and re-derive stock status."""
+        points = {s.product_id: s.suggested_reorder_point for s in suggestions}
+        if not points:
+            return 0
+        new_point = Case(
+            *(When(id=product_id, then=Value(point)) for product_id, point in points.items()),
+            output_field=PositiveIntegerField(),
+        )
+        with transaction.atomic():
+            updated = Product.objects.filter(id__in=points).update(
+                reorder_point=new_point,
+                stock_status=stock_status_expression(reorder_point=new_point),
+            )
+            StockAlertService.sync(points)
+        CatalogCacheService.bump_on_commit()
+        return updated
@@ -0,0 +1,132 @@
+"""Low-stock alerts driven by the materialized ``Product.stock_status``."""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+from django.db.models import OuterRef, Q, QuerySet, Subquery
+from django.utils import timezone
+
+from product.models import IN_STOCK, LOW_STOCK, OUT_OF_STOCK, LowStockAlert, Product
+
+
+@dataclass
+class StockAlertSyncResult:
+    opened: int = 0
+    escalated: int = 0
+    resolved: int = 0
+    # Products among those synced that are now sold out, alerted or not.
+    out_of_stock: int = 0
+
+    @property
+    def status_changed(self):
+        """Whether some product crossed its reorder point or sold out."""
+        return bool(self.opened or self.escalated or self.resolved or self.out_of_stock)
+
+
+class StockAlertService:
+    """Open, escalate and resolve ``LowStockAlert`` rows for products a stock write touched.
+
+    Callers pass the ids they just wrote, so nothing ever scans the catalog:
+    one ``SELECT`` over those ids, plus a write only when a product crossed
+    its reorder point. Nobody is notified here; ``send_digest`` batches open
+    alerts into one message on a schedule.
+    """
+
+    @staticmethod
+    def sync(product_ids, now=None):
+        if not isinstance(product_ids, QuerySet):
+            product_ids = list(product_ids)
+            if not product_ids:
+                return StockAlertSyncResult()
+        now = now or timezone.now()
+        open_alerts = LowStockAlert.objects.filter(resolved_at__isnull=True)
+        rows = (
+            Product.objects.filter(id__in=product_ids)
+            .annotate(open_status=Subquery(open_alerts.filter(product=OuterRef("pk")).values("status")[:1]))
+            .filter(~Q(stock_status=IN_STOCK) | Q(open_status__isnull=False))
+            .values_list("id", "stock_status", "stock", "reorder_point", "open_status")
+        )
+
+        result = StockAlertSyncResult()
+        new_alerts, escalated, resolved = [], [], []
+        for product_id, status, stock, reorder_point, open_status in rows:
+            if status == OUT_OF_STOCK:
+                result.out_of_stock += 1
+            if open_status is None:
+                new_alerts.append(
+                    LowStockAlert(product_id=product_id, status=status, stock=stock, reorder_point=reorder_point)
+                )
+            elif status == IN_STOCK:
+                resolved.append(product_id)
+            elif status == OUT_OF_STOCK and open_status == LOW_STOCK:
+                escalated.append(product_id)
+
+        if new_alerts:
+            # A concurrent writer may have opened the same alert; the partial
+            # unique constraint keeps one.
+            LowStockAlert.objects.bulk_create(new_alerts, ignore_conflicts=True)
+            result.opened = len(new_alerts)
+        if escalated:
+            # Selling out after a low-stock warning is news again.
+            result.escalated = open_alerts.filter(product_id__in=escalated).update(
+                status=OUT_OF_STOCK, stock=0, notified_at=None
+            )
+        if resolved:
+            result.resolved = open_alerts.filter(product_id__in=resolved).update(resolved_at=now)
+        return result
+
+    @staticmethod
+    def digest_recipients():
+        recipients = list(settings.LOW_STOCK_DIGEST_RECIPIENTS)
+        if recipients:
+            return recipients
+        return list(
+            User.objects.filter(Q(is_superuser=True) | Q(groups__name="Owner"), is_active=True)
+            .exclude(email="")
+            .values_list("email", flat=True)
+            .distinct()
+        )
+
+    @staticmethod
+    def digest_message(alerts):
+        sections = []
+        for status, title in ((OUT_OF_STOCK, "Out of stock"), (LOW_STOCK, "Low stock")):
+            lines = [
+                f"- {alert.product.name} [{alert.product.barcode or 'no barcode'}]: "
+                f"{alert.product.stock} left, reorder point {alert.product.reorder_point}"
+                for alert in alerts
+                if alert.status == status
+            ]
+            if lines:
+                sections.append(f"{title} ({len(lines)}):\n" + "\n".join(lines))
+        return "\n\n".join(sections)
+
+    @classmethod
+    def send_digest(cls, now=None):
+        """Email every open, un-notified alert in one message; return how many it listed.
+
+        Alerts are only marked notified once the mail went out, so a failed
+        send is retried by the next run.
+        """
+        now = now or timezone.now()
+        alerts = list(
+            LowStockAlert.objects.filter(notified_at__isnull=True, resolved_at__isnull=True)
+            .select_related("product")
+            .order_by("product__stock", "product__name")
+        )
+        if not alerts:
+            return 0
+        recipients = cls.digest_recipients()
+        if not recipients:
+            return 0
+
+        send_mail(
+            f"Low stock: {len(alerts)} product(s) need reordering",
+            cls.digest_message(alerts),
+            settings.DEFAULT_FROM_EMAIL,
+            recipients,
+            fail_silently=False,
+        )
+        LowStockAlert.objects.filter(id__in=[alert.id for alert in alerts]).update(notified_at=now)
+        return len(alerts)
@@ -0,0 +1,220 @@
+"""Append-only stock movement ledger, nightly snapshots and point-in-time stock."""
+import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from product.models import Product, StockMovement, StockSnapshot
+
+
+_movement_context = ContextVar("stock_movement_context", default=None)
+
+
+@contextmanager
+def stock_movement_context(reason=None, *, user=None, order=None, note=""):
+    """Describe stock changes made through ``Product.save()`` inside the block.
+
+    ``reason`` defaults to opening balance for new products, restock for
+    increases and adjustment for decreases.
+    """
+    token = _movement_context.set({"reason": reason, "user": user, "order": order, "note": note})
+    try:
+        yield
+    finally:
+        _movement_context.reset(token)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class StockLedgerService:
+    """Write the ``StockMovement`` ledger and answer historical stock questions from it.
+
+    Every movement stores the balance it left, and ``snapshot`` stores each
+    product's closing balance per day, so "stock at X" reads one snapshot day
+    plus at most a day of movements, and reports are range scans on
+    ``created_at`` rather than replays of the whole history.
+    """
+
+    snapshot_batch_size = 2000
+
+    @staticmethod
+    def record(entries, reason, *, user=None, note=""):
+        """Append movements for stock changes already written in this transaction.
+
+        ``entries`` are ``(product_id, signed quantity, order or None)`` in the
+        order they happened; balances are worked back from the current stock,
+        which the caller's UPDATE holds locked.
+        """
+        entries = [entry for entry in entries if entry[1]]
+        if not entries:
+            return []
+        balances = dict(Product.objects.filter(id__in={entry[0] for entry in entries}).values_list("id", "stock"))
+        movements = []
+        for product_id, quantity, order in reversed(entries):
+            movements.append(StockMovement(
+                product_id=product_id,
+                reason=reason,
+                quantity=quantity,
+                balance=balances[product_id],
+                order=order,
+                user=user,
+                note=note,
+            ))
+            balances[product_id] -= quantity
+        movements.reverse()
+        return StockMovement.objects.bulk_create(movements)
+
+    @staticmethod
+    def record_balances(rows, reason, *, user=None, note=""):
+        """Append movements whose resulting stock is already known: ``(product_id, signed quantity, balance)``."""
+        return StockMovement.objects.bulk_create([
+            StockMovement(product_id=product_id, reason=reason, quantity=quantity, balance=balance, user=user, note=note)
+            for product_id, quantity, balance in rows
+            if quantity
+        ])
+
+    @staticmethod
+    def record_save(product, created=False):
+        """Ledger entry for a ``save()`` that changed ``product.stock``; see ``stock_movement_context``."""
+        change = getattr(product, "stock_change", 0)
+        if not change:
+            return None
+        context = _movement_context.get() or {}
+        reason = context.get("reason")
+        if reason is None:
+            if created:
+                reason = StockMovement.OPENING
+            else:
+                reason = StockMovement.RESTOCK if change > 0 else StockMovement.ADJUSTMENT
+        user = context.get("user")
+        return StockMovement.objects.using(product._state.db).create(
+            product=product,
+            reason=reason,
+            quantity=change,
+            balance=int(product.stock),
+            order=context.get("order"),
+            user=user if getattr(user, "is_authenticated", False) else None,
+            note=context.get("note", ""),
+        )
+
+    @classmethod
+    def snapshot(cls, day=None):
+        """Store every product's closing stock for ``day`` (default yesterday); safe to re-run."""
+        day = day or timezone.localdate() - datetime.timedelta(days=1)
+        cutoff = _day_start(day + datetime.timedelta(days=1))
+        closing = (
+            Product.objects.annotate(
+                closing=Subquery(
+                    StockMovement.objects.filter(product=OuterRef("pk"), created_at__lt=cutoff)
+                    .order_by("-created_at", "-id")
+                    .values("balance")[:1]
+                )
+            )
+            .filter(closing__isnull=False)
+            .values_list("id", "closing")
+        )
+        written = 0
+        batch = []
+        with transaction.atomic():
+            for product_id, stock in closing.iterator(chunk_size=cls.snapshot_batch_size):
+                batch.append(StockSnapshot(product_id=product_id, day=day, stock=stock))
+                if len(batch) >= cls.snapshot_batch_size:
+                    written += cls._write_snapshots(batch)
+                    batch = []
+            written += cls._write_snapshots(batch)
+        return written
+
+    @staticmethod
+    def _write_snapshots(batch):
+        StockSnapshot.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=["product", "day"], update_fields=["stock"]
+        )
+        return len(batch)
+
+    @staticmethod
+    def stock_at(at, product_ids=None):
+        """``{product_id: stock}`` at ``at``: a datetime, or a date meaning its close.
+
+        Starts from the snapshot of the day before (of ``at`` itself for a
+        date) and adds that day's later movements; products without that
+        snapshot fall back to their last movement's balance. Products with
+        no ledger entry by then are left out.
+        """
+        if isinstance(at, datetime.datetime):
+            cutoff = at
+            base_day = timezone.localdate(at) - datetime.timedelta(days=1)
+        else:
+            base_day = at
+            cutoff = _day_start(at + datetime.timedelta(days=1)) - datetime.timedelta(microseconds=1)
+
+        snapshots = StockSnapshot.objects.filter(day=base_day)
+        movements = StockMovement.objects.filter(
+            created_at__gte=_day_start(base_day + datetime.timedelta(days=1)), created_at__lte=cutoff
+        )
+        products = Product.objects.all()
+        if product_ids is not None:
+            product_ids = list(product_ids)
+            snapshots = snapshots.filter(product_id__in=product_ids)
+            movements = movements.filter(product_id__in=product_ids)
+            products = products.filter(id__in=product_ids)
+
+        stock = dict(snapshots.values_list("product_id", "stock"))
+        for product_id, change in movements.values("product_id").annotate(change=Sum("quantity")).values_list("product_id", "change"):
+            # Products without a snapshot are covered by the fallback below.
+            if product_id in stock:
+                stock[product_id] += change
+
+        fallback = (
+            products.filter(~Exists(StockSnapshot.objects.filter(product=OuterRef("pk"), day=base_day)))
+            .annotate(
+                balance=Subquery(
+                    StockMovement.objects.filter(product=OuterRef("pk"), created_at__lte=cutoff)
+                    .order_by("-created_at", "-id")
+                    .values("balance")[:1]
+                )
+            )
+            .filter(balance__isnull=False)
+            .values_list("id", "balance")
+        )
+        stock.update(fallback)
+        return stock
+
+    @classmethod
+    def movement_report(cls, start, end, product_ids=None):
+        """Opening stock, movements per reason and closing stock per product for ``start``..``end`` (dates).
+
+        Covers products that moved in the range, or ``product_ids`` if given.
+        """
+        movements = StockMovement.objects.filter(
+            created_at__gte=_day_start(start), created_at__lt=_day_start(end + datetime.timedelta(days=1))
+        )
+        if product_ids is not None:
+            movements = movements.filter(product_id__in=list(product_ids))
+        totals = {}
+        for product_id, reason, quantity in (
+            movements.values("product_id", "reason").annotate(total=Sum("quantity")).values_list("product_id", "reason", "total")
+        ):
+            totals.setdefault(product_id, {})[reason] = quantity
+
+        ids = list(product_ids) if product_ids is not None else list(totals)
+        opening = cls.stock_at(start - datetime.timedelta(days=1), ids)
+        closing = cls.stock_at(end, ids)
+        names = dict(Product.objects.filter(id__in=ids).values_list("id", "name"))
+        reasons = [reason for reason, _ in StockMovement.REASON_CHOICES]
+        return [
+            {
+                "product_id": product_id,
+                "name": names.get(product_id),
+                "opening": opening.get(product_id, 0),
+                "movements": {reason: totals.get(product_id, {}).get(reason, 0) for reason in reasons},
+                "net": sum(totals.get(product_id, {}).values()),
+                "closing": closing.get(product_id, 0),
+            }
+            for product_id in sorted(ids, key=lambda pk: names.get(pk) or "")
+            if product_id in names
+        ]
@@ -1,10 +1,56 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import Group
 
+from .models import IN_STOCK, Category, Product, ProductReview, Promotion
+from .services.catalog_cache import CatalogCacheService
+from .services.pos_service import BarcodeLookupService
+from .services.stock_alert_service import StockAlertService
+from .services.stock_ledger import StockLedgerService
+
 
 @receiver(post_migrate)
 def create_default_groups(sender, **kwargs):
     """Ensure baseline RBAC groups exist after migrations."""
     for group_name in ("Cashier", "Owner"):
         Group.objects.get_or_create(name=group_name)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def bump_catalog_version(sender, **kwargs):
+    """Invalidate every cached catalog response and listing."""
+    CatalogCacheService.bump_on_commit()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def evict_pos_barcode(sender, instance, **kwargs):
+    BarcodeLookupService.invalidate(instance.barcode)
+
+
+@receiver(post_save, sender=Product)
+def record_stock_movement(sender, instance, created, **kwargs):
+    StockLedgerService.record_save(instance, created)
+
+
+@receiver(post_save, sender=Product)
+def sync_low_stock_alert(sender, instance, created, update_fields=None, **kwargs):
+    if created and instance.stock_status == IN_STOCK:
+        return
+    if update_fields is not None and not Product.STOCK_FIELDS.intersection(update_fields):
+        return
+    StockAlertService.sync([instance.id])
+
+
+@receiver(pre_delete, sender=Promotion)
+def revert_deleted_promotion(sender, instance, **kwargs):
+    """Restore prices before the FK to the promotion is nulled out."""
+    from .services.promotion_service import PromotionService
+
+    if PromotionService.revert([instance.id]):
+        CatalogCacheService.bump_on_commit()
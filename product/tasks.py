@@ -0,0 +1,66 @@
+import logging
+
+from celery import shared_task
+
+from product.services.archive_service import OrderArchiveService
+from product.services.forecast_service import DemandForecastService
+from product.services.promotion_service import PromotionService
+from product.services.stock_ledger import StockLedgerService
+from product.services.stock_alert_service import StockAlertService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def sync_promotions_task():
+    """Apply promotions that have started and revert those that have ended."""
+    result = PromotionService.sync()
+    if result.applied or result.reverted:
+        logger.info(
+            "Promotions applied=%s reverted=%s, %s product row(s) updated",
+            result.applied, result.reverted, result.products_updated,
+        )
+    return result.products_updated
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def send_low_stock_digest_task(self):
+    """Email one digest of products that crossed their reorder point since the last run."""
+    try:
+        sent = StockAlertService.send_digest()
+    except Exception as exc:
+        logger.error("Low-stock digest failed: %s", exc)
+        raise self.retry(exc=exc)
+    if sent:
+        logger.info("Low-stock digest listed %s product(s)", sent)
+    return sent
+
+
+@shared_task
+def forecast_demand_task():
+    """Refit every product's demand forecast from order history (nightly)."""
+    result = DemandForecastService.run()
+    logger.info(
+        "Demand forecasts stored for %s product(s), %s removed, in %.1fs",
+        result.products, result.removed, result.seconds,
+    )
+    return result.products
+
+
+@shared_task
+def snapshot_stock_task():
+    """Store yesterday's closing stock for every product from the movement ledger."""
+    written = StockLedgerService.snapshot()
+    logger.info("Stock snapshot written for %s product(s)", written)
+    return written
+
+
+@shared_task
+def archive_orders_task():
+    """Move closed orders past ARCHIVE_ORDERS_AFTER_DAYS into the archive tables (nightly)."""
+    result = OrderArchiveService.run()
+    logger.info(
+        "Archived %s order(s) in %s chunk(s) in %.1fs%s",
+        result.orders, result.chunks, result.seconds, ", more remain" if result.remaining else "",
+    )
+    return result.orders
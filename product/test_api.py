@@ -1,9 +1,17 @@
 import json
+from decimal import Decimal
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from product.models import Category, Product, Customer
+from payment.models import StockDeductionLog
+from payment.utils import deduct_stock
+from product.models import Category, Customer, Order, Product
+from product.services.catalog_cache import CatalogCacheService
+from product.services.pos_service import BarcodeLookupService, reset_barcode_cache
+from supermarket.core.jwt_auth import create_access_token
 
 
 @override_settings(UNSPLASH_ACCESS_KEY="")
@@ -11,7 +19,7 @@ class ProductApiTests(TestCase):
     def setUp(self):
         self.client = Client()
         self.category = Category.objects.create(name="Groceries", slug="groceries")
-        Product.objects.create(name="Milk", category=self.category, price=120, stock=15)
+        self.product = Product.objects.create(name="Milk", category=self.category, price=120, stock=15)
 
     def test_product_list_api(self):
         res = self.client.get(reverse("product_api:product_list_api"))
@@ -20,6 +28,89 @@ class ProductApiTests(TestCase):
         self.assertTrue(payload["ok"])
         self.assertEqual(payload["data"]["pagination"]["total"], 1)
 
+    async def test_catalog_endpoints_under_asgi(self):
+        res = await self.async_client.get(reverse("product_api:product_list_api"), {"page": 99})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("X-RateLimit-Remaining", res)
+        self.assertEqual(res.json()["data"]["pagination"], {
+            "page": 1, "pages": 1, "total": 1, "has_next": False, "has_previous": False,
+        })
+        self.assertEqual(res.json()["data"]["items"][0]["image_source"], "fallback")
+
+        detail = await self.async_client.get(reverse("product_api:product_detail_api", args=[self.product.id]))
+        self.assertEqual(detail.json()["data"]["name"], "Milk")
+        missing = await self.async_client.get(reverse("product_api:product_detail_api", args=[self.product.id + 1]))
+        self.assertEqual(missing.status_code, 404)
+
+        categories = await self.async_client.get(reverse("product_api:category_list_api"))
+        self.assertEqual(categories.json()["data"]["items"][0]["slug"], "groceries")
+
+    def test_fields_and_include_parameters(self):
+        res = self.client.get(reverse("product_api:product_list_api"), {"fields": "id,name,image_url"})
+        self.assertEqual(set(res.json()["data"]["items"][0]), {"id", "name", "image_url"})
+        self.assertEqual(self.client.get(reverse("product_api:product_list_api"), {"fields": "cost"}).status_code, 400)
+
+        detail_url = reverse("product_api:product_detail_api", args=[self.product.id])
+        self.assertIn("reviews", self.client.get(detail_url).json()["data"])
+        compact = self.client.get(detail_url, {"fields": "id,price"}).json()["data"]
+        self.assertEqual(set(compact), {"id", "price"})
+        with_reviews = self.client.get(detail_url, {"fields": "id", "include": "reviews,shelf"}).json()["data"]
+        self.assertEqual(with_reviews, {"id": self.product.id, "shelf": None, "reviews": []})
+
+
+@override_settings(UNSPLASH_ACCESS_KEY="")
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name="Bread", price=60, stock=10)
+        self.url = reverse("product_api:product_list_api")
+
+    def test_anonymous_responses_are_cached_and_revalidated(self):
+        first = self.client.get(self.url, {"sort": "name", "page": "1", "utm": "x"})
+        self.assertEqual(first["Cache-Control"], "public, max-age=60")
+        self.assertIn("Last-Modified", first)
+
+        with self.assertNumQueries(0):
+            again = self.client.get(self.url, {"page": "1", "sort": "name"})
+        self.assertEqual(again.content, first.content)
+
+        not_modified = self.client.get(self.url, {"sort": "name", "page": "1"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_catalog_change_bumps_version(self):
+        first = self.client.get(self.url)
+        self.product.name = "Brown bread"
+        self.product.save()
+        second = self.client.get(self.url)
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertContains(second, "Brown bread")
+
+    def test_authenticated_requests_bypass_cache(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer anything")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_storefront_listing_is_cached_but_page_is_rendered(self):
+        self.client.get(reverse("product:product_list"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("product:product_list"))
+        self.assertContains(response, "Bread")
+
+    def test_storefront_stock_filter_follows_set_based_deductions(self):
+        low_stock = reverse("product:product_list") + "?stock_filter=low_stock"
+        self.assertNotContains(self.client.get(low_stock), "Bread")
+        # 10 -> 4 crosses the default reorder point of 5 without selling out.
+        deduct_stock({self.product.id: 6})
+        self.assertContains(self.client.get(low_stock), "Bread")
+
+    def test_storefront_pagination_is_rebuilt_from_the_cached_listing(self):
+        Product.objects.bulk_create([Product(name=f"Item {n}", price=10, stock=10) for n in range(13)])
+        CatalogCacheService.bump()
+        self.client.get(reverse("product:product_list"), {"page": "2"})
+        with self.assertNumQueries(0):
+            page = self.client.get(reverse("product:product_list"), {"page": "2"}).context["products"]
+        self.assertEqual((page.number, page.paginator.count, page.paginator.num_pages, len(page)), (2, 14, 2, 2))
+
 
 @override_settings(UNSPLASH_ACCESS_KEY="")
 class AuthAndOrderApiTests(TestCase):
@@ -57,3 +148,171 @@ class AuthAndOrderApiTests(TestCase):
         )
         self.assertEqual(res.status_code, 201)
         self.assertTrue(res.json()["ok"])
+
+
+class PosBarcodeApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_barcode_cache()
+        self.product = Product.objects.create(
+            name="Milk", barcode="6001", price=120, discount_percentage=10, stock=4,
+            category=Category.objects.create(name="Dairy", slug="dairy"),
+        )
+        Product.objects.create(name="Old stock", barcode="6002", price=50, is_active=False)
+        staff = User.objects.create_user("cashier", password="pass12345", is_staff=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(staff)}"}
+
+    def test_lookup_is_cached_until_the_product_changes(self):
+        url = reverse("product_api:pos_barcode_lookup_api", args=["6001"])
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        first = self.client.get(url, **self.auth).json()["data"]
+        self.assertEqual((first["name"], first["unit_price"], first["category"]), ("Milk", 108.0, "Dairy"))
+        with self.assertNumQueries(0):
+            self.assertEqual(BarcodeLookupService.lookup("6001")["id"], self.product.id)
+
+        self.product.price = 200
+        self.product.save()
+        self.assertEqual(self.client.get(url, **self.auth).json()["data"]["unit_price"], 180.0)
+        missing = reverse("product_api:pos_barcode_lookup_api", args=["6002"])
+        self.assertEqual(self.client.get(missing, **self.auth).status_code, 404)
+
+    def test_batch_lookup(self):
+        url = reverse("product_api:pos_barcode_batch_api")
+        body = json.dumps({"barcodes": ["6001", " 6001 ", "6002", "nope"]})
+        data = self.client.post(url, data=body, content_type="application/json", **self.auth).json()["data"]
+        self.assertEqual(list(data["items"]), ["6001"])
+        self.assertEqual(data["missing"], ["6002", "nope"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(set(BarcodeLookupService.lookup_many(["6001", "6002", "nope"])), {"6001"})
+        bad = self.client.post(url, data=json.dumps({"barcodes": "6001"}), content_type="application/json", **self.auth)
+        self.assertEqual(bad.status_code, 400)
+
+
+class PosSaleApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_barcode_cache()
+        Product.objects.bulk_create([
+            Product(name=f"Item {n}", barcode=f"70{n:02d}", price=10 + n, effective_price=10 + n, stock=3)
+            for n in range(40)
+        ])
+        staff = User.objects.create_user("till1", password="pass12345", is_staff=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(staff)}"}
+
+    def _post(self, name, body, *args):
+        url = reverse(f"product_api:{name}", args=args)
+        return self.client.post(url, data=json.dumps(body), content_type="application/json", **self.auth)
+
+    def test_forty_item_basket_in_a_handful_of_queries(self):
+        items = [{"barcode": f"70{n:02d}", "quantity": 2} for n in range(40)]
+        sale = self._post("pos_sale_open_api", {"items": items})
+        self.assertEqual(sale.status_code, 201)
+        sale = sale.json()["data"]
+        self.assertEqual((len(sale["items"]), sale["total"]), (40, 2360.0))
+
+        # 14 statements plus savepoints: the stock UPDATE, the ledger balance
+        # read and INSERT, the low-stock alert INSERT and the log INSERT each
+        # cover all 40 lines.
+        with self.assertNumQueries(19):
+            res = self._post("pos_sale_checkout_api", {"method": "cash", "amount_tendered": 2500}, sale["id"])
+        data = res.json()["data"]
+        self.assertEqual((data["status"], data["change_due"], data["payment"]["method"]), ("PAID", 140.0, "CASH"))
+        self.assertEqual(set(Product.objects.values_list("stock", flat=True)), {1})
+        order = Order.objects.get(id=sale["id"])
+        self.assertEqual((order.channel, order.cashier.username), (Order.CHANNEL_POS, "till1"))
+
+        again = self._post("pos_sale_checkout_api", {"method": "CASH", "amount_tendered": 2500}, sale["id"])
+        self.assertEqual(again.status_code, 400)
+
+    def test_scans_adjust_the_basket_and_oversold_sales_fail_whole(self):
+        sale_id = self._post("pos_sale_open_api", {"items": [{"barcode": "7000"}]}).json()["data"]["id"]
+        res = self._post("pos_sale_items_api", {"items": [{"barcode": "7000", "quantity": 3}, {"barcode": "7001"}]}, sale_id)
+        self.assertEqual([item["quantity"] for item in res.json()["data"]["items"]], [4, 1])
+        self.assertEqual(self._post("pos_sale_items_api", {"items": [{"barcode": "nope"}]}, sale_id).status_code, 400)
+
+        res = self._post("pos_sale_checkout_api", {"method": "MPESA", "mpesa_receipt_no": "QWE123"}, sale_id)
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.json()["errors"][0]["available"], 3)
+        self.assertEqual(Product.objects.get(barcode="7001").stock, 3)
+        self.assertEqual(Order.objects.get(id=sale_id).status, "PENDING")
+
+        self._post("pos_sale_items_api", {"items": [{"barcode": "7000", "quantity": -1}]}, sale_id)
+        res = self._post("pos_sale_checkout_api", {"method": "MPESA", "mpesa_receipt_no": "QWE123"}, sale_id)
+        self.assertEqual(res.json()["data"]["status"], "PAID")
+        self.assertEqual(self._post("pos_sale_items_api", {"items": []}, sale_id + 1).status_code, 404)
+
+    def test_malformed_scans_and_tenders_are_rejected_before_anything_is_paid(self):
+        for items in ([{"barcode": 7000}], [{"barcode": "7000", "quantity": 10**30}]):
+            self.assertEqual(self._post("pos_sale_open_api", {"items": items}).status_code, 400)
+
+        sale_id = self._post("pos_sale_open_api", {"items": [{"barcode": "7000"}]}).json()["data"]["id"]
+        for tendered in ("Infinity", "NaN", "1e999999999", "-Infinity", None):
+            res = self._post("pos_sale_checkout_api", {"method": "CASH", "amount_tendered": tendered}, sale_id)
+            self.assertEqual(res.status_code, 400, tendered)
+        self.assertEqual(self._post("pos_sale_checkout_api", {"method": 5}, sale_id).status_code, 400)
+        self.assertEqual(Order.objects.get(id=sale_id).status, "PENDING")
+        self.assertEqual(Product.objects.get(barcode="7000").stock, 3)
+
+
+class PosSyncApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_barcode_cache()
+        self.milk = Product.objects.create(name="Milk", barcode="8001", price=100, stock=3)
+        self.bread = Product.objects.create(name="Bread", barcode="8002", price=60, stock=10)
+        staff = User.objects.create_user("till2", password="pass12345", is_staff=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(staff)}"}
+        self.url = reverse("product_api:pos_sync_api")
+
+    def _sync(self, sales):
+        return self.client.post(self.url, data=json.dumps({"sales": sales}), content_type="application/json", **self.auth)
+
+    def test_batch_is_stored_idempotently_with_conflicts_reported(self):
+        sales = [
+            {"client_reference": "till2-1", "recorded_at": "2026-10-01T09:00:00+03:00",
+             "items": [{"barcode": "8001", "quantity": 2}, {"barcode": "8002", "unit_price": "55.00"}]},
+            {"client_reference": "till2-2", "recorded_at": "2026-10-01T09:05:00+03:00",
+             "items": [{"barcode": "8001", "quantity": 2}]},
+            {"client_reference": "till2-3", "items": [{"barcode": "8002"}],
+             "payment": {"method": "MPESA", "mpesa_receipt_no": "SK12AB"}},
+            {"client_reference": "till2-4", "items": [{"barcode": "9999"}]},
+            {"client_reference": "till2-5", "items": []},
+        ]
+        data = self._sync(sales).json()["data"]
+        self.assertEqual([sale["client_reference"] for sale in data["accepted"]], ["till2-1", "till2-3"])
+        self.assertEqual(data["conflicts"], [{
+            "client_reference": "till2-2", "shortages": [{"barcode": "8001", "requested": 2, "available": 1}],
+        }])
+        self.assertEqual(sorted(sale["client_reference"] for sale in data["rejected"]), ["till2-4", "till2-5"])
+
+        first = Order.objects.get(client_reference="till2-1")
+        self.assertEqual((first.total_price, first.status, first.created_at.day), (Decimal("255.00"), "PAID", 1))
+        self.assertEqual(dict(Product.objects.values_list("barcode", "stock")), {"8001": 1, "8002": 8})
+        self.assertEqual(StockDeductionLog.objects.count(), 3)
+
+        # Resending the same batch stores nothing twice.
+        again = self._sync(sales[:1]).json()["data"]
+        self.assertEqual(again["duplicates"], [{"client_reference": "till2-1", "order_id": first.id}])
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_malformed_sales_are_rejected_without_dropping_the_batch(self):
+        bad = [
+            {"items": [{"barcode": 8001}]},
+            {"items": [{"barcode": "8001"}], "payment": {"method": 1}},
+            {"items": [{"barcode": "8001"}], "payment": {"method": "MPESA", "mpesa_receipt_no": 42}},
+            {"items": [{"barcode": "8001"}], "customer_name": 7},
+            {"items": [{"barcode": "8001", "unit_price": "NaN"}]},
+            {"items": [{"barcode": "8001", "unit_price": "1e999999999"}]},
+            {"items": [{"barcode": "8001", "quantity": 10**30}]},
+        ]
+        sales = [dict(sale, client_reference=f"bad-{n}") for n, sale in enumerate(bad)]
+        sales.append({"client_reference": "good", "items": [{"barcode": "8002"}]})
+
+        res = self._sync(sales)
+        self.assertEqual(res.status_code, 200)
+        data = res.json()["data"]
+        self.assertEqual([sale["client_reference"] for sale in data["accepted"]], ["good"])
+        self.assertEqual([sale["client_reference"] for sale in data["rejected"]], [f"bad-{n}" for n in range(len(bad))])
+        self.assertEqual(dict(Product.objects.values_list("barcode", "stock")), {"8001": 3, "8002": 9})
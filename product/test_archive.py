@@ -0,0 +1,148 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+
+from owner.services import OwnerAnalyticsService, OwnerQueryService
+from payment.models import ArchivedPaymentRollup, Payment, StockDeductionLog
+from payment.utils import apply_stock_deduction
+from product.models import (
+    ArchivedOrder, ArchivedSalesRollup, Category, Customer, Order, OrderItem, Product, StockMovement, VerificationLog,
+)
+from product.services.archive_service import OrderArchiveService
+
+
+class OrderArchiveServiceTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.category = Category.objects.create(name="Dairy", slug="dairy")
+        self.milk = Product.objects.create(name="Milk", category=self.category, price=Decimal("100"), stock=50)
+        self.tea = Product.objects.create(name="Tea", price=Decimal("40"), stock=50)
+        self.customer = Customer.objects.create(name="Amina", phone_number="0700000001")
+
+    def _order(self, days_ago, status="PAID", lines=((None, 1),), payment=Payment.STATUS_PAID):
+        order = Order.objects.create(customer=self.customer, customer_name="Amina")
+        total = Decimal("0")
+        for product, quantity in lines:
+            product = product or self.milk
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+            total += product.price * quantity
+        if payment:
+            Payment.objects.create(order=order, amount=total, status=payment, method=Payment.METHOD_CASH)
+        Order.objects.filter(id=order.id).update(
+            status=status, total_price=total, created_at=self.now - timedelta(days=days_ago)
+        )
+        Payment.objects.filter(order=order).update(created_at=self.now - timedelta(days=days_ago))
+        order.refresh_from_db()
+        return order
+
+    def test_closed_old_orders_move_with_their_rows(self):
+        old = self._order(400, lines=((self.milk, 2), (self.tea, 1)))
+        apply_stock_deduction(old)
+        VerificationLog.objects.create(order=old, ip_address="10.0.0.1")
+        movement_ids = list(StockMovement.objects.filter(order=old).values_list("id", flat=True))
+        pending = self._order(400, status="PENDING", payment=None)
+        recent = self._order(10)
+
+        result = OrderArchiveService.run(now=self.now)
+
+        self.assertEqual((result.orders, result.items, result.payments, result.stock_deductions, result.verifications), (1, 2, 1, 2, 1))
+        self.assertEqual(set(Order.objects.values_list("id", flat=True)), {pending.id, recent.id})
+        self.assertFalse(OrderItem.objects.filter(order_id=old.id).exists())
+        self.assertFalse(StockDeductionLog.objects.exists())
+        self.assertFalse(VerificationLog.objects.exists())
+        self.assertEqual(Payment.objects.count(), 1)
+        # The ledger keeps its rows; only the link to the deleted order goes.
+        self.assertEqual(StockMovement.objects.filter(id__in=movement_ids, order__isnull=True).count(), 2)
+
+        archived = ArchivedOrder.objects.get()
+        self.assertEqual((archived.order_id, archived.customer, archived.status, archived.total_price), (old.id, self.customer, "PAID", Decimal("240.00")))
+        document = archived.document()
+        self.assertEqual(document["order"]["id"], old.id)
+        self.assertEqual(sorted((item["product_id"], item["quantity"]) for item in document["items"]), [(self.milk.id, 2), (self.tea.id, 1)])
+        self.assertEqual(document["payments"][0]["amount"], "240.00")
+        self.assertEqual(len(document["stock_deductions"]), 2)
+        self.assertEqual(document["verifications"][0]["ip_address"], "10.0.0.1")
+        self.assertEqual(sorted(document["stock_movements"]), sorted(movement_ids))
+
+        day = timezone.localdate(old.created_at)
+        self.assertEqual(
+            sorted(ArchivedSalesRollup.objects.values_list("day", "product_id", "units", "revenue")),
+            sorted([(day, self.milk.id, 2, Decimal("200.00")), (day, self.tea.id, 1, Decimal("40.00"))]),
+        )
+        self.assertEqual(
+            list(ArchivedPaymentRollup.objects.values_list("day", "status", "method", "payments", "amount")),
+            [(day, "PAID", "CASH", 1, Decimal("240.00"))],
+        )
+
+    def test_runs_in_bounded_chunks_and_adds_to_rollups(self):
+        orders = [self._order(400) for _ in range(3)]
+        self._order(400, status="CANCELLED", payment=Payment.STATUS_FAILED)
+
+        first = OrderArchiveService.run(now=self.now, chunk_size=2, max_chunks=1)
+        self.assertEqual((first.orders, first.chunks, first.remaining), (2, 1, True))
+        rest = OrderArchiveService.run(now=self.now, chunk_size=2, max_chunks=0)
+        self.assertEqual((rest.orders, rest.chunks, rest.remaining), (2, 1, False))
+
+        self.assertEqual(ArchivedOrder.objects.count(), 4)
+        # Three paid orders of one milk each on the same day, across two chunks.
+        rollup = ArchivedSalesRollup.objects.get()
+        self.assertEqual((rollup.day, rollup.units, rollup.revenue), (timezone.localdate(orders[0].created_at), 3, Decimal("300.00")))
+        self.assertEqual(
+            dict(ArchivedPaymentRollup.objects.values_list("status", "payments")), {"PAID": 3, "FAILED": 1}
+        )
+
+    def test_overlapping_runs_add_to_the_rollups(self):
+        first = self._order(400, lines=((self.milk, 1),))
+        second = self._order(400, lines=((self.milk, 2),))
+        cutoff = OrderArchiveService.cutoff(now=self.now)
+        OrderArchiveService.archive_chunk([first.id], cutoff, now=self.now)
+
+        bulk_create = ArchivedSalesRollup.objects.bulk_create
+
+        def other_run_commits_first(*args, **kwargs):
+            ArchivedSalesRollup.objects.update(units=F("units") + 5, revenue=F("revenue") + Decimal("500"))
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(ArchivedSalesRollup.objects, "bulk_create", side_effect=other_run_commits_first):
+            OrderArchiveService.archive_chunk([second.id], cutoff, now=self.now)
+
+        rollup = ArchivedSalesRollup.objects.get()
+        self.assertEqual((rollup.units, rollup.revenue), (8, Decimal("800.00")))
+
+    def test_refuses_a_cutoff_inside_live_reporting_windows(self):
+        with self.assertRaises(ValueError):
+            OrderArchiveService.run(days=OrderArchiveService.minimum_age_days() - 1)
+
+    def test_owner_reports_keep_their_totals(self):
+        self._order(400, lines=((self.milk, 3),))
+        self._order(390, lines=((self.tea, 5),))
+        self._order(380, status="REFUNDED", payment=Payment.STATUS_REFUNDED)
+        self._order(5, lines=((self.milk, 1), (self.tea, 1)))
+        self._order(2, status="PENDING", payment=Payment.STATUS_PENDING)
+
+        def reports():
+            overview = OwnerAnalyticsService.overview_metrics(period="all")
+            charts = OwnerAnalyticsService.chart_payloads()
+            return (
+                {key: overview[key] for key in ("total_orders", "paid_orders", "pending_orders", "failed_orders", "revenue")},
+                sum(OwnerAnalyticsService.sales_trend(days=500)["totals"]),
+                OwnerAnalyticsService.top_products(limit=5),
+                OwnerAnalyticsService.revenue_by_category(limit=5),
+                charts["payment_split"],
+                OwnerQueryService.customer_queryset().get().total_orders,
+            )
+
+        before = reports()
+        self.assertEqual(OrderArchiveService.run(now=self.now).orders, 3)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(reports(), before)
+        self.assertEqual(before[0]["revenue"], Decimal("640.00"))
+        self.assertEqual(before[2], [{"name": "Tea", "total_sold": 6}, {"name": "Milk", "total_sold": 4}])
+
+        # Ranges starting after the newest archived order never read the archive.
+        self.assertFalse(OrderArchiveService.archived_orders(timezone.localdate() - timedelta(days=30)).exists())
+        self.assertEqual(OwnerAnalyticsService.overview_metrics(period="month")["total_orders"], 2)
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from product.models import Order
+from product.services.chart_service import SalesChartService
+
+
+class SalesChartServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Order.objects.create(total_price=250, status="PAID")
+
+    def test_render_png_in_memory(self):
+        chart = SalesChartService.render(range_key="7d", metric="revenue", fmt="png")
+        self.assertEqual(chart.content_type, "image/png")
+        self.assertTrue(chart.content.startswith(b"\x89PNG"))
+
+    def test_etag_changes_with_data_version(self):
+        first = SalesChartService.render(range_key="7d", metric="orders", fmt="svg")
+        again = SalesChartService.render(range_key="7d", metric="orders", fmt="svg")
+        self.assertEqual(first.etag, again.etag)
+
+        Order.objects.create(total_price=90, status="PAID")
+        changed = SalesChartService.render(range_key="7d", metric="orders", fmt="svg")
+        self.assertNotEqual(first.etag, changed.etag)
+
+    def test_unknown_range_rejected(self):
+        with self.assertRaises(ValueError):
+            SalesChartService.render(range_key="365d")
+
+
+class SalesGraphViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username="owner", password="Pass12345", is_staff=True)
+        self.client.login(username="owner", password="Pass12345")
+
+    def test_conditional_get_returns_not_modified(self):
+        url = reverse("product:sales_graph")
+        response = self.client.get(url, {"range": "7d"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+
+        cached = self.client.get(url, {"range": "7d"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_invalid_metric_returns_bad_request(self):
+        response = self.client.get(reverse("product:sales_graph"), {"metric": "margin"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from product.models import Category, Product, Shelf
+from product.services.catalog_cache import CatalogCacheService
+from product.services.import_service import ProductImportService
+from supermarket.core.jwt_auth import create_access_token
+
+
+CSV = """barcode,name,price,stock,discount_percentage,category,shelf,is_active
+111,Milk,120.005,10,0,groceries,A1,yes
+222,Bread,60,5,10,Bakery,,
+333,,50,1,0,groceries,,
+444,Eggs,-1,1,95,nowhere,,maybe
+111,Milk again,1,1,0,,,
+"""
+
+
+class ProductImportServiceTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Groceries", slug="groceries")
+        Shelf.objects.create(name="A1")
+        self.existing = Product.objects.create(name="Old bread", barcode="222", price=50, stock=3, description="Kept")
+
+    def test_upserts_valid_rows_and_reports_the_rest(self):
+        # Category/shelf maps, then per chunk: existing rows, savepoint, new
+        # category, reload, upsert, ids, ledger insert, low-stock alert sync, release.
+        with self.assertNumQueries(2 + 9):
+            result = ProductImportService.import_file(CSV, "csv", create_missing=True)
+
+        self.assertEqual((result.total_rows, result.created, result.updated, result.failed), (5, 1, 1, 3))
+        self.assertEqual([error.row for error in result.errors], [3, 4, 5])
+        self.assertIn("duplicate barcode, first seen on row 1", result.errors[2].errors)
+        self.assertEqual(len(result.errors[1].errors), 3)  # price, discount, is_active
+
+        milk = Product.objects.get(barcode="111")
+        self.assertEqual((milk.price, milk.category, milk.shelf.name), (Decimal("120.01"), self.category, "A1"))
+        bread = Product.objects.get(pk=self.existing.pk)
+        self.assertEqual((bread.name, bread.price, bread.discount_percentage), ("Bread", Decimal("60.00"), 10))
+        self.assertEqual(bread.description, "Kept")  # column absent from the file
+        self.assertEqual(bread.category.slug, "bakery")
+        self.assertEqual(result.categories_created, 1)
+
+    def test_partial_columns_update_existing_products_only(self):
+        rows = [{"barcode": "222", "stock": 40}, {"barcode": "999", "stock": 1}]
+        result = ProductImportService.import_rows(rows, ["barcode", "stock"], chunk_size=1)
+        self.assertEqual((result.updated, result.created), (1, 0))
+        self.assertEqual(result.errors[0].errors, ["name is required for new products", "price is required for new products"])
+        self.assertEqual(Product.objects.get(barcode="222").stock, 40)
+
+    def test_dry_run_and_bad_columns(self):
+        result = ProductImportService.import_file(CSV, "csv", create_missing=True, dry_run=True)
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertFalse(Category.objects.filter(slug="bakery").exists())
+        self.assertFalse(Product.objects.filter(barcode="111").exists())
+
+        with self.assertRaisesMessage(ValueError, "Unknown columns: cost"):
+            ProductImportService.import_rows([], ["barcode", "cost"])
+        with self.assertRaisesMessage(ValueError, "barcode column"):
+            ProductImportService.import_rows([], ["name"])
+
+    def test_bumps_catalog_version_once(self):
+        cache.clear()
+        version = CatalogCacheService.version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ProductImportService.import_file(json.dumps([{"barcode": "555", "name": "Tea", "price": 90}]), "json")
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(CatalogCacheService.version(), version)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write(CSV)
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command("import_products", handle.name, "--create-missing", stdout=out)
+        self.assertIn("1 created, 1 updated, 3 failed", out.getvalue())
+
+
+class ProductImportApiTests(TestCase):
+    def setUp(self):
+        self.url = reverse("product_api:admin_product_import_api")
+        staff = User.objects.create_user("staff", password="pass12345", is_staff=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(staff)}"}
+
+    def test_staff_can_import_json_and_csv(self):
+        body = json.dumps({"items": [{"barcode": "777", "name": "Rice", "price": "210.50", "stock": 8}]})
+        res = self.client.post(self.url, data=body, content_type="application/json", **self.auth)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["data"]["created"], 1)
+
+        res = self.client.post(
+            f"{self.url}?dry_run=1", data="barcode,stock\n777,abc\n", content_type="text/csv", **self.auth
+        )
+        self.assertEqual(res.json()["message"], "Import validated with 1 row error(s)")
+        self.assertEqual(Product.objects.get(barcode="777").stock, 8)
+
+    def test_rejects_non_staff_and_bad_files(self):
+        customer = User.objects.create_user("shopper", password="pass12345")
+        token = create_access_token(customer)
+        res = self.client.post(self.url, data="[]", content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(res.status_code, 403)
+        res = self.client.post(self.url, data="{", content_type="application/json", **self.auth)
+        self.assertEqual(res.status_code, 400)
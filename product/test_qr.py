@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from product.models import Order
+from product.services.qr_service import VerifyQRService
+
+
+class OrderQRTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        VerifyQRService.memory_cache.clear()
+        self.order = Order.objects.create(total_price=100, status="PAID")
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_qr_is_generated_once_then_served_from_memory(self):
+        url = reverse("product:order_qr", args=[self.order.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+
+        with self.assertNumQueries(0):
+            again = self.client.get(url)
+        self.assertEqual(again.content, response.content)
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    @override_settings(BASE_URL="https://shop.example.com/")
+    def test_host_and_scheme_variants_share_one_stored_qr(self):
+        url = reverse("product:order_qr", args=[self.order.id])
+        etags = {
+            self.client.get(url)["ETag"],
+            self.client.get(url, HTTP_HOST="localhost")["ETag"],
+            self.client.get(url, secure=True)["ETag"],
+        }
+        self.assertEqual(len(etags), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, VerifyQRService.storage_dir))), 1)
+        fingerprint = VerifyQRService.fingerprint(self.order.id, f"https://shop.example.com/order/{self.order.id}/verify/")
+        self.assertEqual(etags.pop(), f'"qr-{fingerprint}"')
+
+    def test_unknown_order_returns_404(self):
+        response = self.client.get(reverse("product:order_qr", args=[self.order.id + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_receipt_page_links_cached_qr(self):
+        response = self.client.get(reverse("product:receipt", args=[self.order.id]))
+        self.assertContains(response, reverse("product:order_qr", args=[self.order.id]))
+        self.assertNotContains(response, "data:image/png;base64")
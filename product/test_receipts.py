@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from product.models import Order, OrderItem, Product
+from product.services.receipt_service import ReceiptPDFService
+
+
+class ReceiptPDFTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        product = Product.objects.create(name="Milk", price=120, stock=10)
+        self.order = Order.objects.create(total_price=240, status="PAID")
+        OrderItem.objects.create(order=self.order, product=product, quantity=2, price=120)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_paid_receipt_is_stored_and_reused(self):
+        first = ReceiptPDFService.get_pdf(self.order)
+        self.assertTrue(first.content.startswith(b"%PDF"))
+        self.assertTrue((Path(self.media_root) / ReceiptPDFService.storage_path(self.order)).exists())
+
+        with self.assertNumQueries(0):
+            again = ReceiptPDFService.get_pdf(self.order)
+        self.assertEqual(first.content, again.content)
+
+    def test_pending_receipt_is_not_stored(self):
+        self.order.status = "PENDING"
+        self.order.save(update_fields=["status"])
+        ReceiptPDFService.get_pdf(self.order)
+        self.assertFalse((Path(self.media_root) / ReceiptPDFService.storage_path(self.order)).exists())
+
+    def test_receipt_pdf_view_supports_conditional_get(self):
+        url = reverse("product:receipt_pdf", args=[self.order.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_render_receipts_command_builds_zip(self):
+        zip_path = Path(self.media_root) / "receipts.zip"
+        today = self.order.created_at.date().isoformat()
+        call_command("render_receipts", start=today, end=today, zip_path=str(zip_path), stdout=StringIO())
+        with zipfile.ZipFile(zip_path) as archive:
+            self.assertEqual(archive.namelist(), [f"receipt_{self.order.id}.pdf"])
@@ -1,7 +1,24 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core import mail
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from product.models import Category, Product
-from product.services.product_service import ProductCatalogService
+from payment.models import StockDeductionLog
+from payment.utils import deduct_stock, restock
+from product.models import (
+    IN_STOCK, LOW_STOCK, OUT_OF_STOCK, Category, DemandForecast, LowStockAlert, Order, OrderItem, Product, Promotion, Shelf,
+)
+from product.services.forecast_service import DemandForecastService
+from product.services.image_service import UnsplashImageService
+from product.services.product_service import ProductCatalogService, ProductFieldset
+from product.services.promotion_service import PromotionService
+from product.services.reorder_service import ReorderService
+from product.services.stock_alert_service import StockAlertService
 
 
 @override_settings(UNSPLASH_ACCESS_KEY="")
@@ -20,3 +37,316 @@ class ProductCatalogServiceTests(TestCase):
     def test_list_products_category_filter(self):
         result = ProductCatalogService.list_products(category="groceries")
         self.assertEqual(result["pagination"]["total"], 2)
+
+    def test_price_filter_and_sort_use_effective_price(self):
+        sugar = Product.objects.get(name="Sugar")
+        sugar.discount_percentage = 50
+        sugar.save(update_fields=["discount_percentage"])  # effective price 100.00
+
+        result = ProductCatalogService.list_products(max_price=110, sort="price_asc")
+        self.assertEqual([item["name"] for item in result["items"]], ["Sugar"])
+        self.assertEqual(result["items"][0]["discounted_price"], Decimal("100.00"))
+        result = ProductCatalogService.list_products(sort="price_desc")
+        self.assertEqual([item["name"] for item in result["items"]], ["Milk", "Sugar"])
+
+        with CaptureQueriesContext(connection) as queries:
+            ProductCatalogService.list_products(min_price=100, sort="price_asc", fieldset=ProductFieldset.parse("id"))
+        self.assertIn('"effective_price" >=', queries[-1]["sql"])
+        self.assertIn('ORDER BY "product_product"."effective_price" ASC', queries[-1]["sql"])
+
+    def test_sparse_fieldset_shapes_sql(self):
+        fieldset = ProductFieldset.parse("id,name,price")
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch.object(UnsplashImageService, "get_image_for_product") as image_lookup:
+            result = ProductCatalogService.list_products(sort="price_desc", fieldset=fieldset)
+
+        self.assertEqual(result["items"][0], {"id": result["items"][0]["id"], "name": "Sugar", "price": 200})
+        image_lookup.assert_not_called()
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn("description", sql)
+        self.assertNotIn("AVG(", sql.upper())
+        self.assertNotIn("product_category", sql)
+
+    def test_sort_keeps_the_annotation_it_needs(self):
+        fieldset = ProductFieldset.parse("id,name")
+        result = ProductCatalogService.list_products(sort="rating", fieldset=fieldset)
+        self.assertEqual(set(result["items"][0]), {"id", "name"})
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Unknown fields: secret"):
+            ProductFieldset.parse("id,secret")
+
+
+class PromotionServiceTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.dairy = Category.objects.create(name="Dairy", slug="dairy")
+        self.shelf = Shelf.objects.create(name="B2")
+        self.milk = Product.objects.create(name="Milk", category=self.dairy, price=Decimal("99.99"), stock=5)
+        self.cheese = Product.objects.create(
+            name="Cheese", category=self.dairy, price=Decimal("300"), discount_percentage=30, stock=5
+        )
+        self.bread = Product.objects.create(name="Bread", shelf=self.shelf, price=Decimal("60"), stock=5)
+        self.tea = Product.objects.create(name="Tea", price=Decimal("150"), stock=5)
+
+    def _promotion(self, pct, **kwargs):
+        kwargs.setdefault("starts_at", self.now - timedelta(hours=1))
+        kwargs.setdefault("ends_at", self.now + timedelta(hours=1))
+        return Promotion.objects.create(name=f"{pct}% off", discount_percentage=pct, **kwargs)
+
+    def test_effective_price_is_maintained_on_save(self):
+        self.assertEqual(self.milk.effective_price, Decimal("99.99"))
+        self.assertEqual(self.cheese.effective_price, Decimal("210.00"))
+        self.milk.discount_percentage = 15
+        self.milk.save(update_fields=["discount_percentage"])
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.effective_price, Decimal("84.99"))
+
+    def test_sync_applies_best_discount_and_reverts_when_ended(self):
+        dairy_sale = self._promotion(20, category=self.dairy)
+        listed = self._promotion(10, shelf=self.shelf)
+        listed.products.add(self.tea, self.milk)
+
+        # Savepoint, running, ended, per promotion: scope fallback + apply, mark applied, release.
+        with self.assertNumQueries(9):
+            result = PromotionService.sync(self.now)
+        self.assertEqual(sorted(result.applied), sorted([dairy_sale.id, listed.id]))
+
+        prices = dict(Product.objects.values_list("name", "effective_price"))
+        self.assertEqual(prices["Milk"], Decimal("79.99"))  # 20% beats 10%
+        self.assertEqual(prices["Cheese"], Decimal("210.00"))  # own 30% beats 20%
+        self.assertEqual(prices["Bread"], Decimal("54.00"))
+        self.assertEqual(prices["Tea"], Decimal("135.00"))
+        self.assertEqual(PromotionService.sync(self.now).products_updated, 0)
+
+        result = PromotionService.sync(self.now + timedelta(hours=2))
+        self.assertEqual(sorted(result.reverted), sorted([dairy_sale.id, listed.id]))
+        self.assertEqual(
+            dict(Product.objects.values_list("name", "effective_price")),
+            {"Milk": Decimal("99.99"), "Cheese": Decimal("210.00"), "Bread": Decimal("60.00"), "Tea": Decimal("150.00")},
+        )
+        self.assertFalse(Product.objects.filter(promotion_discount__gt=0).exists())
+
+    def test_ending_one_promotion_falls_back_to_another(self):
+        big = self._promotion(50, category=self.dairy, ends_at=self.now + timedelta(minutes=5))
+        small = self._promotion(10, category=self.dairy)
+        PromotionService.sync(self.now)
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.active_promotion, big)
+
+        PromotionService.sync(self.now + timedelta(minutes=10))
+        self.milk.refresh_from_db()
+        self.assertEqual((self.milk.active_promotion, self.milk.effective_price), (small, Decimal("89.99")))
+
+        small.delete()
+        self.milk.refresh_from_db()
+        self.assertEqual((self.milk.promotion_discount, self.milk.effective_price), (0, Decimal("99.99")))
+
+    def test_whole_number_prices_keep_their_cents(self):
+        butter = Product.objects.create(name="Butter", price=Decimal("125"), stock=5)
+        ghee = Product.objects.create(name="Ghee", price=Decimal("125"), discount_percentage=15, stock=5)
+        self._promotion(15).products.add(butter)
+        self._promotion(20).products.add(ghee)
+
+        PromotionService.sync(self.now)
+        for product in (butter, ghee):
+            product.refresh_from_db()
+            self.assertEqual(product.effective_price, product.discounted_price)
+        self.assertEqual((butter.effective_price, ghee.effective_price), (Decimal("106.25"), Decimal("100.00")))
+
+        PromotionService.sync(self.now + timedelta(hours=2))
+        for product in (butter, ghee):
+            product.refresh_from_db()
+            self.assertEqual(product.effective_price, product.discounted_price)
+        self.assertEqual((butter.effective_price, ghee.effective_price), (Decimal("125.00"), Decimal("106.25")))
+
+
+class StockAlertServiceTests(TestCase):
+    def setUp(self):
+        self.rice = Product.objects.create(name="Rice", barcode="RICE", price=Decimal("200"), stock=20, reorder_point=5)
+        self.salt = Product.objects.create(name="Salt", barcode="SALT", price=Decimal("30"), stock=8, reorder_point=10)
+
+    def _open_alert(self, product):
+        return LowStockAlert.objects.filter(product=product, resolved_at__isnull=True).first()
+
+    def test_stock_status_is_derived_on_save_and_bulk_writes(self):
+        self.assertEqual((self.rice.stock_status, self.salt.stock_status), (IN_STOCK, LOW_STOCK))
+        self.assertEqual(self._open_alert(self.salt).status, LOW_STOCK)
+
+        deduct_stock({self.rice.id: 16})
+        self.rice.refresh_from_db()
+        self.assertEqual((self.rice.stock, self.rice.stock_status), (4, LOW_STOCK))
+
+        self.rice.reorder_point = 3
+        self.rice.save(update_fields=["reorder_point"])
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.stock_status, IN_STOCK)
+        self.assertIsNone(self._open_alert(self.rice))
+
+    def test_alerts_open_escalate_and_resolve_with_stock(self):
+        deduct_stock({self.rice.id: 16})
+        alert = self._open_alert(self.rice)
+        self.assertEqual((alert.status, alert.stock), (LOW_STOCK, 4))
+        LowStockAlert.objects.update(notified_at=timezone.now())
+
+        deduct_stock({self.rice.id: 4})
+        alert.refresh_from_db()
+        self.assertEqual((alert.status, alert.stock, alert.notified_at), (OUT_OF_STOCK, 0, None))
+
+        restock({self.rice.id: 30, self.salt.id: 10})
+        self.assertIsNone(self._open_alert(self.rice))
+        self.assertIsNone(self._open_alert(self.salt))
+        self.assertEqual(set(Product.objects.values_list("stock_status", flat=True)), {IN_STOCK})
+
+        deduct_stock({self.rice.id: 30})
+        self.assertEqual(LowStockAlert.objects.filter(product=self.rice).count(), 2)
+
+    def test_sync_only_reads_when_nothing_crossed(self):
+        with self.assertNumQueries(1):
+            result = StockAlertService.sync([self.rice.id, self.salt.id])
+        self.assertEqual((result.opened, result.resolved), (0, 0))
+
+    @override_settings(LOW_STOCK_DIGEST_RECIPIENTS=["owner@example.com"])
+    def test_digest_batches_open_alerts_into_one_email(self):
+        deduct_stock({self.rice.id: 20})
+        self.assertEqual(StockAlertService.send_digest(), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        body = mail.outbox[0].body
+        self.assertIn("Out of stock (1):\n- Rice [RICE]: 0 left", body)
+        self.assertIn("Low stock (1):\n- Salt [SALT]: 8 left, reorder point 10", body)
+        self.assertEqual(mail.outbox[0].to, ["owner@example.com"])
+
+        self.assertEqual(StockAlertService.send_digest(), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class ReorderServiceTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.order = Order.objects.create(total_price=0)
+        self.rice = Product.objects.create(name="Rice", price=Decimal("200"), stock=5, reorder_point=2)
+        self.salt = Product.objects.create(name="Salt", price=Decimal("30"), stock=500)
+        Product.objects.create(name="Tea", price=Decimal("150"), stock=1)
+
+        for product in (self.rice, self.salt):
+            for days_ago in range(7):
+                self._log(product, 2, StockDeductionLog.DEDUCT, days_ago)
+        # A refunded sale nets out; an old sale is outside the window.
+        self._log(self.rice, 3, StockDeductionLog.DEDUCT, 2)
+        self._log(self.rice, 3, StockDeductionLog.ROLLBACK, 2)
+        self._log(self.rice, 50, StockDeductionLog.DEDUCT, 30)
+
+    def _log(self, product, quantity, action, days_ago):
+        log = StockDeductionLog.objects.create(product=product, order=self.order, quantity=quantity, action=action)
+        StockDeductionLog.objects.filter(id=log.id).update(created_at=self.now - timedelta(days=days_ago))
+
+    def _suggest(self, **kwargs):
+        return ReorderService.suggestions(
+            days=7, lead_time_days=3, cover_days=4, service_factor=0, now=self.now, **kwargs
+        )
+
+    def test_suggestions_from_net_daily_velocity(self):
+        suggestions = self._suggest()
+        self.assertEqual([s.name for s in suggestions], ["Rice"])
+        rice = suggestions[0]
+        self.assertEqual(rice.daily_velocity, 2.0)
+        self.assertEqual(rice.days_of_cover, 2.5)
+        self.assertEqual((rice.suggested_reorder_point, rice.suggested_quantity), (6, 9))
+
+        self.assertEqual([s.name for s in self._suggest(only_needed=False)], ["Rice", "Salt"])
+
+    def test_safety_stock_grows_with_demand_spread(self):
+        self._log(self.rice, 14, StockDeductionLog.DEDUCT, 0)
+        steady = ReorderService.suggestions(days=7, lead_time_days=3, cover_days=4, service_factor=0, now=self.now)[0]
+        safe = ReorderService.suggestions(days=7, lead_time_days=3, cover_days=4, service_factor=1.65, now=self.now)[0]
+        self.assertEqual(steady.daily_velocity, 4.0)
+        self.assertGreater(safe.suggested_reorder_point, steady.suggested_reorder_point)
+
+    def test_apply_updates_reorder_points_and_status(self):
+        self.assertEqual(ReorderService.apply(self._suggest()), 1)
+        self.rice.refresh_from_db()
+        self.assertEqual((self.rice.reorder_point, self.rice.stock_status), (6, LOW_STOCK))
+        self.assertTrue(LowStockAlert.objects.filter(product=self.rice, resolved_at__isnull=True).exists())
+
+    def test_no_sales_means_no_suggestions(self):
+        StockDeductionLog.objects.all().delete()
+        self.assertEqual(self._suggest(), [])
+
+
+class DemandForecastServiceTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.rice = Product.objects.create(name="Rice", price=Decimal("200"), stock=40)
+        self.salt = Product.objects.create(name="Salt", price=Decimal("30"), stock=40)
+        for days_ago in range(10):
+            self._sale(self.rice, 4, "PAID", days_ago)
+        self._sale(self.salt, 9, "REFUNDED", 1)
+
+    def _sale(self, product, quantity, status, days_ago):
+        order = Order.objects.create(total_price=product.price * quantity, status=status)
+        Order.objects.filter(id=order.id).update(created_at=self.now - timedelta(days=days_ago))
+        OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+        return order
+
+    def _log(self, order, product, quantity, action, days_ago):
+        log = StockDeductionLog.objects.create(order=order, product=product, quantity=quantity, action=action)
+        StockDeductionLog.objects.filter(id=log.id).update(created_at=self.now - timedelta(days=days_ago))
+
+    def test_demand_counts_paid_orders_and_unpaid_deductions_once(self):
+        paid = Order.objects.filter(status="PAID").first()
+        self._log(paid, self.rice, 4, StockDeductionLog.DEDUCT, 0)  # already counted via the order
+        counter = Order.objects.create(total_price=0)
+        self._log(counter, self.salt, 5, StockDeductionLog.DEDUCT, 0)
+        refunded = Order.objects.get(status="REFUNDED")
+        self._log(refunded, self.salt, 9, StockDeductionLog.DEDUCT, 1)
+        self._log(refunded, self.salt, 9, StockDeductionLog.ROLLBACK, 1)
+
+        demand = DemandForecastService.demand_matrix(14, self.now)
+        self.assertEqual(demand.shape, (2, 14))
+        self.assertEqual(demand.loc[self.rice.id].sum(), 40)
+        self.assertEqual(demand.loc[self.salt.id].tolist()[-2:], [0, 5])
+
+    def test_run_stores_forecasts_and_drops_stale_ones(self):
+        stale = DemandForecast.objects.create(
+            product=self.salt, daily_demand=9, moving_average=9, demand_std=0, units_sold=9,
+            history_days=14, generated_at=self.now - timedelta(days=1),
+        )
+        result = DemandForecastService.run(days=10, alpha=0.5, window=7, now=self.now)
+        self.assertEqual((result.products, result.removed), (1, 1))
+        self.assertFalse(DemandForecast.objects.filter(id=stale.id).exists())
+
+        forecast = DemandForecast.objects.get(product=self.rice)
+        # Ten steady days: the smoothed level and average are the daily rate, with no error.
+        self.assertAlmostEqual(forecast.daily_demand, 4)
+        self.assertAlmostEqual(forecast.moving_average, 4)
+        self.assertAlmostEqual(forecast.demand_std, 0)
+        self.assertEqual((forecast.units_sold, forecast.units_over(7)), (40, 28))
+
+    def test_fit_smooths_towards_recent_days(self):
+        import pandas as pd
+
+        demand = pd.DataFrame([[0, 0, 0, 8], [8, 0, 0, 0]], index=[1, 2], dtype="float64")
+        fitted = DemandForecastService.fit(demand, alpha=0.5, window=2)
+        self.assertEqual(fitted["daily_demand"].tolist(), [4.0, 1.0])
+        self.assertEqual(fitted["moving_average"].tolist(), [4.0, 0.0])
+
+    def test_fit_is_vectorized_over_a_large_catalog(self):
+        import time
+
+        import numpy as np
+        import pandas as pd
+
+        demand = pd.DataFrame(np.random.default_rng(7).poisson(3, size=(50_000, 90)).astype("float64"))
+        started = time.perf_counter()
+        fitted = DemandForecastService.fit(demand, alpha=0.3, window=7)
+        self.assertEqual(len(fitted), 50_000)
+        self.assertLess(time.perf_counter() - started, 10)
+
+    def test_reorder_suggestions_prefer_fresh_forecasts(self):
+        DemandForecastService.run(days=10, alpha=0.5, window=7, now=self.now)
+        DemandForecast.objects.filter(product=self.rice).update(daily_demand=10, demand_std=0)
+        [rice] = ReorderService.suggestions(days=7, lead_time_days=3, cover_days=4, service_factor=0, now=self.now)
+        self.assertEqual((rice.daily_velocity, rice.suggested_reorder_point, rice.suggested_quantity), (10.0, 30, 30))
+
+        later = self.now + timedelta(days=5)
+        self.assertEqual(ReorderService.suggestions(days=7, service_factor=0, now=later), [])
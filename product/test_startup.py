@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Boots Django the way a web/Celery worker does (settings, app registry,
+# every URLconf and view module, Celery tasks) and reports wall time + RSS.
+# VmRSS is read from /proc because ru_maxrss is inherited from the forking
+# test process on Linux.
+BOOT_SCRIPT = """
+import os, resource, time
+start = time.perf_counter()
+import django
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "supermarket.settings")
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+import payment.tasks
+elapsed = time.perf_counter() - start
+try:
+    with open("/proc/self/status") as status:
+        rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print("BOOT", elapsed, rss_kb)
+"""
+
+HEAVY_MODULES = ("matplotlib", "pandas", "numpy", "reportlab", "openpyxl", "africastalking")
+
+# Wall time and memory depend on the machine, so their budgets only apply
+# when set, e.g. STARTUP_MAX_BOOT_SECONDS=5 STARTUP_MAX_RSS_MB=100 on a
+# dedicated benchmark host.
+MAX_BOOT_SECONDS = os.environ.get("STARTUP_MAX_BOOT_SECONDS")
+MAX_BOOT_RSS_MB = os.environ.get("STARTUP_MAX_RSS_MB")
+
+
+class WorkerStartupBenchmarkTests(SimpleTestCase):
+    """Guard worker boot time and memory via ``python -X importtime``."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        env = {**os.environ, "PYTHONPATH": str(BASE_DIR), "DJANGO_SETTINGS_MODULE": "supermarket.settings"}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+            cwd=BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        if result.returncode != 0:
+            raise AssertionError(f"Django boot failed:\n{result.stderr[-2000:]}")
+
+        cls.imported = set()
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                name = line.rsplit("|", 1)[1].strip()
+                cls.imported.add(name.split(".")[0])
+
+        boot_line = next(line for line in result.stdout.splitlines() if line.startswith("BOOT "))
+        _, seconds, rss_kb = boot_line.split()
+        cls.boot_seconds = float(seconds)
+        cls.boot_rss_mb = int(rss_kb) / 1024
+
+    def test_boot_does_not_import_reporting_libraries(self):
+        loaded = sorted(set(HEAVY_MODULES) & self.imported)
+        self.assertEqual(loaded, [], f"Heavy modules imported at worker boot: {loaded}")
+
+    @unittest.skipUnless(MAX_BOOT_SECONDS, "set STARTUP_MAX_BOOT_SECONDS to enforce a boot time budget")
+    def test_boot_time_within_budget(self):
+        self.assertLess(self.boot_seconds, float(MAX_BOOT_SECONDS))
+
+    @unittest.skipUnless(MAX_BOOT_RSS_MB, "set STARTUP_MAX_RSS_MB to enforce a boot memory budget")
+    def test_boot_memory_within_budget(self):
+        self.assertLess(self.boot_rss_mb, float(MAX_BOOT_RSS_MB))
@@ -0,0 +1,185 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from payment.utils import apply_stock_deduction, restock, rollback_stock_deduction
+from product.models import Order, OrderItem, Product, StockMovement, StockSnapshot
+from product.services.import_service import ProductImportService
+from product.services.stock_ledger import StockLedgerService, stock_movement_context
+from supermarket.core.jwt_auth import create_access_token
+
+
+class StockLedgerWriteTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("clerk", password="pass12345", is_staff=True)
+        self.milk = Product.objects.create(name="Milk", barcode="111", price=Decimal("100"), stock=10)
+
+    def _ledger(self, product):
+        return list(
+            StockMovement.objects.filter(product=product)
+            .order_by("id")
+            .values_list("reason", "quantity", "balance")
+        )
+
+    def test_saves_record_opening_restock_and_adjustment(self):
+        self.milk.stock = 15
+        self.milk.save()
+        with stock_movement_context(user=self.staff, note="count"):
+            self.milk.stock = 12
+            self.milk.save(update_fields=["stock"])
+        self.milk.name = "Fresh milk"
+        self.milk.save(update_fields=["name"])
+
+        self.assertEqual(self._ledger(self.milk), [
+            (StockMovement.OPENING, 10, 10),
+            (StockMovement.RESTOCK, 5, 15),
+            (StockMovement.ADJUSTMENT, -3, 12),
+        ])
+        last = StockMovement.objects.order_by("-id").first()
+        self.assertEqual((last.user, last.note), (self.staff, "count"))
+
+    def test_product_edit_view_records_the_editor(self):
+        self.client.login(username="clerk", password="pass12345")
+        response = self.client.post(reverse("product:product_edit", args=[self.milk.id]), {
+            "name": "Milk", "price": "100", "stock": "4", "barcode": "111",
+        })
+        self.assertEqual(response.status_code, 302)
+        movement = StockMovement.objects.order_by("-id").first()
+        self.assertEqual(
+            (movement.reason, movement.quantity, movement.balance, movement.user, movement.note),
+            (StockMovement.ADJUSTMENT, -6, 4, self.staff, "product_edit"),
+        )
+
+    def test_product_edit_view_rejects_a_stock_that_is_not_a_whole_number(self):
+        self.client.login(username="clerk", password="pass12345")
+        for stock, message in (("ten", "Stock must be a whole number."), ("-2", "Stock cannot be negative.")):
+            response = self.client.post(reverse("product:product_edit", args=[self.milk.id]), {
+                "name": "Milk", "price": "100", "stock": stock, "barcode": "111",
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, message)
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.stock, 10)
+        self.assertEqual(StockMovement.objects.filter(product=self.milk).count(), 1)
+
+    def test_order_deduction_and_rollback_are_linked_to_the_order(self):
+        order = Order.objects.create(total_price=300)
+        OrderItem.objects.create(order=order, product=self.milk, quantity=3, price=100)
+        apply_stock_deduction(order, user=self.staff)
+        rollback_stock_deduction(order, user=self.staff)
+        restock({self.milk.id: 20})
+
+        self.assertEqual(self._ledger(self.milk)[1:], [
+            (StockMovement.SALE, -3, 7),
+            (StockMovement.ROLLBACK, 3, 10),
+            (StockMovement.RESTOCK, 20, 30),
+        ])
+        self.assertEqual(StockMovement.objects.filter(order=order, user=self.staff).count(), 2)
+
+    def test_batch_lines_get_running_balances(self):
+        first, second = Order.objects.create(total_price=0), Order.objects.create(total_price=0)
+        Product.objects.filter(id=self.milk.id).update(stock=4)
+        StockLedgerService.record(
+            [(self.milk.id, -2, first), (self.milk.id, -4, second)], StockMovement.SALE
+        )
+        self.assertEqual(
+            list(StockMovement.objects.filter(order__isnull=False).order_by("id").values_list("order", "balance")),
+            [(first.id, 8), (second.id, 4)],
+        )
+
+    def test_imports_record_the_change(self):
+        result = ProductImportService.import_rows(
+            [
+                {"barcode": "111", "name": "Milk", "price": "100", "stock": "25"},
+                {"barcode": "222", "name": "Tea", "price": "50", "stock": "7"},
+            ],
+            ["barcode", "name", "price", "stock"],
+        )
+        self.assertEqual(result.errors, [])
+        tea = Product.objects.get(barcode="222")
+        self.assertEqual(self._ledger(self.milk)[-1], (StockMovement.IMPORT, 15, 25))
+        self.assertEqual(self._ledger(tea), [(StockMovement.IMPORT, 7, 7)])
+
+    def test_movements_are_append_only(self):
+        movement = StockMovement.objects.get(product=self.milk)
+        movement.quantity = 99
+        with self.assertRaises(ValueError):
+            movement.save()
+        with self.assertRaises(ValueError):
+            movement.delete()
+
+
+class StockHistoryTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.milk = Product.objects.create(name="Milk", price=Decimal("100"), stock=10)
+        self.tea = Product.objects.create(name="Tea", price=Decimal("50"), stock=4)
+        # Milk: 10 opened three days ago, -4 two days ago, +6 yesterday, -1 at midnight.
+        self._backdate(self.milk, 3)
+        self._move(self.milk, -4, StockMovement.SALE, 2)
+        self._move(self.milk, 6, StockMovement.RESTOCK, 1)
+        self._move(self.milk, -1, StockMovement.SALE, 0)
+        self._backdate(self.tea, 2)
+
+    def _at(self, days_ago, hour=12):
+        day = self.today - datetime.timedelta(days=days_ago)
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+    def _backdate(self, product, days_ago):
+        StockMovement.objects.filter(product=product).update(created_at=self._at(days_ago, 9))
+
+    def _move(self, product, quantity, reason, days_ago):
+        Product.objects.filter(id=product.id).update(stock=product.stock + quantity)
+        product.refresh_from_db()
+        [movement] = StockLedgerService.record([(product.id, quantity, None)], reason)
+        StockMovement.objects.filter(id=movement.id).update(created_at=self._at(days_ago, 0 if days_ago == 0 else 12))
+
+    def test_stock_at_replays_the_ledger_without_snapshots(self):
+        self.assertEqual(StockLedgerService.stock_at(self.today - datetime.timedelta(days=2)), {self.milk.id: 6, self.tea.id: 4})
+        self.assertEqual(StockLedgerService.stock_at(self._at(1, 10)), {self.milk.id: 6, self.tea.id: 4})
+        self.assertEqual(StockLedgerService.stock_at(self._at(3, 8)), {})
+
+    def test_snapshots_serve_stock_at_with_later_movements(self):
+        for days_ago in (3, 2, 1):
+            StockLedgerService.snapshot(self.today - datetime.timedelta(days=days_ago))
+        self.assertEqual(StockLedgerService.snapshot(self.today - datetime.timedelta(days=1)), 2)  # idempotent
+        self.assertEqual(
+            list(StockSnapshot.objects.filter(product=self.milk).order_by("day").values_list("stock", flat=True)),
+            [10, 6, 12],
+        )
+
+        # Snapshot of the day before, plus today's movements up to the time asked.
+        with self.assertNumQueries(3):
+            self.assertEqual(StockLedgerService.stock_at(timezone.now() + datetime.timedelta(seconds=1)), {self.milk.id: 11, self.tea.id: 4})
+        just_before_midnight = self._at(0, 0) - datetime.timedelta(microseconds=1)
+        self.assertEqual(StockLedgerService.stock_at(just_before_midnight), {self.milk.id: 12, self.tea.id: 4})
+        self.assertEqual(StockLedgerService.stock_at(self.today - datetime.timedelta(days=2), [self.milk.id]), {self.milk.id: 6})
+
+    def test_movement_report_and_api(self):
+        StockLedgerService.snapshot(self.today - datetime.timedelta(days=3))
+        start, end = self.today - datetime.timedelta(days=2), self.today - datetime.timedelta(days=1)
+        milk, tea = StockLedgerService.movement_report(start, end)
+        self.assertEqual((milk["opening"], milk["net"], milk["closing"]), (10, 2, 12))
+        self.assertEqual((tea["opening"], tea["movements"]["OPENING"], tea["closing"]), (0, 4, 4))
+        self.assertEqual((milk["movements"]["SALE"], milk["movements"]["RESTOCK"]), (-4, 6))
+
+        staff = User.objects.create_user("owner", password="pass12345", is_staff=True)
+        response = self.client.get(
+            reverse("product_api:admin_stock_report_api"),
+            {"start": start.isoformat(), "end": end.isoformat(), "product": [self.milk.id, self.tea.id]},
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(staff)}",
+        )
+        self.assertEqual(response.status_code, 200)
+        items = response.json()["data"]["items"]
+        self.assertEqual([(row["name"], row["opening"], row["closing"]) for row in items], [("Milk", 10, 12), ("Tea", 0, 4)])
+
+        bad = self.client.get(
+            reverse("product_api:admin_stock_report_api"),
+            {"start": end.isoformat(), "end": start.isoformat()},
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(staff)}",
+        )
+        self.assertEqual(bad.status_code, 400)
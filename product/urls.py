@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import reports, views
 
 app_name = "product"
 
@@ -20,12 +20,13 @@ urlpatterns = [
     # ---------------- Checkout & Orders ---------------- #
     path("checkout/", views.checkout, name="checkout"),
     path("order/<int:order_id>/verify/", views.verify_order, name="verify_order"),
+    path("order/<int:order_id>/qr.png", views.order_qr, name="order_qr"),
     path("order/<int:order_id>/check-status/", views.check_payment_status, name="check_payment_status"),
     path("order/<int:order_id>/paid/", views.mark_order_paid, name="mark_order_paid"),
 
     # ---------------- Receipts ---------------- #
     path("receipt/<int:order_id>/", views.receipt, name="receipt"),
-    path("receipt/<int:order_id>/pdf/", views.receipt_pdf, name="receipt_pdf"),
+    path("receipt/<int:order_id>/pdf/", reports.receipt_pdf, name="receipt_pdf"),
     path("receipt-view/<int:order_id>/", views.receipt_view, name="receipt_view"),
     path("receipt/<int:order_id>/send-sms/", views.send_receipt_sms, name="send_receipt_sms"),
 
@@ -39,6 +40,6 @@ urlpatterns = [
     path("dashboard/products/<int:pk>/delete/", views.product_delete, name="product_delete"),
 
     # Reports & Graphs
-    path("dashboard/export/excel/", views.export_excel, name="export_excel"),
-    path("dashboard/sales-graph/", views.sales_graph, name="sales_graph"),
+    path("dashboard/export/excel/", reports.export_excel, name="export_excel"),
+    path("dashboard/sales-graph/", reports.sales_graph, name="sales_graph"),
 ]
@@ -1,31 +1,29 @@
 from decimal import Decimal
 from urllib.parse import quote
-import io, os, json, qrcode
-import matplotlib.pyplot as plt
-import pandas as pd
+import json
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, FileResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import login
 from django.contrib.auth.password_validation import password_validators_help_texts
 from django.db.models import Sum, Q
-from django.core.paginator import Paginator
+from django.core.paginator import Page, Paginator
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
 from django.utils.timezone import now
 from datetime import timedelta
 from django.conf import settings
 
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from openpyxl import Workbook
-from openpyxl.chart import LineChart, Reference, BarChart
-
-from .models import Product, Order, OrderItem, Customer, VerificationLog, Shelf, Category
+from .models import Product, Order, OrderItem, Customer, VerificationLog, Shelf, Category, StockMovement, IN_STOCK, LOW_STOCK, OUT_OF_STOCK
 from payment.models import Payment, StockDeductionLog
+from supermarket.core.db_router import anonymous_replica_reads, replica_reads
 from .forms import CustomerRegistrationForm
+from .services.catalog_cache import CatalogCacheService
 from .services.image_service import UnsplashImageService
+from .services.qr_service import VerifyQRService
+from .services.stock_ledger import stock_movement_context
 
 
 # ------------------------
@@ -35,6 +33,20 @@ def is_cashier_or_owner(user):
     return user.is_authenticated and (user.is_staff or user.is_superuser)
 
 
+def parse_whole_number(value, label, default=None):
+    """Return a non-negative ``int`` from form input, or raise ``ValueError`` with a message for the user."""
+    value = (value or "").strip()
+    if not value and default is not None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{label} must be a whole number.") from None
+    if number < 0:
+        raise ValueError(f"{label} cannot be negative.")
+    return number
+
+
 def get_client_ip(request):
     """Helper: Extract client IP."""
     x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
@@ -126,28 +138,35 @@ def product_list_admin(request):
 @login_required
 @user_passes_test(is_cashier_or_owner)
 def product_create(request):
+    shelves = Shelf.objects.all()
+    categories = Category.objects.filter(is_active=True).order_by("name")
     if request.method == "POST":
+        try:
+            stock = parse_whole_number(request.POST.get("stock"), "Stock")
+            discount = parse_whole_number(request.POST.get("discount_percentage"), "Discount", default=0)
+        except ValueError as exc:
+            messages.error(request, str(exc))
+            return render(request, "product/product_form.html", {"shelves": shelves, "categories": categories})
         shelf_id = request.POST.get("shelf")
         shelf = Shelf.objects.get(id=shelf_id) if shelf_id else None
         category_id = request.POST.get("category")
         category = Category.objects.get(id=category_id) if category_id else None
-        Product.objects.create(
-            name=request.POST.get("name"),
-            description=request.POST.get("description"),
-            image=request.FILES.get("image"),
-            category=category,
-            price=request.POST.get("price"),
-            discount_percentage=request.POST.get("discount_percentage") or 0,
-            stock=request.POST.get("stock"),
-            is_active=bool(request.POST.get("is_active")),
-            barcode=request.POST.get("barcode"),
-            shelf=shelf,
-        )
+        with stock_movement_context(user=request.user, note="product_create"):
+            Product.objects.create(
+                name=request.POST.get("name"),
+                description=request.POST.get("description"),
+                image=request.FILES.get("image"),
+                category=category,
+                price=request.POST.get("price"),
+                discount_percentage=discount,
+                stock=stock,
+                is_active=bool(request.POST.get("is_active")),
+                barcode=request.POST.get("barcode"),
+                shelf=shelf,
+            )
         messages.success(request, "Product added successfully.")
         return redirect("product:product_list_admin")
 
-    shelves = Shelf.objects.all()
-    categories = Category.objects.filter(is_active=True).order_by("name")
     return render(request, "product/product_form.html", {"shelves": shelves, "categories": categories})
 
 
@@ -155,12 +174,20 @@ def product_create(request):
 @user_passes_test(is_cashier_or_owner)
 def product_edit(request, pk):
     product = get_object_or_404(Product, pk=pk)
+    shelves = Shelf.objects.all()
+    categories = Category.objects.filter(is_active=True).order_by("name")
     if request.method == "POST":
+        try:
+            stock = parse_whole_number(request.POST.get("stock"), "Stock")
+            discount = parse_whole_number(request.POST.get("discount_percentage"), "Discount", default=0)
+        except ValueError as exc:
+            messages.error(request, str(exc))
+            return render(request, "product/product_form.html", {"product": product, "shelves": shelves, "categories": categories})
         product.name = request.POST.get("name")
         product.description = request.POST.get("description")
         product.price = request.POST.get("price")
-        product.discount_percentage = request.POST.get("discount_percentage") or 0
-        product.stock = request.POST.get("stock")
+        product.discount_percentage = discount
+        product.stock = stock
         product.is_active = bool(request.POST.get("is_active"))
         product.barcode = request.POST.get("barcode")
         if request.FILES.get("image"):
@@ -169,12 +196,11 @@ def product_edit(request, pk):
         product.shelf = Shelf.objects.get(id=shelf_id) if shelf_id else None
         category_id = request.POST.get("category")
         product.category = Category.objects.get(id=category_id) if category_id else None
-        product.save()
+        with stock_movement_context(user=request.user, note="product_edit"):
+            product.save()
         messages.success(request, "Product updated successfully.")
         return redirect("product:product_list_admin")
 
-    shelves = Shelf.objects.all()
-    categories = Category.objects.filter(is_active=True).order_by("name")
     return render(request, "product/product_form.html", {"product": product, "shelves": shelves, "categories": categories})
 
 
@@ -190,12 +216,11 @@ def product_delete(request, pk):
 # ------------------------
 # Public Shopping
 # ------------------------
-def product_list(request):
-    """Customer-facing product list with search and filter."""
-    query = request.GET.get("q")
-    stock_filter = request.GET.get("stock_filter")
-    category = request.GET.get("category")
+STOCK_FILTERS = {"in_stock": IN_STOCK, "low_stock": LOW_STOCK, "out_of_stock": OUT_OF_STOCK}
+STOREFRONT_PAGE_SIZE = 12
+
 
+def _storefront_listing(query, stock_filter, category, page_number):
     products = Product.objects.select_related("shelf", "category").filter(is_active=True).order_by("-created_at")
     
     if query:
@@ -208,15 +233,10 @@ def product_list(request):
     if category:
         products = products.filter(category_id=category)
     
-    if stock_filter == "in_stock":
-        products = products.filter(stock__gt=10)
-    elif stock_filter == "low_stock":
-        products = products.filter(stock__lte=10, stock__gt=0)
-    elif stock_filter == "out_of_stock":
-        products = products.filter(stock=0)
-
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get("page")
+    if stock_filter in STOCK_FILTERS:
+        products = products.filter(stock_status=STOCK_FILTERS[stock_filter])
+
+    paginator = Paginator(products, STOREFRONT_PAGE_SIZE)
     page_obj = paginator.get_page(page_number)
 
     for product in page_obj.object_list:
@@ -226,7 +246,7 @@ def product_list(request):
             product.deal_tag = "Few Left"
         elif product.stock >= 20:
             product.deal_tag = "Top Deal"
-        elif product.price <= 500:
+        elif product.effective_price <= 500:
             product.deal_tag = "Daily Deal"
         else:
             product.deal_tag = ""
@@ -237,18 +257,45 @@ def product_list(request):
             )
             product.dynamic_image_url = image_result.image_url
 
-    categories = (
+    categories = list(
         Category.objects.filter(products__isnull=False, is_active=True)
         .distinct()
         .order_by("name")
     )
+    # Plain values only, so the cache never holds a queryset; the view
+    # rebuilds the Page from them.
+    return {
+        "items": list(page_obj.object_list),
+        "count": paginator.count,
+        "number": page_obj.number,
+        "categories": categories,
+    }
+
+
+@anonymous_replica_reads
+def product_list(request):
+    """Customer-facing product list with search and filter.
+
+    The listing itself is cached per catalog version; the page is rendered
+    per request because it carries the visitor's cart and CSRF token.
+    """
+    query = request.GET.get("q")
+    stock_filter = request.GET.get("stock_filter")
+    category = request.GET.get("category")
+    page_number = request.GET.get("page")
+
+    listing = CatalogCacheService.get_or_build(
+        "storefront",
+        lambda: _storefront_listing(query, stock_filter, category, page_number),
+        query, stock_filter, category, page_number,
+    )
 
     return render(
         request,
         "product/product_list.html",
         {
-            "products": page_obj,
-            "categories": categories,
+            "products": Page(listing["items"], listing["number"], Paginator(range(listing["count"]), STOREFRONT_PAGE_SIZE)),
+            "categories": listing["categories"],
             "selected_category": category,
         },
     )
@@ -257,6 +304,13 @@ def product_list(request):
 # ------------------------
 # Cart Views
 # ------------------------
+def _reprice_snapshot(request, item_data, product):
+    """Refresh a session cart line's price snapshot after a price or promotion change."""
+    if isinstance(item_data, dict) and item_data.get("price") != float(product.discounted_price):
+        item_data["price"] = float(product.discounted_price)
+        request.session.modified = True
+
+
 def cart_view(request):
     cart = request.session.get("cart", {})
     items, total = [], Decimal("0.00")
@@ -264,6 +318,7 @@ def cart_view(request):
     for product_id, item_data in cart.items():
         product = get_object_or_404(Product, id=product_id)
         quantity = item_data.get("quantity") if isinstance(item_data, dict) else int(item_data)
+        _reprice_snapshot(request, item_data, product)
         subtotal = product.discounted_price * quantity
         items.append({"product": product, "quantity": quantity, "subtotal": subtotal})
         total += subtotal
@@ -336,6 +391,7 @@ def checkout(request):
     for product_id, item_data in cart.items():
         product = get_object_or_404(Product, id=product_id)
         quantity = item_data.get("quantity") if isinstance(item_data, dict) else int(item_data)
+        _reprice_snapshot(request, item_data, product)
         subtotal = product.discounted_price * quantity
         items.append({"product": product, "quantity": quantity, "subtotal": subtotal})
         total += subtotal
@@ -399,11 +455,12 @@ def mark_order_paid(request, order_id):
 
 def apply_stock_deduction(order):
     """Reduce stock for each item when paid (log once)."""
-    for item in order.items.all():
-        if item.product.stock >= item.quantity:
-            item.product.stock -= item.quantity
-            item.product.save()
-            StockDeductionLog.objects.create(product=item.product, order=order, quantity=item.quantity, action="DEDUCT")
+    with stock_movement_context(StockMovement.SALE, order=order):
+        for item in order.items.all():
+            if item.product.stock >= item.quantity:
+                item.product.stock -= item.quantity
+                item.product.save()
+                StockDeductionLog.objects.create(product=item.product, order=order, quantity=item.quantity, action="DEDUCT")
 
 
 # ------------------------
@@ -411,6 +468,7 @@ def apply_stock_deduction(order):
 # ------------------------
 @login_required
 @user_passes_test(is_cashier_or_owner)
+@replica_reads()
 def dashboard(request):
     filter_option = request.GET.get("filter", "month")
     today = now().date()
@@ -433,7 +491,7 @@ def dashboard(request):
 
     uncollected_orders = Order.objects.filter(status__in=["PAID", "SHIPPED"]).exclude(payments__isnull=True)
 
-    low_stock_products = Product.objects.filter(stock__lte=5)
+    low_stock_products = Product.objects.exclude(stock_status=IN_STOCK)
     recent_orders = Order.objects.filter(created_at__date__gte=start_date).order_by("-created_at")[:10]
 
     order_status_data = {
@@ -528,48 +586,29 @@ def receipt(request, order_id):
     })
 
 
-def receipt_pdf(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-
-    # Header
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(100, 800, f"Receipt - Order #{order.id}")
-
-    p.setFont("Helvetica", 12)
-    p.drawString(100, 780, f"Date: {order.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
-    p.drawString(100, 765, f"Customer: {order.customer.phone_number if order.customer else 'N/A'}")
-    p.drawString(100, 750, f"Status: {order.status}")
-
-    # Table header
-    y = 720
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(100, y, "Product")
-    p.drawString(250, y, "Qty")
-    p.drawString(300, y, "Price")
-    p.drawString(380, y, "Subtotal")
-
-    # Table rows
-    p.setFont("Helvetica", 12)
-    y -= 20
-    for item in order.items.all():
-        p.drawString(100, y, item.product.name)
-        p.drawString(250, y, str(item.quantity))
-        p.drawString(300, y, str(item.price))
-        p.drawString(380, y, str(item.subtotal))
-        y -= 20
-
-    # Total
-    y -= 20
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(100, y, f"Total: {order.total_price}")
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-
-    return FileResponse(buffer, as_attachment=True, filename=f"receipt_{order.id}.pdf")
+def order_qr(request, order_id):
+    """Verify-link QR code PNG for an order, served from the QR cache."""
+    # Built from the configured site URL, not the request's Host and scheme,
+    # so clients cannot make the cache render and store one PNG per variant.
+    verify_url = settings.BASE_URL.rstrip("/") + reverse("product:verify_order", args=[order_id])
+    result = VerifyQRService.get_png(
+        order_id,
+        verify_url,
+        exists=lambda: Order.objects.filter(id=order_id).exists(),
+    )
+    if result is None:
+        raise Http404("Order not found")
+
+    content, fingerprint = result
+    etag = f'"qr-{fingerprint}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    response = HttpResponse(content, content_type="image/png")
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=86400"
+    return response
 
 
 def verify_order(request, order_id):
@@ -595,80 +634,6 @@ def check_payment_status(request, order_id):
     return JsonResponse({"status": order.status})
 
 
-# ------------------------
-# Export Reports
-# ------------------------
-@login_required
-@user_passes_test(is_cashier_or_owner)
-def export_excel(request):
-    today = now().date()
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sales Report"
-
-    # Header
-    ws.append(["Date", "Order ID", "Customer", "Total Price", "Status"])
-
-    orders = Order.objects.filter(created_at__date=today)
-    for o in orders:
-        ws.append([o.created_at.strftime("%Y-%m-%d"), o.id, o.customer.phone_number, float(o.total_price), o.status])
-
-    # Add Sales Trend Chart
-    chart = LineChart()
-    data = Reference(ws, min_col=4, min_row=2, max_row=ws.max_row)
-    chart.add_data(data, titles_from_data=False)
-    chart.title = "Daily Sales Trend"
-    ws.add_chart(chart, "G2")
-
-    # Add Refund Chart
-    refund_ws = wb.create_sheet(title="Refunds")
-    refund_ws.append(["Date", "Refund Amount"])
-
-    refunds = Payment.objects.filter(status="REFUNDED", transaction_date__date=today)
-    for r in refunds:
-        refund_ws.append([r.transaction_date.strftime("%Y-%m-%d"), float(r.amount)])
-
-    refund_chart = BarChart()
-    refund_data = Reference(refund_ws, min_col=2, min_row=2, max_row=refund_ws.max_row)
-    refund_chart.add_data(refund_data, titles_from_data=False)
-    refund_chart.title = "Refunds Trend"
-    refund_ws.add_chart(refund_chart, "D2")
-
-    # Save to response
-    filename = f"sales_report_{today}.xlsx"
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
-
-
-@login_required
-@user_passes_test(is_cashier_or_owner)
-def sales_graph(request):
-    today = now().date()
-    orders = (Order.objects.filter(status="PAID", created_at__date__gte=today - timedelta(days=30))
-              .values("created_at__date").annotate(total=Sum("total_price")).order_by("created_at__date"))
-
-    df = pd.DataFrame(list(orders))
-    if df.empty:
-        df = pd.DataFrame({"created_at__date": [today], "total": [0]})
-
-    plt.figure(figsize=(8, 4))
-    plt.plot(df["created_at__date"], df["total"], marker="o")
-    plt.title("Sales Over Last 30 Days")
-    plt.xlabel("Date")
-    plt.ylabel("Sales")
-    plt.xticks(rotation=45)
-
-    img_path = os.path.join(settings.MEDIA_ROOT, "sales_graph.png")
-    plt.tight_layout()
-    plt.savefig(img_path)
-    plt.close()
-
-    with open(img_path, "rb") as f:
-        return HttpResponse(f.read(), content_type="image/png")
-
-
 def remove_from_cart(request, pk):
     """Remove one product from cart."""
     cart = request.session.get("cart", {})
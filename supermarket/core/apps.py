@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "supermarket.core"
+    label = "core"
+
+    def ready(self):
+        import supermarket.core.signals  # noqa: F401
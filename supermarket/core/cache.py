@@ -0,0 +1,274 @@
+"""Two-tier cache backend: a bounded in-process LRU (L1) in front of a shared cache (L2).
+
+Reads are served from L1 when possible and fall through to L2 (Redis by
+default). Every write evicts the key locally and, when L2 is Redis, publishes
+the key on a pub/sub channel so other worker processes drop their L1 copy.
+L1 entries also expire after a short ``L1_TIMEOUT`` which bounds staleness if
+an invalidation message is ever missed.
+
+Configure it as a regular Django cache::
+
+    CACHES = {
+        "default": {
+            "BACKEND": "supermarket.core.cache.TieredCache",
+            "LOCATION": "redis://127.0.0.1:6379/1",
+            "OPTIONS": {"L1_MAX_ENTRIES": 1000, "L1_TIMEOUT": 5},
+        }
+    }
+"""
+import logging
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# L1 stores are per process (Django builds a cache object per thread).
+_l1_stores = {}
+_l1_stores_lock = threading.Lock()
+
+
+class L1Store:
+    """Thread-safe bounded LRU with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.origin = uuid.uuid4().hex
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "invalidations": 0}
+        self.subscriber = None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, pickled = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return pickled
+
+    def set(self, key, pickled, timeout=None):
+        ttl = self.timeout if timeout is None else min(self.timeout, timeout)
+        if ttl <= 0:
+            self.discard(key)
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, pickled)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def handle_invalidation(self, payload):
+        """Apply a ``"<origin>:<key>"`` message from another process."""
+        origin, _, key = payload.partition(":")
+        if origin == self.origin:
+            return
+        self.count("invalidations")
+        if key == "*":
+            self.clear()
+        else:
+            self.discard(key)
+
+
+class TieredCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = dict(params.get("OPTIONS") or {})
+        l2_backend = options.pop("L2_BACKEND", "django.core.cache.backends.redis.RedisCache")
+        l1_max_entries = int(options.pop("L1_MAX_ENTRIES", 1000))
+        l1_timeout = float(options.pop("L1_TIMEOUT", 5))
+        self.channel = options.pop("INVALIDATION_CHANNEL", "cache:l1:invalidate")
+
+        l2_params = {key: value for key, value in params.items() if key not in ("BACKEND", "OPTIONS")}
+        l2_params["OPTIONS"] = options.pop("L2_OPTIONS", {})
+        self.l2 = import_string(l2_backend)(location, l2_params)
+        self.location = location
+        self._pubsub_enabled = isinstance(location, str) and location.startswith(("redis://", "rediss://", "unix://"))
+
+        store_key = (location, l2_backend, self.key_prefix)
+        with _l1_stores_lock:
+            store = _l1_stores.get(store_key)
+            if store is None:
+                store = _l1_stores[store_key] = L1Store(l1_max_entries, l1_timeout)
+        self.l1 = store
+        if self._pubsub_enabled:
+            self._ensure_subscriber()
+
+    # -- invalidation -------------------------------------------------------
+    def _redis_client(self):
+        import redis
+
+        return redis.Redis.from_url(self.location)
+
+    def _ensure_subscriber(self):
+        with _l1_stores_lock:
+            if self.l1.subscriber is not None:
+                return
+            thread = threading.Thread(target=self._listen, name="tiered-cache-invalidation", daemon=True)
+            self.l1.subscriber = thread
+        thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything cached while we were disconnected may be stale.
+                self.l1.clear()
+                for message in pubsub.listen():
+                    data = message.get("data")
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    if data:
+                        self.l1.handle_invalidation(data)
+            except Exception as exc:
+                logger.warning("L1 cache invalidation listener disconnected: %s", exc)
+                time.sleep(1)
+
+    def _invalidate(self, key):
+        if key == "*":
+            self.l1.clear()
+        else:
+            self.l1.discard(key)
+        if not self._pubsub_enabled:
+            return
+        try:
+            self._publisher.publish(self.channel, f"{self.l1.origin}:{key}")
+        except Exception as exc:
+            logger.warning("Could not publish L1 cache invalidation for %s: %s", key, exc)
+
+    @property
+    def _publisher(self):
+        client = getattr(self, "_publisher_client", None)
+        if client is None:
+            client = self._publisher_client = self._redis_client()
+        return client
+
+    # -- cache API ----------------------------------------------------------
+    def _remember(self, key, value, timeout=DEFAULT_TIMEOUT):
+        backend_timeout = self.get_backend_timeout(timeout)
+        ttl = None if backend_timeout is None else backend_timeout - time.time()
+        self.l1.set(key, pickle.dumps(value, self.pickle_protocol), ttl)
+
+    def get(self, key, default=None, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        pickled = self.l1.get(full_key)
+        if pickled is not None:
+            self.l1.count("l1_hits")
+            return pickle.loads(pickled)
+
+        sentinel = object()
+        value = self.l2.get(key, sentinel, version=version)
+        if value is sentinel:
+            self.l1.count("misses")
+            return default
+        self.l1.count("l2_hits")
+        self._remember(full_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            full_key = self.make_and_validate_key(key, version=version)
+            pickled = self.l1.get(full_key)
+            if pickled is None:
+                missing.append(key)
+            else:
+                self.l1.count("l1_hits")
+                found[key] = pickle.loads(pickled)
+
+        if missing:
+            from_l2 = self.l2.get_many(missing, version=version)
+            for key in missing:
+                if key in from_l2:
+                    self.l1.count("l2_hits")
+                    self._remember(self.make_key(key, version=version), from_l2[key])
+                    found[key] = from_l2[key]
+                else:
+                    self.l1.count("misses")
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, timeout=timeout, version=version)
+        self._invalidate(full_key)
+        self._remember(full_key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout=timeout, version=version)
+        for key, value in data.items():
+            full_key = self.make_and_validate_key(key, version=version)
+            self._invalidate(full_key)
+            if key not in failed:
+                self._remember(full_key, value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        added = self.l2.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._invalidate(full_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.l1.discard(full_key)
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        deleted = self.l2.delete(key, version=version)
+        self._invalidate(full_key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self.l2.delete_many(keys, version=version)
+        for key in keys:
+            self._invalidate(self.make_and_validate_key(key, version=version))
+
+    def has_key(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        if self.l1.get(full_key) is not None:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        value = self.l2.incr(key, delta=delta, version=version)
+        self._invalidate(full_key)
+        return value
+
+    def clear(self):
+        self.l2.clear()
+        self._invalidate("*")
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def stats(self):
+        """Hit/miss counters for this process' L1 tier."""
+        return dict(self.l1.stats, l1_entries=len(self.l1._data))
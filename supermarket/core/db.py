@@ -0,0 +1,62 @@
+"""Per-connection database tuning.
+
+SQLite defaults (rollback journal, ``synchronous=FULL``, no busy timeout) make
+concurrent checkout and M-Pesa callback writes fail with "database is locked".
+WAL lets readers proceed alongside a single writer, ``busy_timeout`` makes
+writers wait for the lock instead of erroring, and ``synchronous=NORMAL`` is
+durable across application crashes in WAL mode while avoiding an fsync per
+commit.
+
+The journal mode is stored in the database file itself, so WAL is switched
+on once by the ``core`` migration (or ``enable_wal``) rather than on every
+connection, which would rewrite the file header from any management
+command.
+"""
+from django.conf import settings
+
+DEFAULT_SQLITE_PRAGMAS = {
+    "busy_timeout": 20000,
+    "synchronous": "NORMAL",
+}
+
+
+def sqlite_pragmas():
+    return getattr(settings, "SQLITE_PRAGMAS", DEFAULT_SQLITE_PRAGMAS)
+
+
+def configure_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver applying ``settings.SQLITE_PRAGMAS``."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+
+
+def enable_wal(connection):
+    """Switch an SQLite database file to WAL; returns the resulting journal mode.
+
+    Must run outside a transaction. In-memory databases stay ``memory``.
+    """
+    if connection.vendor != "sqlite":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        return cursor.fetchone()[0]
+
+
+def describe_connection(connection):
+    """Settings that matter for concurrency, for benchmarks and diagnostics."""
+    info = {
+        "vendor": connection.vendor,
+        "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+        "health_checks": connection.settings_dict.get("CONN_HEALTH_CHECKS"),
+    }
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for name in ("journal_mode", "busy_timeout", "synchronous"):
+                cursor.execute(f"PRAGMA {name}")
+                info[name] = cursor.fetchone()[0]
+    else:
+        info["pool"] = bool(connection.settings_dict.get("OPTIONS", {}).get("pool"))
+    return info
@@ -0,0 +1,91 @@
+"""Primary/replica routing for read-heavy reporting and catalog paths.
+
+Reads go to the replica only inside a ``replica_reads()`` block (usable as a
+context manager or view decorator) and only when
+``settings.DATABASE_REPLICA_ALIAS`` names a configured database. Everything
+else, including every write, stays on the primary. Once a block writes, the
+rest of it reads from the primary too, so a flow never misses its own
+writes because of replication lag.
+
+Flows that must see a write from another request (payment status polling
+after the STK callback, checkout) simply never opt in.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Sessions, auth and token state must never be read stale.
+PRIMARY_ONLY_APPS = {"sessions", "auth", "contenttypes", "core"}
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_pinned_to_primary = ContextVar("pinned_to_primary", default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, "DATABASE_REPLICA_ALIAS", None)
+    if alias and alias in settings.DATABASES:
+        return alias
+    return None
+
+
+class replica_reads:
+    """Route reads in this block to the replica until the block writes.
+
+    Use as ``with replica_reads():`` or as a decorator on sync or async views.
+    """
+
+    def __enter__(self):
+        self._tokens = (_replica_reads.set(True), _pinned_to_primary.set(False))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        reads_token, pinned_token = self._tokens
+        _pinned_to_primary.reset(pinned_token)
+        _replica_reads.reset(reads_token)
+        return False
+
+    def __call__(self, func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_inner(*args, **kwargs):
+                with replica_reads():
+                    return await func(*args, **kwargs)
+            return async_inner
+
+        @wraps(func)
+        def inner(*args, **kwargs):
+            with replica_reads():
+                return func(*args, **kwargs)
+        return inner
+
+
+def anonymous_replica_reads(view_func):
+    """Serve anonymous visitors from the replica; signed-in users read their own writes."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+        with replica_reads():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or _pinned_to_primary.get():
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        _pinned_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
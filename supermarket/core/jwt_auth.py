@@ -1,31 +1,222 @@
 import datetime
+import hashlib
+import hmac
+import uuid
+from dataclasses import dataclass
 from functools import wraps
+from typing import Optional
+
 import jwt
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from .models import RefreshToken
 from .responses import api_error
 
 
 JWT_ALGORITHM = "HS256"
-JWT_EXP_MINUTES = 60 * 12
+JWT_EXP_MINUTES = getattr(settings, "JWT_ACCESS_TOKEN_MINUTES", 15)
+JWT_REFRESH_DAYS = getattr(settings, "JWT_REFRESH_TOKEN_DAYS", 30)
+
+# How long a validated principal is trusted before the user row is re-read.
+PRINCIPAL_CACHE_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class ApiPrincipal:
+    """Authenticated API caller built from token claims and cached user state."""
+
+    user_id: int
+    username: str
+    is_staff: bool
+    customer_id: Optional[int]
 
 
 def _jwt_secret():
     return settings.SECRET_KEY
 
 
-def create_access_token(user):
-    now = datetime.datetime.utcnow()
+def _principal_cache_key(user_id):
+    return f"jwt:principal:{user_id}"
+
+
+def _denylist_cache_key(jti):
+    return f"jwt:deny:{jti}"
+
+
+class TokenError(Exception):
+    """Raised when a refresh token cannot be used."""
+
+
+def token_version(password_hash, is_active):
+    """Short digest that changes when the password changes or the user is deactivated."""
+    message = f"{password_hash}:{int(bool(is_active))}".encode("utf-8")
+    return hmac.new(_jwt_secret().encode("utf-8"), message, hashlib.sha256).hexdigest()[:16]
+
+
+def load_principal_state(user_id):
+    """Return cached ``{"ver", "active", "staff"}`` for a user, reading the DB on a miss."""
+    key = _principal_cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            User.objects.filter(id=user_id)
+            .values("password", "is_active", "is_staff", "is_superuser")
+            .first()
+        )
+        if row is None:
+            state = {"ver": None, "active": False, "staff": False}
+        else:
+            state = {
+                "ver": token_version(row["password"], row["is_active"]),
+                "active": row["is_active"],
+                "staff": row["is_staff"] or row["is_superuser"],
+            }
+        cache.set(key, state, timeout=PRINCIPAL_CACHE_SECONDS)
+    return state
+
+
+def invalidate_principal(user_id):
+    """Forget cached user state so the next request re-validates its token version."""
+    cache.delete(_principal_cache_key(user_id))
+
+
+def _customer_id_for(user):
+    try:
+        return user.customer_profile.id
+    except ObjectDoesNotExist:
+        return None
+
+
+def create_access_token(user, customer_id=None):
+    now = timezone.now()
+    if customer_id is None:
+        customer_id = _customer_id_for(user)
     payload = {
         "sub": str(user.id),
+        "typ": "access",
+        "jti": uuid.uuid4().hex,
         "username": user.username,
         "is_staff": user.is_staff,
+        "cid": customer_id,
+        "ver": token_version(user.password, user.is_active),
         "iat": now,
         "exp": now + datetime.timedelta(minutes=JWT_EXP_MINUTES),
     }
     return jwt.encode(payload, _jwt_secret(), algorithm=JWT_ALGORITHM)
 
 
+def create_refresh_token(user, family=None):
+    """Issue a refresh token and record it for rotation/revocation."""
+    now = timezone.now()
+    expires_at = now + datetime.timedelta(days=JWT_REFRESH_DAYS)
+    record = RefreshToken.objects.create(
+        jti=uuid.uuid4().hex,
+        family=family or uuid.uuid4().hex,
+        user=user,
+        expires_at=expires_at,
+    )
+    payload = {
+        "sub": str(user.id),
+        "typ": "refresh",
+        "jti": record.jti,
+        "fam": record.family,
+        "ver": token_version(user.password, user.is_active),
+        "iat": now,
+        "exp": expires_at,
+    }
+    return jwt.encode(payload, _jwt_secret(), algorithm=JWT_ALGORITHM)
+
+
+def issue_token_pair(user, customer_id=None, family=None):
+    return {
+        "token": create_access_token(user, customer_id=customer_id),
+        "refresh_token": create_refresh_token(user, family=family),
+        "expires_in": JWT_EXP_MINUTES * 60,
+    }
+
+
+def revoke_token_family(family):
+    RefreshToken.objects.filter(family=family, revoked_at__isnull=True).update(revoked_at=timezone.now())
+
+
+def rotate_refresh_token(raw_token):
+    """Exchange a refresh token for a new token pair, revoking the old one.
+
+    Presenting an already-rotated token revokes its whole family, since that
+    means the token was copied.
+    """
+    try:
+        payload = decode_token(raw_token)
+    except jwt.ExpiredSignatureError:
+        raise TokenError("Refresh token expired")
+    except jwt.InvalidTokenError:
+        raise TokenError("Invalid refresh token")
+    if payload.get("typ") != "refresh":
+        raise TokenError("Invalid refresh token")
+
+    error = None
+    with transaction.atomic():
+        record = (
+            RefreshToken.objects.select_for_update()
+            .select_related("user")
+            .filter(jti=payload.get("jti"))
+            .first()
+        )
+        if record is None:
+            raise TokenError("Invalid refresh token")
+
+        user = record.user
+        if record.revoked_at is not None:
+            error = "Refresh token reuse detected"
+        elif not user.is_active or payload.get("ver") != token_version(user.password, user.is_active):
+            error = "Refresh token revoked"
+
+        if error:
+            revoke_token_family(record.family)
+        else:
+            record.revoked_at = timezone.now()
+            record.save(update_fields=["revoked_at"])
+            tokens = issue_token_pair(user, family=record.family)
+
+    if error:
+        raise TokenError(error)
+    return user, tokens
+
+
+def revoke_refresh_token(raw_token):
+    """Revoke the family of a refresh token (logout); ignores unusable tokens."""
+    try:
+        payload = decode_token(raw_token)
+    except jwt.InvalidTokenError:
+        return False
+    if payload.get("typ") != "refresh" or not payload.get("fam"):
+        return False
+    revoke_token_family(payload["fam"])
+    return True
+
+
+def deny_access_token(payload):
+    """Put an access token's jti on the cache denylist until it would expire anyway."""
+    jti = payload.get("jti")
+    if not jti:
+        return
+    remaining = int(payload["exp"] - timezone.now().timestamp())
+    if remaining > 0:
+        cache.set(_denylist_cache_key(jti), True, timeout=remaining)
+
+
+def purge_expired_refresh_tokens():
+    """Delete refresh-token rows that can no longer be used."""
+    deleted, _ = RefreshToken.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
+
+
 def decode_token(raw_token):
     return jwt.decode(raw_token, _jwt_secret(), algorithms=[JWT_ALGORITHM])
 
@@ -37,6 +228,24 @@ def get_bearer_token(request):
     return header.replace("Bearer ", "", 1).strip()
 
 
+def authenticate_token(payload):
+    """Build an ``ApiPrincipal`` from a decoded token, or ``None`` if it was revoked."""
+    if payload.get("typ", "access") != "access":
+        return None
+    user_id = int(payload["sub"])
+    if payload.get("jti") and cache.get(_denylist_cache_key(payload["jti"])):
+        return None
+    state = load_principal_state(user_id)
+    if not state["active"] or not payload.get("ver") or payload["ver"] != state["ver"]:
+        return None
+    return ApiPrincipal(
+        user_id=user_id,
+        username=payload.get("username", ""),
+        is_staff=state["staff"],
+        customer_id=payload.get("cid"),
+    )
+
+
 def jwt_required(staff_only=False):
     def decorator(view_func):
         @wraps(view_func)
@@ -46,16 +255,20 @@ def jwt_required(staff_only=False):
                 return api_error("Missing Bearer token", status=401)
             try:
                 payload = decode_token(token)
-                user = User.objects.get(id=int(payload["sub"]), is_active=True)
+                principal = authenticate_token(payload)
             except jwt.ExpiredSignatureError:
                 return api_error("Token expired", status=401)
             except Exception:
                 return api_error("Invalid token", status=401)
 
-            if staff_only and not (user.is_staff or user.is_superuser):
+            if principal is None:
+                return api_error("Invalid token", status=401)
+
+            if staff_only and not principal.is_staff:
                 return api_error("Forbidden", status=403)
 
-            request.api_user = user
+            request.api_principal = principal
+            request.api_user = SimpleLazyObject(lambda: User.objects.get(id=principal.user_id))
             request.api_token_payload = payload
             return view_func(request, *args, **kwargs)
         return wrapper
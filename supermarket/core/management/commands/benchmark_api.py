@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+DEFAULT_PATHS = ("/api/products/", "/api/categories/")
+HANDLERS = ("wsgi", "asgi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync WSGI handler (thread pool) and the ASGI handler "
+        "(one event loop) for API endpoints, in process and against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path", dest="paths", action="append",
+            help="Endpoint to request, e.g. /payment/status/1/ (repeatable; defaults to the catalog API)",
+        )
+        parser.add_argument("--handler", choices=HANDLERS + ("both",), default="both")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and handler")
+        parser.add_argument("--concurrency", type=int, default=50, help="Threads (WSGI) or in-flight requests (ASGI)")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+
+        # Spread requests over client IPs so per-IP rate limits do not skew the numbers.
+        self.addresses = itertools.cycle(f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}" for n in range(1, 2**20))
+        self.address_lock = threading.Lock()
+
+        handlers = HANDLERS if options["handler"] == "both" else (options["handler"],)
+        # The in-process test clients always send Host: testserver.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for path in options["paths"] or DEFAULT_PATHS:
+                for handler in handlers:
+                    run = self._run_wsgi if handler == "wsgi" else self._run_asgi
+                    result = run(path, options["requests"], options["concurrency"])
+                    self._report(handler, path, result, options["concurrency"])
+
+    def _headers(self):
+        with self.address_lock:
+            address = next(self.addresses)
+        return {"x-forwarded-for": address}
+
+    def _run_wsgi(self, path, total, concurrency):
+        local = threading.local()
+        latencies, statuses = [], []
+
+        def one(_):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = Client(raise_request_exception=False)
+            started = time.perf_counter()
+            response = client.get(path, headers=self._headers())
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for latency, status in pool.map(one, range(total)):
+                latencies.append(latency)
+                statuses.append(status)
+        elapsed = time.perf_counter() - started
+        connections.close_all()
+        return {"elapsed": elapsed, "latencies": latencies, "statuses": statuses}
+
+    def _run_asgi(self, path, total, concurrency):
+        async def main():
+            client = AsyncClient(raise_request_exception=False)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(path, headers=self._headers())
+                    return time.perf_counter() - started, response.status_code
+
+            return await asyncio.gather(*(one() for _ in range(total)))
+
+        started = time.perf_counter()
+        results = asyncio.run(main())
+        elapsed = time.perf_counter() - started
+        connections.close_all()
+        return {
+            "elapsed": elapsed,
+            "latencies": [latency for latency, _ in results],
+            "statuses": [status for _, status in results],
+        }
+
+    def _report(self, handler, path, result, concurrency):
+        latencies = sorted(result["latencies"])
+        done = len(latencies)
+        failed = sum(1 for status in result["statuses"] if status >= 400)
+        p95 = latencies[min(done - 1, int(done * 0.95))] * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {handler.upper()} {path}: {done} requests ({failed} non-2xx/3xx) at concurrency {concurrency} "
+            f"in {result['elapsed']:.2f}s ({done / result['elapsed']:.1f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95:.1f} ms)"
+        ))
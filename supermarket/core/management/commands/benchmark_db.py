@@ -0,0 +1,146 @@
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from payment.models import Payment, StockDeductionLog
+from payment.utils import apply_stock_deduction
+from product.models import Customer, Order, OrderItem, Product
+from supermarket.core.db import describe_connection
+
+WORKLOADS = ("checkout", "callback")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent checkout and M-Pesa callback throughput against the configured database. "
+        "Run once per DB_ENGINE setting to compare SQLite and PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workload", choices=WORKLOADS + ("all",), default="all")
+        parser.add_argument("--concurrency", type=int, default=8, help="Worker threads")
+        parser.add_argument("--operations", type=int, default=200, help="Operations per workload")
+        parser.add_argument("--items", type=int, default=3, help="Order lines per checkout")
+        parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["operations"] < 1:
+            raise CommandError("--concurrency and --operations must be positive")
+
+        info = describe_connection(connection)
+        self.stdout.write(self.style.WARNING("Database: " + ", ".join(f"{k}={v}" for k, v in info.items())))
+
+        tag = f"bench-{uuid.uuid4().hex[:8]}"
+        products, customer = self._create_fixtures(tag, options["items"])
+        workloads = WORKLOADS if options["workload"] == "all" else (options["workload"],)
+        try:
+            for workload in workloads:
+                if workload == "checkout":
+                    jobs = [lambda: self._checkout(customer, products)] * options["operations"]
+                else:
+                    jobs = [
+                        (lambda order_id: lambda: self._callback(order_id))(order_id)
+                        for order_id in self._pending_orders(customer, products, options["operations"])
+                    ]
+                self._report(workload, self._run(jobs, options["concurrency"]), options["concurrency"])
+        finally:
+            if not options["keep"]:
+                Order.objects.filter(customer=customer).delete()
+                Product.objects.filter(id__in=[p.id for p in products]).delete()
+                customer.delete()
+
+    # -- fixtures -----------------------------------------------------------
+    def _create_fixtures(self, tag, item_count):
+        customer = Customer.objects.create(name=tag, phone_number="254700000000")
+        products = [
+            Product.objects.create(name=f"{tag}-{index}", price=Decimal("100.00"), stock=1_000_000)
+            for index in range(item_count)
+        ]
+        return products, customer
+
+    def _pending_orders(self, customer, products, count):
+        order_ids = []
+        for _ in range(count):
+            order = self._checkout(customer, products)
+            Payment.objects.create(order=order, amount=order.total_price, status=Payment.STATUS_PENDING)
+            order_ids.append(order.id)
+        return order_ids
+
+    # -- workloads ----------------------------------------------------------
+    @staticmethod
+    def _checkout(customer, products):
+        """The write path of order creation: one order plus its lines."""
+        with transaction.atomic():
+            order = Order.objects.create(
+                customer=customer, total_price=sum(p.price for p in products), status="PENDING"
+            )
+            OrderItem.objects.bulk_create(
+                [OrderItem(order=order, product=p, quantity=1, price=p.price) for p in products]
+            )
+        return order
+
+    @staticmethod
+    def _callback(order_id):
+        """The write path of a successful STK callback, without the notification tasks."""
+        order = Order.objects.get(id=order_id)
+        payment = Payment.objects.filter(order=order).order_by("-id").first()
+        with transaction.atomic():
+            payment.status = Payment.STATUS_PAID
+            payment.mpesa_receipt_no = f"BENCH{order_id}"
+            payment.transaction_date = timezone.now()
+            payment.save()
+            order.status = "PAID"
+            order.save(update_fields=["status"])
+            apply_stock_deduction(order, payment=payment, source=StockDeductionLog.AUTO)
+
+    # -- runner -------------------------------------------------------------
+    def _run(self, jobs, concurrency):
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def run(job):
+            started = time.perf_counter()
+            try:
+                job()
+            except Exception as exc:
+                with lock:
+                    errors.append(exc)
+            else:
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+        def worker(chunk):
+            try:
+                for job in chunk:
+                    run(job)
+            finally:
+                connections.close_all()
+
+        chunks = [jobs[index::concurrency] for index in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, chunks))
+        return {"elapsed": time.perf_counter() - started, "latencies": latencies, "errors": errors}
+
+    def _report(self, workload, result, concurrency):
+        latencies = sorted(result["latencies"])
+        done = len(latencies)
+        throughput = done / result["elapsed"] if result["elapsed"] else 0
+        if latencies:
+            p50 = statistics.median(latencies) * 1000
+            p95 = latencies[min(done - 1, int(done * 0.95))] * 1000
+        else:
+            p50 = p95 = 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {workload}: {done} ok, {len(result['errors'])} failed with {concurrency} threads in "
+            f"{result['elapsed']:.2f}s ({throughput:.1f} ops/s, p50 {p50:.1f} ms, p95 {p95:.1f} ms)"
+        ))
+        if result["errors"]:
+            self.stdout.write(self.style.ERROR(f"  first error: {result['errors'][0]!r}"))
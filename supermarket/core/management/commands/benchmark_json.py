@@ -0,0 +1,87 @@
+import gzip
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+
+from product.models import Category, Product
+from product.services.image_service import ImageResult
+from product.services.product_service import ProductCatalogService
+from supermarket.core import responses
+
+
+class Command(BaseCommand):
+    help = "Compare API JSON encoders and response compression on a synthetic catalog page"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=50, help="Products on the page")
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        payload = self._catalog_page(options["items"])
+        iterations = options["iterations"]
+
+        def legacy():
+            # Previous implementation: float() by hand, then JsonResponse.
+            items = [
+                {**item, "price": float(item["price"]), "discounted_price": float(item["discounted_price"])}
+                for item in payload["items"]
+            ]
+            return JsonResponse({"ok": True, "message": "OK", "data": {**payload, "items": items}}).content
+
+        candidates = {"legacy JsonResponse": legacy}
+        for name in responses.JSON_ENCODERS:
+            candidates[f"{name} encoder"] = (
+                lambda name=name: responses.dump_json({"ok": True, "message": "OK", "data": payload}, encoder=name)
+            )
+
+        baseline = None
+        for label, encode in candidates.items():
+            elapsed = self._time(encode, iterations)
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{label:<22} {elapsed / iterations * 1e6:8.1f} µs/page  "
+                f"{len(encode()):7d} bytes  x{baseline / elapsed:.2f}"
+            )
+
+        body = responses.dump_json({"ok": True, "message": "OK", "data": payload})
+        compressors = {"gzip": lambda: gzip.compress(body, compresslevel=6, mtime=0)}
+        if responses.brotli is not None:
+            compressors["brotli"] = lambda: responses.brotli.compress(body, quality=5)
+        for label, compress in compressors.items():
+            elapsed = self._time(compress, max(1, iterations // 10))
+            self.stdout.write(
+                f"{label:<22} {elapsed / max(1, iterations // 10) * 1e6:8.1f} µs/page  "
+                f"{len(compress()):7d} bytes"
+            )
+        if responses.brotli is None:
+            self.stdout.write(self.style.WARNING("brotli not installed; skipped"))
+
+    @staticmethod
+    def _time(func, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return time.perf_counter() - started
+
+    @staticmethod
+    def _catalog_page(count):
+        category = Category(name="Groceries", slug="groceries")
+        items = []
+        for index in range(count):
+            product = Product(
+                id=index + 1,
+                name=f"Product {index}",
+                description="Fresh supermarket product with a reasonably long description " * 2,
+                price=Decimal("149.99") + index,
+                discount_percentage=index % 30,
+                stock=index * 3,
+                barcode=f"6001234{index:06d}",
+                category=category,
+            )
+            product.effective_price = product.discounted_price
+            image = ImageResult(f"https://images.example.com/products/{index}.jpg", "cache")
+            items.append(ProductCatalogService._serialize(product, image))
+        pagination = {"page": 1, "pages": 4, "total": count * 4, "has_next": True, "has_previous": False}
+        return {"items": items, "pagination": pagination}
@@ -1,32 +1,64 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse
 from django.conf import settings
 
 
 class ApiExceptionMiddleware:
-    """Catch unhandled API exceptions and return consistent JSON."""
+    """Catch unhandled API exceptions and return consistent JSON.
+
+    Supports both sync and async request handling so async API views are not
+    forced back onto a thread under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _add_cors_headers(response):
+        response["Access-Control-Allow-Origin"] = "*"
+        response["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
+        response["Access-Control-Allow-Methods"] = "GET, POST, PATCH, DELETE, OPTIONS"
+        return response
+
+    @staticmethod
+    def _error_response(exc):
+        payload = {"ok": False, "message": "Internal server error"}
+        if settings.DEBUG:
+            payload["detail"] = str(exc)
+        return JsonResponse(payload, status=500)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         if request.path.startswith("/api/") and request.method == "OPTIONS":
-            response = JsonResponse({"ok": True, "message": "preflight"})
-            response["Access-Control-Allow-Origin"] = "*"
-            response["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
-            response["Access-Control-Allow-Methods"] = "GET, POST, PATCH, DELETE, OPTIONS"
-            return response
+            return self._add_cors_headers(JsonResponse({"ok": True, "message": "preflight"}))
 
         try:
             response = self.get_response(request)
             if request.path.startswith("/api/"):
-                response["Access-Control-Allow-Origin"] = "*"
-                response["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
-                response["Access-Control-Allow-Methods"] = "GET, POST, PATCH, DELETE, OPTIONS"
+                self._add_cors_headers(response)
+            return response
+        except Exception as exc:
+            if request.path.startswith("/api/"):
+                return self._error_response(exc)
+            raise
+
+    async def __acall__(self, request):
+        if request.path.startswith("/api/") and request.method == "OPTIONS":
+            return self._add_cors_headers(JsonResponse({"ok": True, "message": "preflight"}))
+
+        try:
+            response = await self.get_response(request)
+            if request.path.startswith("/api/"):
+                self._add_cors_headers(response)
             return response
         except Exception as exc:
             if request.path.startswith("/api/"):
-                payload = {"ok": False, "message": "Internal server error"}
-                if settings.DEBUG:
-                    payload["detail"] = str(exc)
-                return JsonResponse(payload, status=500)
+                return self._error_response(exc)
             raise
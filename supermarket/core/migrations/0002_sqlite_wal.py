@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from supermarket.core.db import enable_wal
+
+
+def switch_to_wal(apps, schema_editor):
+    enable_wal(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    # SQLite cannot change the journal mode inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(switch_to_wal, migrations.RunPython.noop),
+    ]
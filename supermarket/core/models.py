@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.db import models
+
+
+class RefreshToken(models.Model):
+    """Issued refresh token, kept only for rotation and revocation checks."""
+    jti = models.CharField(max_length=32, unique=True)
+    family = models.CharField(max_length=32, db_index=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="refresh_tokens")
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"RefreshToken({self.user_id}, {self.jti[:8]})"
@@ -1,25 +1,233 @@
+"""Sliding-window rate limiting for API endpoints.
+
+Counts are kept per (prefix, key) in two fixed buckets and the previous
+bucket is weighted by how much of it still overlaps the sliding window,
+which smooths out the burst a fixed window allows at its boundary.
+
+The backend is chosen with ``settings.RATE_LIMIT_BACKEND``:
+``RedisRateLimitBackend`` shares counters between all workers and updates
+them atomically with a Lua script; ``MemoryRateLimitBackend`` keeps them in
+process (tests and single-process development).
+"""
+import logging
+import math
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import wraps
-from django.core.cache import cache
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
 from .responses import api_error
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: int
+    retry_after: int = 0
+
+
+def _evaluate(allowed, current, previous, weight, limit, window_seconds, elapsed):
+    estimated = previous * weight + current
+    remaining = max(0, int(limit - math.ceil(estimated)))
+    reset_after = max(1, math.ceil(window_seconds - elapsed))
+    retry_after = 0
+    if not allowed:
+        if current >= limit or previous == 0:
+            retry_after = reset_after
+        else:
+            # Seconds until the decaying previous bucket lets one more request in.
+            needed_weight = (limit - current - 1) / previous
+            wait = window_seconds * (1 - needed_weight) - elapsed
+            retry_after = max(1, math.ceil(min(wait, reset_after)))
+    return RateLimitResult(allowed, limit, remaining, reset_after, retry_after)
+
+
+def _window_position(window_seconds, now=None):
+    now = time.time() if now is None else now
+    bucket = int(now // window_seconds)
+    elapsed = now - bucket * window_seconds
+    weight = 1 - (elapsed / window_seconds)
+    return bucket, elapsed, weight
+
+
+class MemoryRateLimitBackend:
+    """In-process sliding-window counters guarded by a lock.
+
+    Keys are kept in last-hit order with the time their counts stop
+    mattering (two windows after their bucket opened); each hit drops
+    expired keys from the old end, and the least recently hit ones once
+    there are more than ``max_keys``.
+    """
+
+    def __init__(self, max_keys=10000, **options):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window_seconds, now=None):
+        now = time.time() if now is None else now
+        bucket, elapsed, weight = _window_position(window_seconds, now)
+        with self._lock:
+            stored_bucket, current, previous, _ = self._buckets.pop(key, (bucket, 0, 0, None))
+            if stored_bucket == bucket - 1:
+                previous, current = current, 0
+            elif stored_bucket != bucket:
+                previous, current = 0, 0
+
+            allowed = previous * weight + current < limit
+            if allowed:
+                current += 1
+            self._buckets[key] = (bucket, current, previous, (bucket + 2) * window_seconds)
+            self._evict(now)
+
+        return _evaluate(allowed, current, previous, weight, limit, window_seconds, elapsed)
+
+    async def ahit(self, key, limit, window_seconds, now=None):
+        return self.hit(key, limit, window_seconds, now)
+
+    def _evict(self, now):
+        while self._buckets:
+            expires_at = next(iter(self._buckets.values()))[3]
+            if expires_at > now and len(self._buckets) <= self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+SLIDING_WINDOW_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit = tonumber(ARGV[1])
+local weight = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+if previous * weight + current >= limit then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return {1, current, previous}
+"""
+
 
-def rate_limit(key_prefix="api", limit=60, window_seconds=60):
-    """Simple fixed-window per-IP limiter for API endpoints."""
+class RedisRateLimitBackend:
+    """Shared counters in Redis, read-and-incremented atomically by one Lua script.
+
+    Async views run the same blocking client in a worker thread: a
+    ``redis.asyncio`` client is bound to the event loop that opened its
+    connections, and under WSGI every async view gets a loop of its own.
+    """
+
+    def __init__(self, url=None, **options):
+        import redis
+
+        self.url = url or settings.RATE_LIMIT_REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.script = self.client.register_script(SLIDING_WINDOW_LUA)
+
+    @staticmethod
+    def _keys(key, bucket):
+        return [f"rl:{key}:{bucket}", f"rl:{key}:{bucket - 1}"]
+
+    def hit(self, key, limit, window_seconds, now=None):
+        bucket, elapsed, weight = _window_position(window_seconds, now)
+        try:
+            allowed, current, previous = self.script(
+                keys=self._keys(key, bucket), args=[limit, weight, window_seconds * 2]
+            )
+        except Exception as exc:
+            # Fail open: an unavailable limiter must not take the API down.
+            logger.warning("Rate limiter unavailable, allowing request: %s", exc)
+            return RateLimitResult(True, limit, limit, window_seconds)
+        return _evaluate(bool(allowed), int(current), int(previous), weight, limit, window_seconds, elapsed)
+
+    async def ahit(self, key, limit, window_seconds, now=None):
+        return await sync_to_async(self.hit, thread_sensitive=False)(key, limit, window_seconds, now)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_rate_limit_backend():
+    """Return the process-wide rate limit backend, constructing it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(
+                    settings, "RATE_LIMIT_BACKEND", "supermarket.core.rate_limit.MemoryRateLimitBackend"
+                )
+                _backend = import_string(backend_path)(**getattr(settings, "RATE_LIMIT_BACKEND_OPTIONS", {}))
+    return _backend
+
+
+def reset_rate_limit_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def get_client_ip(request):
+    return request.META.get("HTTP_X_FORWARDED_FOR", request.META.get("REMOTE_ADDR", "unknown")).split(",")[0].strip()
+
+
+def rate_limit_identity(request, key="ip"):
+    """Identify the caller: ``"ip"``, ``"user"`` or ``"user_or_ip"``."""
+    if key in ("user", "user_or_ip"):
+        principal = getattr(request, "api_principal", None)
+        if principal is not None:
+            return f"user:{principal.user_id}"
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+    return f"ip:{get_client_ip(request)}"
+
+
+def apply_rate_limit_headers(response, result):
+    response["X-RateLimit-Limit"] = str(result.limit)
+    response["X-RateLimit-Remaining"] = str(result.remaining)
+    response["X-RateLimit-Reset"] = str(result.reset_after)
+    if not result.allowed:
+        response["Retry-After"] = str(result.retry_after)
+    return response
+
+
+def rate_limit(key_prefix="api", limit=60, window_seconds=60, key="ip"):
+    """Sliding-window limiter for API endpoints, keyed per IP and/or per user.
+
+    Works on sync and async views; async views use the backend's ``ahit``.
+    """
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                identity = rate_limit_identity(request, key)
+                result = await get_rate_limit_backend().ahit(f"{key_prefix}:{identity}", limit, window_seconds)
+                if not result.allowed:
+                    return apply_rate_limit_headers(api_error("Rate limit exceeded", status=429), result)
+                return apply_rate_limit_headers(await view_func(request, *args, **kwargs), result)
+            return async_wrapper
+
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            ip = request.META.get("HTTP_X_FORWARDED_FOR", request.META.get("REMOTE_ADDR", "unknown")).split(",")[0].strip()
-            bucket = int(time.time() // window_seconds)
-            cache_key = f"rl:{key_prefix}:{ip}:{bucket}"
-            try:
-                current = cache.incr(cache_key)
-            except ValueError:
-                cache.set(cache_key, 1, timeout=window_seconds)
-                current = 1
-
-            if current > limit:
-                return api_error("Rate limit exceeded", status=429)
-            return view_func(request, *args, **kwargs)
+            identity = rate_limit_identity(request, key)
+            result = get_rate_limit_backend().hit(f"{key_prefix}:{identity}", limit, window_seconds)
+            if not result.allowed:
+                return apply_rate_limit_headers(api_error("Rate limit exceeded", status=429), result)
+            return apply_rate_limit_headers(view_func(request, *args, **kwargs), result)
         return wrapper
     return decorator
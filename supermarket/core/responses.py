@@ -1,5 +1,101 @@
-from django.http import JsonResponse
+"""JSON response helpers for the API.
+
+Payloads are encoded by a pluggable encoder (``settings.API_JSON_ENCODER``:
+``"auto"`` uses orjson when it is installed, ``"stdlib"`` forces ``json``).
+Both encoders produce the same output: ``Decimal`` values are rounded to
+``settings.API_DECIMAL_PLACES`` (half-up, i.e. cents) and emitted as JSON
+numbers, datetimes/dates as ISO 8601 strings.
+"""
+import datetime
+import gzip
 import json
+import re
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def make_json_default(decimal_places=None):
+    """Build the fallback encoder for types the ORM hands us that JSON does not know."""
+    if decimal_places is None:
+        decimal_places = getattr(settings, "API_DECIMAL_PLACES", 2)
+    quantum = Decimal(1).scaleb(-decimal_places)
+
+    def default(value):
+        if isinstance(value, Decimal):
+            # Money columns have at most 12 digits, which a float represents
+            # exactly once rounded, so clients keep receiving numbers.
+            return float(value.quantize(quantum, rounding=ROUND_HALF_UP))
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, Promise):
+            return str(value)
+        # Subclasses of the builtins, e.g. form ``ErrorDict``/``ErrorList``, whose
+        # items do not live in the builtin storage orjson would read.
+        if isinstance(value, dict):
+            return dict(value)
+        if isinstance(value, (list, tuple)):
+            return list(value)
+        if isinstance(value, str):
+            return str.__str__(value)
+        if isinstance(value, int):
+            return int.__int__(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    return default
+
+
+def _stdlib_dumps(data, default):
+    return json.dumps(data, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_dumps(data, default):
+    # Datetimes and builtin subclasses go through ``default`` too so both encoders agree byte for byte.
+    return orjson.dumps(
+        data,
+        default=default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+JSON_ENCODERS = {"stdlib": _stdlib_dumps}
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = _orjson_dumps
+
+
+def get_json_encoder(name=None):
+    name = name or getattr(settings, "API_JSON_ENCODER", "auto")
+    if name == "auto":
+        name = "orjson" if "orjson" in JSON_ENCODERS else "stdlib"
+    return JSON_ENCODERS[name]
+
+
+def dump_json(data, encoder=None):
+    return get_json_encoder(encoder)(data, make_json_default())
+
+
+class ApiJSONResponse(HttpResponse):
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dump_json(data), **kwargs)
 
 
 def parse_json_body(request):
@@ -10,11 +106,57 @@ def parse_json_body(request):
 
 
 def api_success(data=None, message="OK", status=200):
-    return JsonResponse({"ok": True, "message": message, "data": data or {}}, status=status)
+    return ApiJSONResponse({"ok": True, "message": message, "data": data or {}}, status=status)
 
 
 def api_error(message="Bad request", status=400, errors=None):
     payload = {"ok": False, "message": message}
     if errors:
         payload["errors"] = errors
-    return JsonResponse(payload, status=status)
+    return ApiJSONResponse(payload, status=status)
+
+
+_accepts_br = re.compile(r"\bbr\b")
+_accepts_gzip = re.compile(r"\bgzip\b")
+
+
+def compress_response(request, response, min_size=None):
+    """Brotli- or gzip-encode a large response body if the client accepts it."""
+    min_size = getattr(settings, "API_COMPRESSION_MIN_BYTES", 2048) if min_size is None else min_size
+    if response.streaming or response.has_header("Content-Encoding") or len(response.content) < min_size:
+        return response
+
+    patch_vary_headers(response, ("Accept-Encoding",))
+    accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if brotli is not None and _accepts_br.search(accept):
+        content, encoding = brotli.compress(response.content, quality=5), "br"
+    elif _accepts_gzip.search(accept):
+        content, encoding = gzip.compress(response.content, compresslevel=6, mtime=0), "gzip"
+    else:
+        return response
+
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response["Content-Length"] = str(len(content))
+    response["Content-Encoding"] = encoding
+    # The representation changed, so a strong validator no longer matches it.
+    if response.has_header("ETag") and response["ETag"].startswith('"'):
+        response["ETag"] = "W/" + response["ETag"]
+    return response
+
+
+def compress_large_responses(min_size=None):
+    """View decorator applying ``compress_response``; works on sync and async views."""
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                return compress_response(request, await view_func(request, *args, **kwargs), min_size)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return compress_response(request, view_func(request, *args, **kwargs), min_size)
+        return wrapper
+    return decorator
@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .db import configure_connection
+from .jwt_auth import invalidate_principal
+from .rate_limit import reset_rate_limit_backend
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revalidate_api_tokens_on_user_change(sender, instance, **kwargs):
+    """Drop cached API principal so deactivation/password changes revoke tokens."""
+    invalidate_principal(instance.pk)
+
+
+@receiver(setting_changed)
+def reset_rate_limiter_on_settings_change(sender, setting, **kwargs):
+    if setting in ("RATE_LIMIT_BACKEND", "RATE_LIMIT_BACKEND_OPTIONS", "RATE_LIMIT_REDIS_URL"):
+        reset_rate_limit_backend()
+
+
+connection_created.connect(configure_connection, dispatch_uid="supermarket.core.db.configure_connection")
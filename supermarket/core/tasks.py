@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from .jwt_auth import purge_expired_refresh_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_expired_refresh_tokens_task():
+    """Keep the refresh-token table compact by dropping expired rows."""
+    deleted = purge_expired_refresh_tokens()
+    logger.info("Purged %s expired refresh token(s)", deleted)
+    return deleted
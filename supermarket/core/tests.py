@@ -0,0 +1,321 @@
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from product.forms import CustomerRegistrationForm
+from product.models import Category, Customer, Product
+from supermarket.core.cache import TieredCache
+from supermarket.core.db import describe_connection, enable_wal
+from supermarket.core.db_router import replica_reads
+from supermarket.core.jwt_auth import (
+    TokenError,
+    create_access_token,
+    decode_token,
+    deny_access_token,
+    issue_token_pair,
+    jwt_required,
+    rotate_refresh_token,
+)
+from supermarket.core.models import RefreshToken
+from supermarket.core.rate_limit import (
+    MemoryRateLimitBackend, RedisRateLimitBackend, get_rate_limit_backend, rate_limit,
+)
+from supermarket.core.responses import JSON_ENCODERS, api_success, compress_response, dump_json
+
+
+@jwt_required()
+def whoami(request):
+    principal = request.api_principal
+    return JsonResponse({"user_id": principal.user_id, "customer_id": principal.customer_id})
+
+
+@jwt_required(staff_only=True)
+def staff_only(request):
+    return JsonResponse({"ok": True})
+
+
+class StatelessJwtAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username="shopper", password="Pass12345")
+        self.customer = Customer.objects.create(user=self.user, phone_number="254700000000")
+        self.token = create_access_token(self.user)
+
+    def _call(self, view, token=None):
+        request = self.factory.get("/api/whoami/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}")
+        return view(request)
+
+    def test_token_carries_customer_id(self):
+        response = self._call(whoami)
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content, {"user_id": self.user.id, "customer_id": self.customer.id})
+
+    def test_warm_principal_needs_no_queries(self):
+        self._call(whoami)
+        with self.assertNumQueries(0):
+            response = self._call(whoami)
+        self.assertEqual(response.status_code, 200)
+
+    def test_deactivation_revokes_existing_tokens(self):
+        self._call(whoami)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self._call(whoami).status_code, 401)
+
+    def test_password_change_revokes_existing_tokens(self):
+        self.user.set_password("NewPass12345")
+        self.user.save()
+        self.assertEqual(self._call(whoami).status_code, 401)
+
+    def test_staff_only_uses_cached_staff_flag(self):
+        self.assertEqual(self._call(staff_only).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self._call(staff_only).status_code, 200)
+
+
+class RefreshTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username="shopper", password="Pass12345")
+
+    def test_rotation_issues_new_pair_and_revokes_old(self):
+        tokens = issue_token_pair(self.user)
+        _, rotated = rotate_refresh_token(tokens["refresh_token"])
+        self.assertNotEqual(rotated["refresh_token"], tokens["refresh_token"])
+        self.assertEqual(RefreshToken.objects.filter(revoked_at__isnull=True).count(), 1)
+
+    def test_reusing_rotated_token_revokes_family(self):
+        tokens = issue_token_pair(self.user)
+        _, rotated = rotate_refresh_token(tokens["refresh_token"])
+        with self.assertRaises(TokenError):
+            rotate_refresh_token(tokens["refresh_token"])
+        with self.assertRaises(TokenError):
+            rotate_refresh_token(rotated["refresh_token"])
+        self.assertFalse(RefreshToken.objects.filter(revoked_at__isnull=True).exists())
+
+    def test_denied_access_token_is_rejected(self):
+        token = create_access_token(self.user)
+        deny_access_token(decode_token(token))
+        request = self.factory.get("/api/whoami/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(whoami(request).status_code, 401)
+
+    def test_refresh_token_is_not_accepted_as_access_token(self):
+        tokens = issue_token_pair(self.user)
+        request = self.factory.get("/api/whoami/", HTTP_AUTHORIZATION=f"Bearer {tokens['refresh_token']}")
+        self.assertEqual(whoami(request).status_code, 401)
+
+
+@rate_limit(key_prefix="test", limit=3, window_seconds=60)
+def limited(request):
+    return JsonResponse({"ok": True})
+
+
+@jwt_required()
+@rate_limit(key_prefix="test-user", limit=1, window_seconds=60, key="user")
+def limited_per_user(request):
+    return JsonResponse({"ok": True})
+
+
+class SlidingWindowRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_rate_limit_backend().reset()
+        self.factory = RequestFactory()
+
+    def test_previous_window_is_weighted(self):
+        backend = MemoryRateLimitBackend()
+        for _ in range(10):
+            self.assertTrue(backend.hit("k", 10, 60, now=59).allowed)
+        # 25% into the next window, 75% of the previous ten still count.
+        result = backend.hit("k", 10, 60, now=75)
+        self.assertTrue(result.allowed)
+        for _ in range(2):
+            backend.hit("k", 10, 60, now=75)
+        blocked = backend.hit("k", 10, 60, now=75)
+        self.assertFalse(blocked.allowed)
+        self.assertGreater(blocked.retry_after, 0)
+
+    def test_memory_backend_forgets_idle_keys(self):
+        backend = MemoryRateLimitBackend(max_keys=3)
+        for client in range(5):
+            backend.hit(f"ip:{client}", 10, 60, now=10)
+        # Bounded by max_keys, least recently hit first.
+        self.assertEqual(list(backend._buckets), ["ip:2", "ip:3", "ip:4"])
+        # Two windows on, their counts no longer matter and are dropped.
+        backend.hit("ip:9", 10, 60, now=130)
+        self.assertEqual(list(backend._buckets), ["ip:9"])
+
+    def test_redis_backend_serves_async_views_from_separate_event_loops(self):
+        backend = RedisRateLimitBackend(url="redis://localhost:6379/15")
+        # Stands in for the server round trip; a failed call would fail open with the full limit left.
+        with mock.patch.object(backend, "script", return_value=[1, 1, 0]) as script:
+            results = [asyncio.run(backend.ahit("ip:1", 10, 60, now=10)) for _ in range(2)]
+        self.assertEqual(script.call_count, 2)
+        self.assertEqual([result.remaining for result in results], [9, 9])
+
+    def test_headers_and_retry_after(self):
+        for expected_remaining in ("2", "1", "0"):
+            response = limited(self.factory.get("/api/x/", REMOTE_ADDR="10.0.0.1"))
+            self.assertEqual(response["X-RateLimit-Remaining"], expected_remaining)
+
+        blocked = limited(self.factory.get("/api/x/", REMOTE_ADDR="10.0.0.1"))
+        self.assertEqual(blocked.status_code, 429)
+        self.assertIn("Retry-After", blocked)
+        self.assertEqual(limited(self.factory.get("/api/x/", REMOTE_ADDR="10.0.0.2")).status_code, 200)
+
+    def test_user_keyed_limits_are_independent_of_ip(self):
+        first = User.objects.create_user(username="a", password="Pass12345")
+        second = User.objects.create_user(username="b", password="Pass12345")
+
+        def call(user):
+            token = create_access_token(user)
+            request = self.factory.get("/api/x/", REMOTE_ADDR="10.0.0.1", HTTP_AUTHORIZATION=f"Bearer {token}")
+            return limited_per_user(request)
+
+        self.assertEqual(call(first).status_code, 200)
+        self.assertEqual(call(first).status_code, 429)
+        self.assertEqual(call(second).status_code, 200)
+
+
+class TieredCacheTests(TestCase):
+    def _cache(self, location):
+        return TieredCache(location, {
+            "OPTIONS": {
+                "L2_BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "L1_MAX_ENTRIES": 2,
+                "L1_TIMEOUT": 30,
+            },
+        })
+
+    def test_l2_hit_fills_l1(self):
+        tiered = self._cache("tiered-fill")
+        tiered.l2.set("k", {"v": 1})
+        self.assertEqual(tiered.get("k"), {"v": 1})
+        self.assertEqual(tiered.get("k"), {"v": 1})
+        self.assertIsNone(tiered.get("missing"))
+        stats = tiered.stats()
+        self.assertEqual((stats["l2_hits"], stats["l1_hits"], stats["misses"]), (1, 1, 1))
+
+    def test_writes_invalidate_l1_shared_by_process(self):
+        first, second = self._cache("tiered-shared"), self._cache("tiered-shared")
+        first.set("k", "old")
+        self.assertEqual(second.get("k"), "old")
+        second.delete("k")
+        self.assertIsNone(first.get("k"))
+
+    def test_remote_invalidation_and_lru_bound(self):
+        tiered = self._cache("tiered-remote")
+        for key in ("a", "b", "c"):
+            tiered.set(key, key)
+        self.assertEqual(tiered.stats()["l1_entries"], 2)
+
+        tiered.l2.set("b", "changed elsewhere")
+        self.assertEqual(tiered.get("b"), "b")
+        tiered.l1.handle_invalidation(f"other-process:{tiered.make_key('b')}")
+        self.assertEqual(tiered.get("b"), "changed elsewhere")
+
+
+class SqliteTuningTests(TestCase):
+    def test_pragmas_applied_to_connections(self):
+        info = describe_connection(connection)
+        self.assertEqual(info["busy_timeout"], 20000)
+        self.assertEqual(info["synchronous"], 1)  # NORMAL
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "SQLite only")
+    def test_connections_leave_journal_mode_to_the_migration(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = SQLiteDatabaseWrapper({**connection.settings_dict, "NAME": os.path.join(directory, "db.sqlite3")})
+            try:
+                # Opening a connection must not rewrite the file's journal mode.
+                self.assertEqual(describe_connection(wrapper)["journal_mode"], "delete")
+                self.assertEqual(enable_wal(wrapper), "wal")
+            finally:
+                wrapper.close()
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica")
+class ReplicaRoutingTests(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        Category.objects.create(name="On primary", slug="on-primary")
+        Category.objects.using("replica").create(name="On replica", slug="on-replica")
+
+    def test_only_opted_in_reads_use_replica(self):
+        self.assertEqual(Category.objects.get().name, "On primary")
+        with replica_reads():
+            self.assertEqual(Category.objects.get().name, "On replica")
+
+    def test_write_pins_rest_of_block_to_primary(self):
+        with replica_reads():
+            Category.objects.create(name="Fresh", slug="fresh")
+            self.assertTrue(Category.objects.filter(slug="fresh").exists())
+
+    def test_catalog_api_reads_replica(self):
+        response = self.client.get(reverse("product_api:category_list_api"))
+        self.assertContains(response, "On replica")
+        self.assertNotContains(response, "On primary")
+
+    def test_owner_dashboard_reads_replica_but_auth_stays_on_primary(self):
+        User.objects.create_user(username="owner", password="Pass12345", is_staff=True)
+        Product.objects.using("replica").create(name="Replica low stock", price=10, stock=1)
+        self.client.login(username="owner", password="Pass12345")
+        response = self.client.get(reverse("owner:dashboard"))
+        self.assertContains(response, "Replica low stock")
+
+
+class JsonEncoderTests(TestCase):
+    payload = {
+        "price": Decimal("120.00"),
+        "discounted_price": Decimal("149.99") * Decimal(83) / Decimal(100),
+        "created_at": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        "name": "Maziwa ☕",
+    }
+
+    def test_money_is_rounded_to_cents_and_kept_numeric(self):
+        decoded = json.loads(dump_json(self.payload))
+        self.assertEqual(decoded["price"], 120.0)
+        self.assertEqual(decoded["discounted_price"], 124.49)
+        self.assertEqual(decoded["created_at"], "2025-01-02T03:04:05+00:00")
+
+    def test_encoders_produce_identical_output(self):
+        outputs = {dump_json(self.payload, encoder=name) for name in JSON_ENCODERS}
+        self.assertEqual(len(outputs), 1)
+
+    def test_encoders_agree_on_form_errors(self):
+        form = CustomerRegistrationForm({"username": "x"})
+        self.assertFalse(form.is_valid())
+        outputs = {dump_json({"errors": form.errors}, encoder=name) for name in JSON_ENCODERS}
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(json.loads(outputs.pop())["errors"]["email"], ["This field is required."])
+
+    def test_large_responses_are_gzipped_when_accepted(self):
+        request = RequestFactory().get("/api/products/", HTTP_ACCEPT_ENCODING="gzip")
+        response = api_success({"items": ["product"] * 1000})
+        body = response.content
+        response["ETag"] = '"abc"'
+        compressed = compress_response(request, response)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(compressed["ETag"], 'W/"abc"')
+        self.assertEqual(gzip.decompress(compressed.content), body)
+
+        plain = compress_response(RequestFactory().get("/api/products/"), api_success({"items": ["product"] * 1000}))
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
@@ -4,6 +4,8 @@ import sys
 
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,6 +40,7 @@ INSTALLED_APPS = [
     'payment',
     'product',
     'owner',
+    'supermarket.core.apps.CoreConfig',
     # 'supermarket.common.apps.CommonConfig',
     ]
 
@@ -76,11 +79,79 @@ WSGI_APPLICATION = 'supermarket.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+RUNNING_TESTS = len(sys.argv) > 1 and sys.argv[1] == "test"
+
+# DB_ENGINE=postgres for multi-worker deployments; SQLite (tuned for WAL, see
+# supermarket.core.db) remains the default for single-node installs.
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgres":
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "0"))
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "supermarket"),
+            "USER": os.environ.get("POSTGRES_USER", "supermarket"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "127.0.0.1"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            # Persistent connections are incompatible with psycopg's pool.
+            "CONN_MAX_AGE": 0 if DB_POOL_MAX_SIZE else int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {
+                    "pool": {
+                        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+                        "max_size": DB_POOL_MAX_SIZE,
+                        "timeout": 10,
+                    }
+                }
+                if DB_POOL_MAX_SIZE
+                else {}
+            ),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("SQLITE_PATH", BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Seconds to wait on a locked database before raising.
+                'timeout': 20,
+                # Take the write lock up front so concurrent writers queue
+                # instead of failing to upgrade a read transaction.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
+
+# Optional read replica for reporting and anonymous catalog reads
+# (see supermarket.core.db_router). Tests get a separate SQLite database under
+# the same alias so routing can be exercised, but only enable it explicitly.
+DATABASE_REPLICA_ALIAS = None
+if RUNNING_TESTS:
+    DATABASES["replica"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db-replica.sqlite3"}
+elif DB_ENGINE == "postgres" and os.environ.get("POSTGRES_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["POSTGRES_REPLICA_HOST"],
+        "PORT": os.environ.get("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+    }
+    DATABASE_REPLICA_ALIAS = "replica"
+elif DB_ENGINE != "postgres" and os.environ.get("SQLITE_REPLICA_PATH"):
+    DATABASES["replica"] = {**DATABASES["default"], "NAME": os.environ["SQLITE_REPLICA_PATH"]}
+    DATABASE_REPLICA_ALIAS = "replica"
+
+DATABASE_ROUTERS = ["supermarket.core.db_router.PrimaryReplicaRouter"]
+
+# Applied to every new SQLite connection by supermarket.core.db. The WAL
+# journal mode persists in the file and is set once by a core migration.
+SQLITE_PRAGMAS = {
+    "busy_timeout": 20000,
+    "synchronous": "NORMAL",
 }
 
 
@@ -122,12 +193,81 @@ STATIC_URL = 'static/'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "supermarket-cache",
+# Shared Redis used for cross-worker state (cache, rate limits); empty keeps it in-process.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+# "tiered" = in-process L1 LRU in front of shared Redis; "locmem" = per-process only.
+# Tests always use LocMem so they never depend on a running Redis.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "tiered" if REDIS_URL else "locmem")
+
+if CACHE_BACKEND == "tiered" and REDIS_URL and not RUNNING_TESTS:
+    CACHES = {
+        "default": {
+            "BACKEND": "supermarket.core.cache.TieredCache",
+            "LOCATION": os.environ.get("CACHE_REDIS_URL", REDIS_URL),
+            "KEY_PREFIX": "supermarket",
+            "OPTIONS": {
+                "L1_MAX_ENTRIES": int(os.environ.get("CACHE_L1_MAX_ENTRIES", "1000")),
+                "L1_TIMEOUT": float(os.environ.get("CACHE_L1_TIMEOUT", "5")),
+            },
+        }
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "supermarket-cache",
+        }
+    }
+
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", REDIS_URL)
+RATE_LIMIT_BACKEND = (
+    "supermarket.core.rate_limit.RedisRateLimitBackend"
+    if RATE_LIMIT_REDIS_URL
+    else "supermarket.core.rate_limit.MemoryRateLimitBackend"
+)
+
+# API JSON encoding: "auto" uses orjson when installed, "stdlib" forces json.
+API_JSON_ENCODER = os.environ.get("API_JSON_ENCODER", "auto")
+API_DECIMAL_PLACES = 2
+# Catalog pages larger than this are gzip/brotli encoded for clients that accept it.
+API_COMPRESSION_MIN_BYTES = 2048
+
+# Anonymous catalog responses: server-side lifetime and client/CDN max-age.
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", "300"))
+CATALOG_CACHE_MAX_AGE = int(os.environ.get("CATALOG_CACHE_MAX_AGE", "60"))
+
+# Per-process LRU for cashier barcode scans (entries also expire on catalog changes).
+POS_BARCODE_CACHE_SIZE = int(os.environ.get("POS_BARCODE_CACHE_SIZE", "5000"))
+POS_BARCODE_CACHE_TIMEOUT = int(os.environ.get("POS_BARCODE_CACHE_TIMEOUT", "300"))
+POS_BARCODE_BATCH_LIMIT = 100
+POS_SYNC_BATCH_LIMIT = 200
+
+# Low-stock digest recipients; empty means active superusers and Owner group members.
+LOW_STOCK_DIGEST_RECIPIENTS = [
+    email.strip()
+    for email in os.environ.get("LOW_STOCK_DIGEST_RECIPIENTS", "").split(",")
+    if email.strip()
+]
+# Reorder suggestions: sales window, supplier lead time, days of stock to
+# order on top of it, and the safety-stock multiple of daily demand spread.
+REORDER_LOOKBACK_DAYS = int(os.environ.get("REORDER_LOOKBACK_DAYS", "28"))
+REORDER_LEAD_TIME_DAYS = int(os.environ.get("REORDER_LEAD_TIME_DAYS", "7"))
+REORDER_COVER_DAYS = int(os.environ.get("REORDER_COVER_DAYS", "14"))
+REORDER_SERVICE_FACTOR = float(os.environ.get("REORDER_SERVICE_FACTOR", "1.65"))
+# Nightly demand forecast: days of history, exponential smoothing weight of
+# the latest day, moving-average window, and how old a forecast may be
+# before reorder suggestions ignore it.
+FORECAST_HISTORY_DAYS = int(os.environ.get("FORECAST_HISTORY_DAYS", "90"))
+FORECAST_SMOOTHING = float(os.environ.get("FORECAST_SMOOTHING", "0.3"))
+FORECAST_MOVING_AVERAGE_DAYS = int(os.environ.get("FORECAST_MOVING_AVERAGE_DAYS", "7"))
+FORECAST_MAX_AGE_HOURS = int(os.environ.get("FORECAST_MAX_AGE_HOURS", "48"))
+# Order archival: closed orders older than this many days move to archive
+# tables, in chunks of ARCHIVE_CHUNK_SIZE orders per transaction and at most
+# ARCHIVE_MAX_CHUNKS chunks per nightly run.
+ARCHIVE_ORDERS_AFTER_DAYS = int(os.environ.get("ARCHIVE_ORDERS_AFTER_DAYS", "365"))
+ARCHIVE_CHUNK_SIZE = int(os.environ.get("ARCHIVE_CHUNK_SIZE", "500"))
+ARCHIVE_MAX_CHUNKS = int(os.environ.get("ARCHIVE_MAX_CHUNKS", "200"))
 
 UNSPLASH_ACCESS_KEY = os.environ.get("UNSPLASH_ACCESS_KEY", "")
 UNSPLASH_APP_NAME = "my_daraja_marketplace"
@@ -204,6 +344,11 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 AFRICASTALKING_USERNAME = os.environ.get("AFRICASTALKING_USERNAME", "sandbox")   # e.g. "sandbox" or your AT username
 AFRICASTALKING_API_KEY = os.environ.get("AFRICASTALKING_API_KEY", "atsk_eb02bae5dfa0958ffae37af2dead73c2b603a04b4e74442d757c8448ef788f1db1869753")
 
+# SMS gateway backend: payment.sms.AfricasTalkingBackend, payment.sms.ConsoleBackend
+# or payment.sms.LocMemBackend (tests). Built lazily on first send.
+SMS_BACKEND = os.environ.get("SMS_BACKEND", "payment.sms.AfricasTalkingBackend")
+SMS_BACKEND_OPTIONS = {}
+
 
 # Celery / Redis
 CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
@@ -212,6 +357,36 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Africa/Nairobi"
+CELERY_BEAT_SCHEDULE = {
+    "purge-expired-refresh-tokens": {
+        "task": "supermarket.core.tasks.purge_expired_refresh_tokens_task",
+        "schedule": 60 * 60 * 24,
+    },
+    "sync-promotions": {
+        "task": "product.tasks.sync_promotions_task",
+        "schedule": 60,
+    },
+    "low-stock-digest": {
+        "task": "product.tasks.send_low_stock_digest_task",
+        "schedule": 60 * 60,
+    },
+    "snapshot-stock": {
+        "task": "product.tasks.snapshot_stock_task",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    "forecast-demand": {
+        "task": "product.tasks.forecast_demand_task",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "archive-orders": {
+        "task": "product.tasks.archive_orders_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
+
+# API tokens: short-lived access tokens, rotated refresh tokens.
+JWT_ACCESS_TOKEN_MINUTES = int(os.environ.get("JWT_ACCESS_TOKEN_MINUTES", "15"))
+JWT_REFRESH_TOKEN_DAYS = int(os.environ.get("JWT_REFRESH_TOKEN_DAYS", "30"))
 
 SESSION_COOKIE_HTTPONLY = True
 CSRF_COOKIE_HTTPONLY = True